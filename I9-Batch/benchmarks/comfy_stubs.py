@@ -0,0 +1,104 @@
+"""Minimal stand-ins for the ComfyUI modules the I9 nodes import.
+
+install(input_dir) registers folder_paths, comfy.utils, comfy.model_management
+and server in sys.modules, so the node package can be imported outside
+ComfyUI. Routes the modules register are collected on a real aiohttp
+RouteTableDef (stub_routes()) and can be served with aiohttp's test server,
+next to a /prompt route that parses and queues prompts on the event loop
+like ComfyUI's. send_sync() keeps the websocket events it was given.
+comfy.utils.common_upscale follows ComfyUI's, so checkouts from before the
+shared resize engine can be benchmarked too (load_package(package_dir)).
+"""
+import sys
+import uuid
+import types
+import importlib.util
+from collections import deque
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+PACKAGE_NAME = "i9_batch"
+
+
+def install(input_dir):
+    import torch
+    from aiohttp import web
+
+    folder_paths = types.ModuleType("folder_paths")
+    folder_paths.get_input_directory = lambda: str(input_dir)
+    folder_paths.get_temp_directory = lambda: str(Path(input_dir) / "temp")
+    sys.modules["folder_paths"] = folder_paths
+
+    comfy = types.ModuleType("comfy")
+    comfy_utils = types.ModuleType("comfy.utils")
+    comfy_utils.common_upscale = _common_upscale
+    model_management = types.ModuleType("comfy.model_management")
+    model_management.get_torch_device = lambda: torch.device("cpu")
+    comfy.utils = comfy_utils
+    comfy.model_management = model_management
+    sys.modules["comfy"] = comfy
+    sys.modules["comfy.utils"] = comfy_utils
+    sys.modules["comfy.model_management"] = model_management
+
+    server = types.ModuleType("server")
+
+    class PromptServer:
+        instance = None
+
+        def __init__(self):
+            self.routes = web.RouteTableDef()
+            self.prompt_queue = []
+            self.messages = deque(maxlen=1000)  # (event, data, sid) given to send_sync
+
+        def send_sync(self, event, data, sid=None):
+            self.messages.append((event, data, sid))
+
+    instance = PromptServer.instance = PromptServer()
+
+    @instance.routes.post("/prompt")
+    async def post_prompt(request):
+        data = await request.json()
+        if "prompt" not in data:
+            return web.json_response({"error": "no prompt", "node_errors": {}}, status=400)
+        prompt_id = str(uuid.uuid4())
+        instance.prompt_queue.append((prompt_id, data["prompt"]))
+        return web.json_response({"prompt_id": prompt_id, "number": len(instance.prompt_queue), "node_errors": {}})
+
+    server.PromptServer = PromptServer
+    sys.modules["server"] = server
+
+
+def _common_upscale(samples, width, height, upscale_method, crop):
+    """comfy.utils.common_upscale for the torch interpolate modes (samples are NCHW)"""
+    import torch
+    if crop == "center":
+        old_width, old_height = samples.shape[-1], samples.shape[-2]
+        old_aspect, new_aspect = old_width / old_height, width / height
+        x = y = 0
+        if old_aspect > new_aspect:
+            x = round((old_width - old_width * (new_aspect / old_aspect)) / 2)
+        elif old_aspect < new_aspect:
+            y = round((old_height - old_height * (old_aspect / new_aspect)) / 2)
+        samples = samples.narrow(-2, y, old_height - y * 2).narrow(-1, x, old_width - x * 2)
+    return torch.nn.functional.interpolate(samples, size=(height, width), mode=upscale_method)
+
+
+def stub_routes():
+    return sys.modules["server"].PromptServer.instance.routes
+
+
+def load_package(package_dir=PACKAGE_DIR):
+    """Import the node package (its directory name isn't a valid module name) and return it"""
+    if PACKAGE_NAME in sys.modules:
+        return sys.modules[PACKAGE_NAME]
+    package_dir = Path(package_dir)
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE_NAME, package_dir / "__init__.py", submodule_search_locations=[str(package_dir)])
+    package = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE_NAME] = package
+    spec.loader.exec_module(package)
+    return package
+
+
+def submodule(name):
+    return sys.modules[f"{PACKAGE_NAME}.{name}"]
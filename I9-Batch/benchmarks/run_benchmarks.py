@@ -0,0 +1,685 @@
+"""Benchmark the I9 loader nodes outside ComfyUI.
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --baseline results.json --tolerance 0.15
+
+    # the same scenarios against an older checkout, e.g. for a before/after comparison
+    git worktree add /tmp/i9_before <commit>
+    python benchmarks/run_benchmarks.py --package-dir /tmp/i9_before/I9-Batch --scenarios image_memory
+
+Synthetic pools are generated once per pool size (seeded, so every run sees
+identical files) and each scenario variant runs in its own child process,
+which keeps caches cold between variants and makes ru_maxrss a per-scenario
+peak RSS. Results are written as JSON; with --baseline the run exits non-zero
+when a latency, throughput or memory figure regresses beyond the tolerance.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+RESULT_MARKER = "I9_BENCH_RESULT "
+
+DEFAULT_IMAGE_POOL_SIZES = [16, 64, 256]
+DEFAULT_VIDEO_POOL_SIZES = [4, 16]
+# Minute-long clips with sparse keyframes, where seeking rather than decoding dominates
+DEFAULT_LONG_VIDEO_POOL_SIZES = [2]
+LONG_VIDEO_FRAMES = 1800
+LONG_VIDEO_GOP = 250
+# Seek results are compared with a sequential decode, subsampled by this factor per axis
+SEEK_CHECK_STRIDE = 8
+# JPEG-only pool for the decode worker scaling comparison
+DEFAULT_JPEG_POOL_SIZES = [500]
+TARGET_SIZE = (512, 512)
+# Full-resolution decodes held in memory by the resize scenario are capped at this many images
+RESIZE_SAMPLE_LIMIT = 48
+# The memory scenario loads the pool at this size, where the output batch dominates peak RSS
+MEMORY_TARGET_SIZE = (1024, 1024)
+# Untimed idle gap between Sequential loads, standing in for the sampler that runs between prompts
+SEQUENTIAL_SAMPLING_GAP = 0.15
+UPLOAD_FILES_PER_REQUEST = 4
+LOOP_LAG_INTERVAL = 0.002
+UPLOAD_CLIENTS = 4
+PROMPT_INTERVAL = 0.02
+PROMPT_IDLE_SECONDS = 5.0
+PROMPT_NODES = 40
+
+
+# --- scenarios (run in the child process) -------------------------------------
+
+class Run:
+    """Timing samples of one scenario variant: each sample is (seconds, items processed)"""
+
+    def __init__(self):
+        self.samples = []
+        self.extra = {}
+
+    def time(self, fn, items=1):
+        start = time.perf_counter()
+        result = fn()
+        self.samples.append((time.perf_counter() - start, items))
+        return result
+
+
+def _image_node():
+    from comfy_stubs import submodule
+    processing = submodule("i9_batch_processing")
+    if hasattr(processing, '_pool_index'):  # older checkouts list the directory on every load
+        processing._pool_index.refresh(force=True)
+    return processing, processing.I9_BatchProcessing()
+
+
+def _peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def _video_node():
+    from comfy_stubs import submodule
+    extractor = submodule("i9_batch_video_extractor")
+    extractor._pool_index.refresh(force=True)
+    return extractor, extractor.I9_BatchVideoExtractor()
+
+
+def scenario_image_batch(spec, run):
+    """Batch Tensor over the whole pool; cold clears the tensor cache (not a pack) before every iteration"""
+    processing, node = _image_node()
+    count = len(processing._pool_index.files())
+    for _ in range(spec['repeats']):
+        if spec['variant'].get('cache') == 'cold':
+            processing._tensor_cache.clear()
+        run.time(lambda: node.load_batch(mode="Batch Tensor", width=TARGET_SIZE[0], height=TARGET_SIZE[1],
+                                         resize_mode=spec['variant'].get('resize_mode', "Center Crop"),
+                                         workers=spec['variant']['workers'],
+                                         use_pack=spec['variant'].get('use_pack', False)), count)
+
+
+def scenario_image_memory(spec, run):
+    """One cold Batch Tensor load at MEMORY_TARGET_SIZE with only the inputs every version of the node has.
+
+    Peak RSS minus the peak before the load (rss_before_mb) is what loading the
+    batch cost; the float32 output alone is batch_mb.
+    """
+    processing, node = _image_node()
+    count = len(os.listdir(os.path.join(spec['input_dir'], "I9_ImagePool")))
+    run.extra['rss_before_mb'] = round(_peak_rss_mb(), 1)
+    images = run.time(lambda: node.load_batch(mode="Batch Tensor", width=MEMORY_TARGET_SIZE[0], height=MEMORY_TARGET_SIZE[1],
+                                              resize_mode="Center Crop")[0], count)
+    run.extra['batch_mb'] = round(images.element_size() * images.nelement() / (1024 * 1024), 1)
+    run.extra['load_peak_mb'] = round(_peak_rss_mb() - run.extra['rss_before_mb'], 1)
+
+
+def scenario_image_sequential(spec, run):
+    """Auto-advancing Sequential sweep over the pool, one sample per image, with and without prefetch.
+
+    Each load is followed by an untimed SEQUENTIAL_SAMPLING_GAP, the time a
+    real queue spends sampling, which is what prefetch overlaps the next
+    decode with.
+    """
+    processing, node = _image_node()
+    count = len(processing._pool_index.files())
+    for _ in range(spec['repeats']):
+        processing._tensor_cache.clear()
+        for _ in range(count):
+            run.time(lambda: node.load_batch(mode="Sequential", auto_advance=True, prefetch=spec['variant']['prefetch'],
+                                             width=TARGET_SIZE[0], height=TARGET_SIZE[1], node_id="bench"))
+            time.sleep(SEQUENTIAL_SAMPLING_GAP)
+
+
+def scenario_image_bucketed(spec, run):
+    """Every batch of the Bucketed mode, one sample per batch (the next batch is prefetched)"""
+    processing, node = _image_node()
+    for _ in range(spec['repeats']):
+        processing._tensor_cache.clear()
+        chunk_index, total = 0, 1
+        while chunk_index < total:
+            images, _, total, _ = run.time(lambda: node.load_batch(mode="Bucketed", chunk_index=chunk_index, chunk_size=16,
+                                                                  width=TARGET_SIZE[0], height=TARGET_SIZE[1], node_id="bench"))
+            run.samples[-1] = (run.samples[-1][0], images.shape[0])
+            chunk_index += 1
+
+
+def scenario_image_decode(spec, run):
+    """Decode alone, with and without JPEG draft (reduced-scale) decoding; also per source size"""
+    import numpy as np
+    from PIL import Image
+    processing, node = _image_node()
+    if not spec['variant']['draft']:
+        processing.draft_size = lambda *args: None
+    paths = [os.path.join(processing._pool_index.pool_dir, f) for f in processing._pool_index.files()]
+    sources = {}
+    for path in paths:
+        with Image.open(path) as img:
+            sources[path] = f"{img.format} {img.width}x{img.height}"
+    by_source = {}
+    for _ in range(spec['repeats']):
+        for path in paths:
+            image = run.time(lambda: node._decode_image(path, TARGET_SIZE[0], TARGET_SIZE[1], "Center Crop"))
+            stats = by_source.setdefault(sources[path], {'ms': [], 'decoded_mb': image.nbytes / 2 ** 20})
+            stats['ms'].append(run.samples[-1][0] * 1000)
+    run.extra['by_source'] = {source: {'p50_ms': float(np.percentile(stats['ms'], 50)), 'decoded_mb': stats['decoded_mb']}
+                              for source, stats in sorted(by_source.items())}
+
+
+def scenario_draft_fidelity(spec, run):
+    """PSNR of the final draft-decoded output against a full decode, per JPEG"""
+    import numpy as np
+    processing, node = _image_node()
+    draft_size = processing.draft_size
+    pool_dir = processing._pool_index.pool_dir
+    paths = [os.path.join(pool_dir, f) for f in processing._pool_index.files() if f.lower().endswith(('.jpg', '.jpeg'))]
+
+    def resized(path):
+        resizer = processing.BatchResizer(1, TARGET_SIZE[0], TARGET_SIZE[1], "Center Crop")
+        resizer.add(0, node._decode_image(path, TARGET_SIZE[0], TARGET_SIZE[1], "Center Crop"))
+        return resizer.flush()[0].numpy()
+
+    psnr = []
+    for path in paths:
+        processing.draft_size = draft_size
+        drafted = run.time(lambda: resized(path))
+        processing.draft_size = lambda *args: None
+        full = resized(path)
+        mse = float(np.mean((drafted - full) ** 2))
+        psnr.append(99.0 if mse == 0 else 10 * np.log10(1.0 / mse))
+    processing.draft_size = draft_size
+    if psnr:
+        run.extra['psnr_db'] = {'mean': float(np.mean(psnr)), 'min': float(np.min(psnr))}
+
+
+def scenario_resize(spec, run):
+    """BatchResizer on pre-decoded images: one interpolate call per image (group_size=1) vs grouped.
+
+    engine=common_upscale is the per-image float path both nodes used before the
+    shared engine: convert to float, comfy.utils.common_upscale, stack.
+    """
+    import numpy as np
+    import torch
+    import comfy.utils
+    from PIL import Image
+    processing, _ = _image_node()
+    pool_dir = processing._pool_index.pool_dir
+    images = []
+    for filename in processing._pool_index.files()[:RESIZE_SAMPLE_LIMIT]:
+        with Image.open(os.path.join(pool_dir, filename)) as img:
+            images.append(np.array(img.convert('RGB')))
+
+    def common_upscale_all():
+        return torch.stack([
+            comfy.utils.common_upscale(torch.from_numpy(image.astype(np.float32) / 255.0).movedim(-1, 0).unsqueeze(0),
+                                       TARGET_SIZE[0], TARGET_SIZE[1], "bilinear", "center").squeeze(0).movedim(0, -1)
+            for image in images])
+
+    def resize_all():
+        resizer = processing.BatchResizer(len(images), TARGET_SIZE[0], TARGET_SIZE[1], "Center Crop",
+                                          group_size=spec['variant']['group_size'])
+        for i, image in enumerate(images):
+            resizer.add(i, image)
+        return resizer.flush()
+
+    engine = common_upscale_all if spec['variant'].get('engine') == "common_upscale" else resize_all
+    for _ in range(spec['repeats']):
+        run.time(engine, len(images))
+    run.extra['source_sizes'] = len({image.shape for image in images})
+
+
+def scenario_video_batch(spec, run):
+    """Video Batch Tensor at one frame number; cold also closes the pooled decoders"""
+    extractor, node = _video_node()
+    count = len(extractor._pool_index.files())
+    cache = spec['variant']['cache']
+    for _ in range(spec['repeats']):
+        if cache in ('cold', 'open_handles'):
+            extractor._frame_cache.clear()
+        if cache == 'cold':
+            extractor._capture_pool.invalidate()
+        run.time(lambda: node.extract_frames(mode="Batch Tensor", frame_number=spec['frame_number'],
+                                             width=TARGET_SIZE[0], height=TARGET_SIZE[1],
+                                             workers=spec['variant']['workers']), count)
+
+
+def scenario_video_samples(spec, run):
+    """Evenly Spaced sampling, several frames per video"""
+    extractor, node = _video_node()
+    count = len(extractor._pool_index.files())
+    for _ in range(spec['repeats']):
+        extractor._frame_cache.clear()
+        extractor._capture_pool.invalidate()
+        start = time.perf_counter()
+        images = node.extract_frames(mode="Batch Tensor", sampling="Evenly Spaced", sample_count=8,
+                                     width=TARGET_SIZE[0], height=TARGET_SIZE[1])[0]
+        run.samples.append((time.perf_counter() - start, images.shape[0]))
+    run.extra['videos'] = count
+
+
+def _reference_frames(video_path):
+    """Every frame of video_path decoded in order with PyAV (no seeking), subsampled; None without PyAV"""
+    import numpy as np
+    try:
+        import av
+    except ImportError:
+        return None
+    with av.open(video_path) as container:
+        return np.stack([frame.to_ndarray(format='bgr24')[::SEEK_CHECK_STRIDE, ::SEEK_CHECK_STRIDE]
+                         for frame in container.decode(video=0)]).astype(np.int16)
+
+
+def scenario_video_seek(spec, run):
+    """Random-access reads on one decoder per backend, with and without the keyframe index.
+
+    Each read is checked against a sequential decode: a seek that returns a
+    frame closer to another frame number than to the requested one counts as
+    wrong_frames.
+    """
+    import numpy as np
+    from comfy_stubs import submodule
+    backends = submodule("i9_video_backends")
+    video_index = submodule("i9_video_index")
+    extractor, _ = _video_node()
+    backend = spec['variant']['backend']
+    if backend not in backends.available_backends():
+        run.extra['skipped'] = f"{backend} not installed"
+        return
+
+    rng = random.Random(0)
+    checked = wrong = 0
+    for filename in extractor._pool_index.files():
+        video_path = os.path.join(extractor._pool_index.pool_dir, filename)
+        reference = _reference_frames(video_path)
+        handle = backends.open_video(video_path, backend)
+        try:
+            if spec['variant']['index']:
+                handle.apply_index(video_index.get_video_index(extractor.VIDEO_POOL, filename, video_path, build=True))
+            for _ in range(spec['repeats']):
+                frame_number = rng.randrange(handle.frame_count)
+                frame = run.time(lambda: handle.read(frame_number))
+                if reference is not None and frame is not None and frame_number < len(reference):
+                    sample = frame[::SEEK_CHECK_STRIDE, ::SEEK_CHECK_STRIDE].astype(np.int16)
+                    errors = np.abs(reference - sample).mean(axis=(1, 2, 3))
+                    checked += 1
+                    wrong += int(errors[frame_number] > errors.min())
+        finally:
+            handle.release()
+    run.extra['frames_checked'] = checked
+    run.extra['wrong_frames'] = wrong
+
+
+def _route_client(loop_body):
+    """Serve the stub route table with aiohttp's test server and run loop_body(client)"""
+    from aiohttp import web
+    from aiohttp.test_utils import TestClient, TestServer
+    from comfy_stubs import stub_routes
+
+    async def main():
+        app = web.Application(client_max_size=1024 ** 3)
+        app.add_routes(stub_routes())
+        async with TestClient(TestServer(app)) as client:
+            await loop_body(client)
+
+    asyncio.run(main())
+
+
+def scenario_list_route(spec, run):
+    """GET a page of the pool listing (image or video) through the HTTP route"""
+    if spec['pool'] == 'images':
+        _image_node()
+        path = "/i9/batch/list?limit=50&dims=1"
+    else:
+        _video_node()
+        path = "/i9/video/list?limit=50"
+
+    async def body(client):
+        for _ in range(spec['repeats'] * 10):
+            start = time.perf_counter()
+            async with client.get(path) as response:
+                assert response.status == 200, await response.text()
+                await response.read()
+            run.samples.append((time.perf_counter() - start, 1))
+
+    _route_client(body)
+
+
+async def _post_uploads(client, source_dir, filenames, run=None):
+    """Upload filenames UPLOAD_FILES_PER_REQUEST at a time; request times go to run.samples when given"""
+    from aiohttp import FormData
+    for i in range(0, len(filenames), UPLOAD_FILES_PER_REQUEST):
+        batch = filenames[i:i + UPLOAD_FILES_PER_REQUEST]
+        form = FormData()
+        handles = [open(os.path.join(source_dir, f), 'rb') for f in batch]
+        try:
+            for filename, handle in zip(batch, handles):
+                form.add_field('image', handle, filename=filename)
+            start = time.perf_counter()
+            async with client.post("/i9/batch/upload", data=form) as response:
+                assert response.status == 200, await response.text()
+                await response.read()
+            if run is not None:
+                run.samples.append((time.perf_counter() - start, len(batch)))
+        finally:
+            for handle in handles:
+                handle.close()
+
+
+def scenario_upload_route(spec, run):
+    """Multipart uploads into an empty pool while a ticker measures event-loop lag.
+
+    The lag is how late a LOOP_LAG_INTERVAL sleep wakes up, i.e. how long other
+    requests (such as /prompt) would have been stalled by the upload handler.
+    """
+    import numpy as np
+    source_dir = spec['source_dir']
+    lags = []
+
+    async def ticker(stop):
+        while not stop.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            lags.append(time.perf_counter() - start - LOOP_LAG_INTERVAL)
+
+    async def body(client):
+        stop = asyncio.Event()
+        tick = asyncio.create_task(ticker(stop))
+        await _post_uploads(client, source_dir, sorted(os.listdir(source_dir)), run)
+        stop.set()
+        await tick
+
+    _image_node()
+    _route_client(body)
+    if lags:
+        lag_ms = np.array(lags) * 1000
+        run.extra['loop_lag_ms'] = {'p50': float(np.percentile(lag_ms, 50)), 'p99': float(np.percentile(lag_ms, 99)),
+                                    'max': float(lag_ms.max())}
+
+
+def _stub_prompt(nodes=PROMPT_NODES):
+    """API-format workflow of the size a real graph posts to /prompt"""
+    return {str(i): {'class_type': "I9_BatchProcessing",
+                     'inputs': {'mode': "Sequential", 'batch_index': i, 'width': 512, 'height': 512, 'seed': i,
+                                'prompt': "lorem ipsum " * 20, 'model': [str(i - 1), 0] if i else "none"}}
+            for i in range(nodes)}
+
+
+def scenario_prompt_latency(spec, run):
+    """POST /prompt every PROMPT_INTERVAL, alone or while UPLOAD_CLIENTS upload the source pool; samples are /prompt times.
+
+    ComfyUI queues prompts on the same event loop as the upload routes, so
+    anything an upload handler does on the loop shows up here as latency.
+    """
+    source_dir = spec['source_dir']
+    filenames = sorted(os.listdir(source_dir))
+    payload = {'prompt': _stub_prompt(), 'client_id': "bench"}
+
+    async def prompter(client, stop):
+        while not stop.is_set():
+            start = time.perf_counter()
+            async with client.post("/prompt", json=payload) as response:
+                assert response.status == 200, await response.text()
+                await response.read()
+            run.samples.append((time.perf_counter() - start, 1))
+            await asyncio.sleep(PROMPT_INTERVAL)
+
+    async def body(client):
+        stop = asyncio.Event()
+        prompts = asyncio.create_task(prompter(client, stop))
+        start = time.perf_counter()
+        if spec['variant'].get('uploads'):
+            await asyncio.gather(*(_post_uploads(client, source_dir, filenames[i::UPLOAD_CLIENTS])
+                                   for i in range(UPLOAD_CLIENTS)))
+        else:
+            await asyncio.sleep(PROMPT_IDLE_SECONDS)
+        run.extra['window_s'] = time.perf_counter() - start
+        stop.set()
+        await prompts
+
+    _image_node()
+    _route_client(body)
+
+
+# name -> (function, pool kind, variants, unit)
+SCENARIOS = {
+    'image_batch': (scenario_image_batch, 'images',
+                    [{'workers': 1, 'cache': 'cold'}, {'workers': 0, 'cache': 'cold'}, {'workers': 0, 'cache': 'warm'},
+                     {'workers': 0, 'cache': 'cold', 'resize_mode': "Letterbox"},
+                     {'workers': 0, 'cache': 'cold', 'use_pack': True}], 'images/s'),
+    'jpeg_workers': (scenario_image_batch, 'jpegs',
+                     [{'workers': 1, 'cache': 'cold'}, {'workers': 4, 'cache': 'cold'}, {'workers': 0, 'cache': 'cold'}], 'images/s'),
+    'image_memory': (scenario_image_memory, 'images', [{}], 'images/s'),
+    'image_sequential': (scenario_image_sequential, 'images', [{'prefetch': 0}, {'prefetch': 2}], 'images/s'),
+    'image_bucketed': (scenario_image_bucketed, 'images', [{}], 'images/s'),
+    'image_decode': (scenario_image_decode, 'images', [{'draft': True}, {'draft': False}], 'images/s'),
+    'draft_fidelity': (scenario_draft_fidelity, 'images', [{}], 'images/s'),
+    'jpeg_decode': (scenario_image_decode, 'jpegs', [{'draft': True}, {'draft': False}], 'images/s'),
+    'resize': (scenario_resize, 'images', [{'engine': "common_upscale"}, {'group_size': 1}, {'group_size': 16}], 'images/s'),
+    'video_batch': (scenario_video_batch, 'videos',
+                    [{'workers': 1, 'cache': 'cold'}, {'workers': 0, 'cache': 'cold'},
+                     {'workers': 0, 'cache': 'open_handles'}, {'workers': 0, 'cache': 'cached'}], 'frames/s'),
+    'video_samples': (scenario_video_samples, 'videos', [{}], 'frames/s'),
+    'video_seek': (scenario_video_seek, 'videos',
+                   [{'backend': backend, 'index': index} for backend in ("OpenCV", "PyAV", "FFmpeg") for index in (False, True)], 'frames/s'),
+    'video_seek_long': (scenario_video_seek, 'long_videos',
+                        [{'backend': backend, 'index': index} for backend in ("OpenCV", "PyAV", "FFmpeg") for index in (False, True)], 'frames/s'),
+    'image_list_route': (scenario_list_route, 'images', [{}], 'requests/s'),
+    'video_list_route': (scenario_list_route, 'videos', [{}], 'requests/s'),
+    'upload_route': (scenario_upload_route, 'upload', [{}], 'images/s'),
+    'prompt_latency': (scenario_prompt_latency, 'upload', [{'uploads': False}, {'uploads': True}], 'requests/s'),
+}
+
+
+def _summarize(run):
+    import numpy as np
+    result = {'peak_rss_mb': round(_peak_rss_mb(), 1), **run.extra}
+    if not run.samples:
+        return result
+    seconds = np.array([s for s, _ in run.samples])
+    items = sum(n for _, n in run.samples)
+    latency_ms = seconds * 1000
+    result.update({
+        'samples': len(run.samples),
+        'items': items,
+        'latency_ms': {
+            'p50': float(np.percentile(latency_ms, 50)),
+            'p90': float(np.percentile(latency_ms, 90)),
+            'p99': float(np.percentile(latency_ms, 99)),
+            'mean': float(latency_ms.mean()),
+            'min': float(latency_ms.min()),
+            'max': float(latency_ms.max()),
+        },
+        'throughput': items / float(seconds.sum()) if seconds.sum() else 0.0,
+    })
+    return result
+
+
+def run_child(spec):
+    sys.path.insert(0, str(BENCH_DIR))
+    import comfy_stubs
+    comfy_stubs.install(spec['input_dir'])
+    comfy_stubs.load_package(spec['package_dir'])
+    # Older checkouts have no metrics module
+    metrics = getattr(sys.modules.get(f"{comfy_stubs.PACKAGE_NAME}.i9_metrics"), 'metrics', None)
+    if metrics is not None:
+        metrics.reset()
+
+    run = Run()
+    SCENARIOS[spec['scenario']][0](spec, run)
+    result = _summarize(run)
+    if metrics is not None:
+        result['metrics'] = metrics.snapshot()
+    print(RESULT_MARKER + json.dumps(result))
+
+
+# --- orchestration (parent process) --------------------------------------------
+
+def variant_label(variant):
+    return ",".join(f"{k}={v}" for k, v in variant.items()) or "default"
+
+
+def _prepare_pools(workdir, kind, size, seed):
+    """Input directory holding a generated pool of the given kind and size (created once per workdir)"""
+    sys.path.insert(0, str(BENCH_DIR))
+    import synthetic
+    input_dir = workdir / f"{kind}_{size}"
+    pool_dir = input_dir / ("I9_VideoPool" if kind in ('videos', 'long_videos') else "I9_ImagePool")
+    marker = input_dir / ".complete"
+    if not marker.exists():
+        shutil.rmtree(input_dir, ignore_errors=True)
+        print(f"Generating {size} synthetic {kind} in {pool_dir}", file=sys.stderr)
+        if kind == 'videos':
+            synthetic.make_video_pool(pool_dir, size, seed=seed)
+        elif kind == 'long_videos':
+            synthetic.make_video_pool(pool_dir, size, frames=LONG_VIDEO_FRAMES, seed=seed, gop=LONG_VIDEO_GOP)
+        elif kind == 'jpegs':
+            synthetic.make_image_pool(pool_dir, size, seed=seed, formats=synthetic.IMAGE_FORMATS[:1])
+        else:
+            synthetic.make_image_pool(pool_dir, size, seed=seed)
+        marker.touch()
+    return input_dir, pool_dir
+
+
+def run_scenario(workdir, scenario, variant, pool_size, args):
+    kind = SCENARIOS[scenario][1]
+    spec = {'scenario': scenario, 'variant': variant, 'pool_size': pool_size, 'repeats': args.repeats,
+            'frame_number': args.frame_number, 'package_dir': args.package_dir}
+    if kind == 'upload':
+        _, source_dir = _prepare_pools(workdir, 'images', pool_size, args.seed)
+        input_dir = Path(tempfile.mkdtemp(prefix="upload_", dir=workdir))
+        spec.update(pool='images', source_dir=str(source_dir))
+    else:
+        input_dir, _ = _prepare_pools(workdir, kind, pool_size, args.seed)
+        spec['pool'] = kind
+        # Cold start: no manifest, tensor cache or video index from a previous child
+        shutil.rmtree(input_dir / "I9_Cache", ignore_errors=True)
+    spec['input_dir'] = str(input_dir)
+
+    try:
+        proc = subprocess.run([sys.executable, str(Path(__file__).resolve()), "--child", json.dumps(spec)],
+                              capture_output=True, text=True, timeout=args.timeout)
+    except subprocess.TimeoutExpired:
+        return {'error': f"timed out after {args.timeout} s"}
+    finally:
+        if kind == 'upload':
+            shutil.rmtree(input_dir, ignore_errors=True)
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+    return {'error': (proc.stderr.strip().splitlines() or [f"exit code {proc.returncode}"])[-1]}
+
+
+def environment(package_dir):
+    env = {'python': platform.python_version(), 'platform': platform.platform(), 'cpu_count': os.cpu_count(),
+           'package_dir': package_dir}
+    try:
+        env['commit'] = subprocess.run(["git", "rev-parse", "HEAD"], cwd=package_dir, capture_output=True,
+                                       text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    for module in ("torch", "numpy", "PIL", "cv2", "av", "aiohttp"):
+        try:
+            env[module] = __import__(module).__version__
+        except (ImportError, AttributeError):
+            env[module] = None
+    env['ffmpeg'] = shutil.which("ffmpeg") is not None
+    return env
+
+
+def result_key(result):
+    return (result['scenario'], result['variant'], result['pool_size'])
+
+
+def compare(results, baseline, tolerance):
+    """Regressions against a baseline: slower p50/p99, lower throughput or higher peak RSS beyond tolerance"""
+    previous = {result_key(r): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        base = previous.get(result_key(result))
+        if base is None or 'latency_ms' not in result or 'latency_ms' not in base:
+            continue
+        checks = [
+            ('latency p50', result['latency_ms']['p50'], base['latency_ms']['p50'], 1),
+            ('latency p99', result['latency_ms']['p99'], base['latency_ms']['p99'], 1),
+            ('throughput', result['throughput'], base['throughput'], -1),
+            ('peak RSS', result['peak_rss_mb'], base['peak_rss_mb'], 1),
+        ]
+        for name, value, base_value, direction in checks:
+            if not base_value:
+                continue
+            change = (value - base_value) / base_value
+            result.setdefault('vs_baseline', {})[name] = round(change, 4)
+            if change * direction > tolerance:
+                regressions.append(f"{'/'.join(map(str, result_key(result)))}: {name} {base_value:.2f} -> {value:.2f} ({change:+.1%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=sorted(SCENARIOS))
+    parser.add_argument("--image-pool-sizes", nargs="+", type=int, default=DEFAULT_IMAGE_POOL_SIZES)
+    parser.add_argument("--video-pool-sizes", nargs="+", type=int, default=DEFAULT_VIDEO_POOL_SIZES)
+    parser.add_argument("--jpeg-pool-sizes", nargs="+", type=int, default=DEFAULT_JPEG_POOL_SIZES)
+    parser.add_argument("--long-video-pool-sizes", nargs="+", type=int, default=DEFAULT_LONG_VIDEO_POOL_SIZES)
+    parser.add_argument("--repeats", type=int, default=5, help="iterations per scenario variant")
+    parser.add_argument("--frame-number", type=int, default=45, help="frame extracted by the video batch scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="where pools are generated (kept and reused); default: a temporary directory")
+    parser.add_argument("--timeout", type=int, default=1800, help="seconds per scenario variant")
+    parser.add_argument("--package-dir", default=str(BENCH_DIR.parent),
+                        help="node package to benchmark (default: the one holding this script)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="previous JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression (default 0.15)")
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(json.loads(args.child))
+        return 0
+
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="i9_bench_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    results = []
+    try:
+        for scenario in args.scenarios:
+            _, kind, variants, unit = SCENARIOS[scenario]
+            sizes = {'videos': args.video_pool_sizes, 'long_videos': args.long_video_pool_sizes,
+                     'jpegs': args.jpeg_pool_sizes}.get(kind, args.image_pool_sizes)
+            for pool_size in sizes:
+                for variant in variants:
+                    label = variant_label(variant)
+                    print(f"{scenario} [{label}] pool={pool_size}", file=sys.stderr)
+                    result = {'scenario': scenario, 'variant': label, 'pool_size': pool_size, 'unit': unit}
+                    result.update(run_scenario(workdir, scenario, variant, pool_size, args))
+                    results.append(result)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {'environment': environment(args.package_dir), 'repeats': args.repeats, 'results': results}
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        report['regressions'] = regressions
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Deterministic synthetic pools for the benchmarks."""
+import os
+import random
+import itertools
+import numpy as np
+from PIL import Image, ImageDraw
+
+# Camera-sized JPEGs down to small web images, so resize grouping and JPEG draft decode both get exercised
+IMAGE_SIZES = [(4000, 3000), (3000, 4000), (1920, 1080), (1024, 1024), (640, 480)]
+IMAGE_FORMATS = [("JPEG", ".jpg", {"quality": 90}), ("PNG", ".png", {"compress_level": 1}), ("WEBP", ".webp", {"quality": 85})]
+
+
+def _picture(width, height, rng):
+    """Gradient plus shapes and mild noise: compresses like a photo rather than like pure noise"""
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = np.stack([np.broadcast_to(x, (height, width)), np.broadcast_to(y, (height, width)),
+                     np.full((height, width), rng.randrange(256), dtype=np.float32)], axis=-1)
+    noise = np.random.default_rng(rng.randrange(2 ** 32)).normal(0, 6, base.shape).astype(np.float32)
+    img = Image.fromarray(np.clip(base + noise, 0, 255).astype(np.uint8))
+    draw = ImageDraw.Draw(img)
+    for _ in range(12):
+        x0, y0 = rng.randrange(width), rng.randrange(height)
+        size = rng.randrange(min(width, height) // 8, min(width, height) // 2)
+        draw.ellipse((x0, y0, x0 + size, y0 + size), fill=tuple(rng.randrange(256) for _ in range(3)))
+    return img
+
+
+def make_image_pool(pool_dir, count, seed=0, sizes=IMAGE_SIZES, formats=IMAGE_FORMATS):
+    """Write count mixed-size JPEG/PNG/WebP images; returns their filenames"""
+    os.makedirs(pool_dir, exist_ok=True)
+    rng = random.Random(seed)
+    filenames = []
+    for i in range(count):
+        width, height = sizes[i % len(sizes)]
+        fmt, ext, options = formats[(i // len(sizes)) % len(formats)]
+        filename = f"synthetic_{i:05d}{ext}"
+        _picture(width, height, rng).save(os.path.join(pool_dir, filename), fmt, **options)
+        filenames.append(filename)
+    return filenames
+
+
+def make_video_pool(pool_dir, count, frames=120, size=(640, 360), fps=30, seed=0, gop=30):
+    """Write count short MP4s with a scene cut every gop frames; returns their filenames.
+
+    PyAV (H.264, fixed keyframe interval) is used when installed, OpenCV's mp4v
+    writer otherwise.
+    """
+    os.makedirs(pool_dir, exist_ok=True)
+    rng = random.Random(seed)
+    filenames = []
+    for i in range(count):
+        filename = f"synthetic_{i:03d}.mp4"
+        scenes = [np.asarray(_picture(size[0], size[1], rng)) for _ in range(max(1, frames // gop))]
+        # Slow pan inside a scene so consecutive frames differ; generated lazily so long clips stay small in memory
+        frame_arrays = (np.ascontiguousarray(np.roll(scenes[min(n // gop, len(scenes) - 1)], n % gop * 2, axis=1))
+                        for n in range(frames))
+        _write_video(os.path.join(pool_dir, filename), frame_arrays, fps, gop)
+        filenames.append(filename)
+    return filenames
+
+
+def _write_video(path, frames, fps, gop):
+    frames = iter(frames)
+    first = next(frames)
+    frames = itertools.chain([first], frames)
+    height, width = first.shape[:2]
+    try:
+        import av
+    except ImportError:
+        av = None
+
+    if av is not None:
+        with av.open(path, "w") as container:
+            stream = container.add_stream("libx264", rate=fps)
+            stream.width, stream.height = width, height
+            stream.pix_fmt = "yuv420p"
+            stream.options = {"g": str(gop), "keyint_min": str(gop)}
+            for frame in frames:
+                for packet in stream.encode(av.VideoFrame.from_ndarray(frame, format="rgb24")):
+                    container.mux(packet)
+            for packet in stream.encode():
+                container.mux(packet)
+        return
+
+    import cv2
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    try:
+        for frame in frames:
+            writer.write(frame[..., ::-1])
+    finally:
+        writer.release()
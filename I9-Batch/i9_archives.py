@@ -0,0 +1,400 @@
+import os
+import time
+import zlib
+import struct
+import asyncio
+import hashlib
+import logging
+import tarfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from .i9_uploads import staging_path, store_upload
+
+logger = logging.getLogger("I9.upload")
+
+ARCHIVE_CHUNK_SIZE = 1024 * 1024
+# Entry checks overlap with extracting the next entries; at most ARCHIVE_MAX_PENDING
+# extracted entries wait for their check, which bounds the temp files on disk
+ARCHIVE_CHECK_WORKERS = min(8, os.cpu_count() or 1)
+ARCHIVE_MAX_PENDING = 2 * ARCHIVE_CHECK_WORKERS
+# Minimum seconds between two progress reports
+ARCHIVE_PROGRESS_INTERVAL = 0.5
+
+_check_executor = ThreadPoolExecutor(max_workers=ARCHIVE_CHECK_WORKERS, thread_name_prefix="i9_archive_check")
+
+_ZIP_LOCAL_SIGNATURE = b'PK\x03\x04'
+_ZIP_CENTRAL_SIGNATURE = b'PK\x01\x02'
+_ZIP_DESCRIPTOR_SIGNATURE = b'PK\x07\x08'
+# Bytes a data descriptor can span past its first byte (signature or the next header included)
+_ZIP_DESCRIPTOR_LOOKAHEAD = 24
+_ZIP_LOCAL_HEADER = struct.Struct('<4sHHHHHIIIHH')
+_ZIP_FLAG_ENCRYPTED = 0x1
+_ZIP_FLAG_DESCRIPTOR = 0x8
+_ZIP_FLAG_UTF8 = 0x800
+_ZIP_STORED = 0
+_ZIP_DEFLATED = 8
+_ZIP64_EXTRA_ID = 0x0001
+
+
+class _StreamReader:
+    """Blocking reader over an aiohttp body for extraction code running on a worker thread.
+
+    Each refill asks the event loop for the next network chunk, so the archive
+    is pulled through at the pace extraction consumes it and never buffered
+    as a whole.
+    """
+
+    def __init__(self, read_chunk, loop):
+        self._read_chunk = read_chunk
+        self._loop = loop
+        self._buffer = b""
+        self._offset = 0
+        self._eof = False
+        self.received = 0
+
+    def read(self, size=-1):
+        """size bytes, fewer only at the end of the stream (size < 0: everything left)"""
+        parts = []
+        while size != 0:
+            if self._offset >= len(self._buffer) and not self._fill():
+                break
+            end = len(self._buffer) if size < 0 else min(len(self._buffer), self._offset + size)
+            parts.append(self._buffer[self._offset:end])
+            if size > 0:
+                size -= end - self._offset
+            self._offset = end
+        return b"".join(parts)
+
+    def unread(self, data):
+        """Push back bytes read past the end of a zip entry"""
+        if data:
+            self._buffer = data + self._buffer[self._offset:]
+            self._offset = 0
+
+    def peek(self, size):
+        data = self.read(size)
+        self.unread(data)
+        return data
+
+    def _fill(self):
+        if self._eof:
+            return False
+        chunk = asyncio.run_coroutine_threadsafe(self._read_chunk(), self._loop).result()
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer, self._offset = bytes(chunk), 0
+        self.received += len(chunk)
+        return True
+
+
+def _skip(stream, size):
+    while size > 0:
+        data = stream.read(min(size, ARCHIVE_CHUNK_SIZE))
+        if not data:
+            raise ValueError("Truncated zip entry")
+        size -= len(data)
+
+
+def _zip64_extra(extra):
+    """The zip64 extended-information field of a local header's extra data, or None"""
+    offset = 0
+    while offset + 4 <= len(extra):
+        field_id, length = struct.unpack_from('<HH', extra, offset)
+        if field_id == _ZIP64_EXTRA_ID:
+            return extra[offset + 4:offset + 4 + length]
+        offset += 4 + length
+    return None
+
+
+class _ZipEntry:
+    """Uncompressed bytes of one zip entry read straight off the stream; error is set if the CRC doesn't match.
+
+    An entry without a size in its local header ends where its deflate stream
+    ends; other (stored or unsupported) data is scanned for the data descriptor
+    that follows it, recognised by a size field equal to the bytes read so far.
+    """
+
+    def __init__(self, stream, method, compressed_size, crc, descriptor, zip64):
+        self._stream = stream
+        self._remaining = compressed_size  # None: until the deflate stream or the descriptor scan ends
+        self._inflate = zlib.decompressobj(-15) if method == _ZIP_DEFLATED else None
+        self._scan = compressed_size is None and self._inflate is None
+        self._stored = method == _ZIP_STORED
+        self._held = b""  # scanned bytes that might still turn out to be the descriptor
+        self._count = 0
+        self._expected_crc = crc
+        self._crc = 0
+        self._descriptor = descriptor
+        self._zip64 = zip64
+        self._pending = b""
+        self._done = False
+        self.error = None
+
+    def read(self, size=ARCHIVE_CHUNK_SIZE):
+        while not self._pending and not self._done:
+            self._pending = self._next()
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+    def drain(self):
+        while self.read():
+            pass
+
+    def _next(self):
+        if self._inflate is not None and self._inflate.unconsumed_tail:
+            raw = self._inflate.unconsumed_tail
+        elif self._remaining == 0 or (self._inflate is not None and self._inflate.eof):
+            self._finish()
+            return b""
+        else:
+            raw = self._stream.read(ARCHIVE_CHUNK_SIZE if self._remaining is None else min(ARCHIVE_CHUNK_SIZE, self._remaining))
+            if not raw:
+                raise ValueError("Truncated zip entry")
+            if self._remaining is not None:
+                self._remaining -= len(raw)
+
+        if self._scan:
+            data = self._scan_for_descriptor(raw)
+        elif self._inflate is None:
+            data = raw
+        else:
+            # Bounded output per step, so a highly compressed entry can't balloon in memory
+            data = self._inflate.decompress(raw, ARCHIVE_CHUNK_SIZE)
+            if self._inflate.eof and self._inflate.unused_data:
+                self._stream.unread(self._inflate.unused_data)
+                if self._remaining is not None:
+                    self._remaining += len(self._inflate.unused_data)
+        self._crc = zlib.crc32(data, self._crc)
+        return data
+
+    def _scan_for_descriptor(self, raw):
+        """Entry bytes of raw up to the data descriptor; holds back the tail that might begin it"""
+        buffer = self._held + raw
+        end = self._descriptor_offset(buffer)
+        if end is None:
+            cut = max(0, len(buffer) - _ZIP_DESCRIPTOR_LOOKAHEAD)
+            self._held = buffer[cut:]
+            data = buffer[:cut]
+        else:
+            self._held = b""
+            self._stream.unread(buffer[end:])
+            self._remaining = 0
+            data = buffer[:end]
+        self._count += len(data)
+        return data
+
+    def _descriptor_offset(self, buffer):
+        """First offset in buffer where a descriptor for the bytes before it starts, or None.
+
+        A descriptor either starts with its own signature or (the signature is
+        optional) is directly followed by the next local or central header.
+        """
+        sizes = struct.Struct('<IQQ' if self._zip64 else '<III')
+        found = []
+        position = buffer.find(b'PK')
+        while position >= 0:
+            signature = buffer[position:position + 4]
+            if signature == _ZIP_DESCRIPTOR_SIGNATURE:
+                found.append((position, position + 4))
+            elif signature in (_ZIP_LOCAL_SIGNATURE, _ZIP_CENTRAL_SIGNATURE):
+                found.append((position - sizes.size, position - sizes.size))
+            position = buffer.find(b'PK', position + 1)
+
+        for end, fields in sorted(found):
+            if end < 0 or fields + sizes.size > len(buffer):
+                continue
+            _, compressed, uncompressed = sizes.unpack_from(buffer, fields)
+            if compressed == self._count + end and (not self._stored or uncompressed == compressed):
+                return end
+        return None
+
+    def _finish(self):
+        self._done = True
+        if self._remaining:
+            _skip(self._stream, self._remaining)
+            self._remaining = 0
+        expected = self._expected_crc
+        if self._descriptor:
+            if self._stream.peek(4) == _ZIP_DESCRIPTOR_SIGNATURE:
+                self._stream.read(4)
+            fields = self._stream.read(20 if self._zip64 else 12)
+            if len(fields) < 4:
+                raise ValueError("Truncated zip data descriptor")
+            expected = struct.unpack_from('<I', fields)[0]
+        if self._crc != expected:
+            self.error = ValueError("CRC mismatch, the entry is corrupt")
+
+
+def _zip_entries(stream):
+    """(name, reader) for each zip entry, read front to back from the local headers.
+
+    The central directory at the end is never needed: sizes come from the
+    local header, or when a streaming writer left them out, from the end of
+    the deflate data or the data descriptor after the entry. Encrypted
+    entries and other compression methods yield a None reader.
+    """
+    while True:
+        header = stream.read(_ZIP_LOCAL_HEADER.size)
+        if header[:4] != _ZIP_LOCAL_SIGNATURE:
+            return  # central directory or end of stream
+        if len(header) < _ZIP_LOCAL_HEADER.size:
+            raise ValueError("Truncated zip header")
+        _, _, flags, method, _, _, crc, compressed, uncompressed, name_length, extra_length = _ZIP_LOCAL_HEADER.unpack(header)
+        name = stream.read(name_length).decode('utf-8' if flags & _ZIP_FLAG_UTF8 else 'cp437', errors='replace')
+        zip64 = _zip64_extra(stream.read(extra_length))
+        if zip64 is not None:
+            # The zip64 field holds the 64-bit sizes whose 32-bit header fields are saturated, in this order
+            values = list(struct.unpack_from(f'<{len(zip64) // 8}Q', zip64))
+            if uncompressed == 0xFFFFFFFF and values:
+                uncompressed = values.pop(0)
+            if compressed == 0xFFFFFFFF and values:
+                compressed = values.pop(0)
+        descriptor = bool(flags & _ZIP_FLAG_DESCRIPTOR)
+
+        if flags & _ZIP_FLAG_ENCRYPTED or method not in (_ZIP_STORED, _ZIP_DEFLATED):
+            if descriptor:
+                _ZipEntry(stream, None, None, crc, descriptor, zip64 is not None).drain()
+            else:
+                _skip(stream, compressed)
+            yield name, None
+            continue
+
+        entry = _ZipEntry(stream, method, None if descriptor else compressed, crc, descriptor, zip64 is not None)
+        yield name, entry
+        entry.drain()
+
+
+def _tar_entries(stream):
+    """(name, reader) for each regular file of a tar (plain, gzip, bz2 or xz) read as a stream"""
+    try:
+        with tarfile.open(fileobj=stream, mode='r|*') as tar:
+            for member in tar:
+                if member.isfile():
+                    yield member.name, tar.extractfile(member)
+    except tarfile.TarError as e:
+        raise ValueError(f"Not a readable zip or tar archive: {e}") from e
+
+
+def _check_and_store(pool_index, tmp_path, filename, size, digest, validate, post_process):
+    """Validate one extracted entry, then move it into the pool; returns (upload info, None) or (None, error)"""
+    try:
+        error = validate(tmp_path)
+    except Exception as e:
+        error = str(e)
+    if error:
+        os.remove(tmp_path)
+        return None, error
+    return store_upload(pool_index, tmp_path, filename, size, digest, post_process), None
+
+
+def extract_archive(stream, pool_index, validate, post_process=None, report=None):
+    """Extract a zip or tar read from stream into the pool.
+
+    Entries with a pool extension are written to staging files and
+    hashed on the way; validate(path) (an error message, or None when the
+    file is good) runs on a worker pool while the following entries are
+    extracted, and valid ones go through the same dedup and claim path as
+    regular uploads. Other entries (directories, hidden files, other types)
+    are skipped. report(progress) is called at most every
+    ARCHIVE_PROGRESS_INTERVAL seconds and once at the end.
+
+    Returns the progress counts with the stored files and rejected entries;
+    an unreadable archive adds 'error', keeping what was extracted before it.
+    """
+    progress = {'entries': 0, 'added': 0, 'deduplicated': 0, 'rejected': 0, 'skipped': 0, 'received': 0, 'done': False}
+    files = []
+    rejected = []
+    pending = deque()
+    last_report = 0.0
+
+    def settle(name, future):
+        stored, error = future.result()
+        if error:
+            progress['rejected'] += 1
+            rejected.append({'name': name, 'error': error})
+        else:
+            progress['deduplicated' if stored['deduplicated'] else 'added'] += 1
+            files.append(stored)
+
+    def send(force=False):
+        nonlocal last_report
+        progress['received'] = stream.received
+        now = time.monotonic()
+        if report is not None and (force or now - last_report >= ARCHIVE_PROGRESS_INTERVAL):
+            last_report = now
+            report(dict(progress))
+
+    try:
+        entries = _zip_entries(stream) if stream.peek(4) == _ZIP_LOCAL_SIGNATURE else _tar_entries(stream)
+        for name, reader in entries:
+            progress['entries'] += 1
+            path = name.replace('\\', '/')
+            filename = os.path.basename(path)
+            if not filename or filename.startswith('.') or '__MACOSX/' in path or not filename.lower().endswith(pool_index.extensions):
+                progress['skipped'] += 1
+                send()
+                continue
+            if reader is None:
+                progress['rejected'] += 1
+                rejected.append({'name': name, 'error': "encrypted or unsupported compression"})
+                send()
+                continue
+
+            tmp_path = staging_path()
+            m = hashlib.sha256()
+            size = 0
+            try:
+                with open(tmp_path, 'wb') as f:
+                    while True:
+                        chunk = reader.read(ARCHIVE_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        m.update(chunk)
+                        f.write(chunk)
+                        size += len(chunk)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+            error = getattr(reader, 'error', None)
+            if error is not None:
+                os.remove(tmp_path)
+                progress['rejected'] += 1
+                rejected.append({'name': name, 'error': str(error)})
+                send()
+                continue
+
+            pending.append((name, _check_executor.submit(
+                _check_and_store, pool_index, tmp_path, filename, size, m.hexdigest(), validate, post_process)))
+            while len(pending) > ARCHIVE_MAX_PENDING or (pending and pending[0][1].done()):
+                settle(*pending.popleft())
+            send()
+    except (ValueError, OSError, EOFError, zlib.error, tarfile.TarError) as e:
+        logger.warning(f"[I9 Upload] Archive extraction into {pool_index.pool_name} stopped: {e}")
+        progress['error'] = str(e)
+    finally:
+        while pending:
+            settle(*pending.popleft())
+
+    progress['done'] = True
+    send(force=True)
+    return {**progress, 'files': files, 'rejected_entries': rejected}
+
+
+async def receive_archive(request, pool_index, validate, post_process=None, report=None):
+    """Stream a zip/tar upload (the request body, or a multipart field named 'archive') into the pool"""
+    loop = asyncio.get_running_loop()
+    if request.content_type.startswith('multipart/'):
+        reader = await request.multipart()
+        field = await reader.next()
+        while field is not None and field.name != 'archive':
+            field = await reader.next()
+        if field is None:
+            raise ValueError("No 'archive' field in the upload")
+        read_chunk = lambda: field.read_chunk(ARCHIVE_CHUNK_SIZE)
+    else:
+        read_chunk = lambda: request.content.read(ARCHIVE_CHUNK_SIZE)
+
+    os.makedirs(pool_index.pool_dir, exist_ok=True)
+    stream = _StreamReader(read_chunk, loop)
+    return await loop.run_in_executor(None, extract_archive, stream, pool_index, validate, post_process, report)
@@ -2,19 +2,61 @@ import torch
 import numpy as np
 from PIL import Image
 import os
-import json
-import uuid
-import hashlib
+import asyncio
+import logging
 import folder_paths
-import comfy.utils
 import server
 from aiohttp import web
-import shutil
+from concurrent.futures import ThreadPoolExecutor
+from .i9_tensor_cache import TensorCache
+from .i9_thumbnails import ensure_image_thumbnail, get_thumbnail_path, remove_thumbnail, serve_thumbnail
+from .i9_archives import receive_archive
+from .i9_uploads import receive_upload
+from .i9_pool_index import get_pool_index, IMAGE_POOL, IMAGE_EXTENSIONS
+from .i9_metrics import metrics
+from .i9_resize import BatchResizer, RESIZE_MODES, draft_size, fit_to_largest_size
+from .i9_buckets import make_buckets, assign_bucket, bucket_label
+from .i9_pack import get_pack, list_packs, remove_packs
+from .i9_cursor import SequentialCursors, DEFAULT_PREFETCH
+from .i9_leases import LeaseStore, DEFAULT_LEASE_TIMEOUT, describe, lease_owner
+
+# Processed (decoded + resized) pool images, shared by every node instance
+_tensor_cache = TensorCache("images")
+_pool_index = get_pool_index(IMAGE_POOL, IMAGE_EXTENSIONS)
+_leases = LeaseStore(IMAGE_POOL)
+_cursors = SequentialCursors("image")
+logger = logging.getLogger("I9.image")
+
+
+def _post_upload(filename):
+    """Background validation and thumbnailing of a freshly uploaded image"""
+    filepath = os.path.join(_pool_index.pool_dir, filename)
+    try:
+        with Image.open(filepath) as img:
+            img.verify()
+    except Exception as e:
+        logger.warning(f"[I9 Batch Processing] Uploaded file {filename} is not a readable image: {e}")
+        _pool_index.update_entry(filename, valid=False)
+        _pool_index.save()
+        return
+
+    _pool_index.dimensions(filename)
+    ensure_image_thumbnail(filepath, get_thumbnail_path(IMAGE_POOL, filename))
+    _pool_index.save()
+
+def _check_archive_image(path):
+    """Header check of an image extracted from an archive; an error message, or None if it is readable"""
+    try:
+        with Image.open(path) as img:
+            img.verify()
+    except Exception as e:
+        return f"not a readable image: {e}"
+    return None
 
 # API Routes for batch management
 @server.PromptServer.instance.routes.post("/i9/batch/upload")
 async def upload_batch_images(request):
-    """Handle multiple image uploads"""
+    """Handle multiple image uploads, deduplicating by content hash"""
     try:
         reader = await request.multipart()
         uploaded_files = []
@@ -26,35 +68,15 @@ async def upload_batch_images(request):
         field = await reader.next()
         while field is not None:
             if field.name == 'image':
-                filename = field.filename
-                # Generate unique filename if exists
-                base, ext = os.path.splitext(filename)
-                counter = 1
-                final_filename = filename
-                while os.path.exists(os.path.join(pool_dir, final_filename)):
-                    final_filename = f"{base}_{counter}{ext}"
-                    counter += 1
-                
-                filepath = os.path.join(pool_dir, final_filename)
-                
-                with open(filepath, 'wb') as f:
-                    while True:
-                        chunk = await field.read_chunk()
-                        if not chunk:
-                            break
-                        f.write(chunk)
-                
-                uploaded_files.append({
-                    'filename': final_filename,
-                    'original_name': filename,
-                    'path': filepath
-                })
+                uploaded_files.append(await receive_upload(field, _pool_index, _post_upload))
             
             field = await reader.next()
         
+        await asyncio.get_running_loop().run_in_executor(None, _pool_index.save)
         return web.json_response({
             'success': True,
-            'files': uploaded_files
+            'files': uploaded_files,
+            'deduplicated': sum(1 for f in uploaded_files if f['deduplicated'])
         })
     except Exception as e:
         return web.json_response({
@@ -62,31 +84,62 @@ async def upload_batch_images(request):
             'error': str(e)
         }, status=500)
 
+@server.PromptServer.instance.routes.post("/i9/batch/upload/archive")
+async def upload_batch_archive(request):
+    """Extract a streamed zip/tar (the request body, or multipart field 'archive') into the pool.
+
+    Progress goes out as 'i9.archive.progress' websocket events, to the client
+    in ?client_id= if given.
+    """
+    try:
+        client_id = request.query.get('client_id') or None
+
+        def report(progress):
+            server.PromptServer.instance.send_sync("i9.archive.progress", {'pool': IMAGE_POOL, 'total': request.content_length, **progress}, client_id)
+
+        result = await receive_archive(request, _pool_index, _check_archive_image, _post_upload, report)
+        await asyncio.get_running_loop().run_in_executor(None, _pool_index.save)
+        if 'error' in result:
+            return web.json_response({'success': False, **result}, status=400)
+        return web.json_response({'success': True, **result})
+    except ValueError as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=400)
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
 @server.PromptServer.instance.routes.get("/i9/batch/list")
 async def list_batch_images(request):
-    """List all images in the batch pool"""
+    """List images in the batch pool (query: offset, limit, sort=name|mtime|size, order, filter, dims)"""
     try:
         input_dir = folder_paths.get_input_directory()
         pool_dir = os.path.join(input_dir, "I9_ImagePool")
         os.makedirs(pool_dir, exist_ok=True)
         
-        images = []
-        for filename in os.listdir(pool_dir):
-            if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.webp', '.gif', '.bmp')):
-                filepath = os.path.join(pool_dir, filename)
-                stat = os.stat(filepath)
-                images.append({
-                    'filename': filename,
-                    'size': stat.st_size,
-                    'modified': stat.st_mtime
-                })
+        offset = max(0, int(request.query.get('offset', 0)))
+        limit = max(0, int(request.query.get('limit', 0)))  # 0 = everything from offset
+        sort = request.query.get('sort', 'mtime')
+        descending = request.query.get('order', 'desc') != 'asc'
+        name_filter = request.query.get('filter') or None
+
+        # Default order is newest first, served from the index's cached sorted view
+        images, total = _pool_index.query(sort, descending, name_filter, offset, limit or None)
         
-        # Sort by modification time (newest first)
-        images.sort(key=lambda x: x['modified'], reverse=True)
+        # Dimensions come from image headers, which may need file reads: keep them off the loop
+        if request.query.get('dims') in ('1', 'true'):
+            loop = asyncio.get_running_loop()
+            for entry in images:
+                dims = await loop.run_in_executor(None, _pool_index.dimensions, entry['filename'])
+                if dims:
+                    entry['width'], entry['height'] = dims
+            _pool_index.save()
         
+        next_offset = offset + len(images)
         return web.json_response({
             'success': True,
-            'images': images
+            'images': images,
+            'total': total,
+            'offset': offset,
+            'next_offset': next_offset if next_offset < total else None
         })
     except Exception as e:
         return web.json_response({
@@ -94,6 +147,16 @@ async def list_batch_images(request):
             'error': str(e)
         }, status=500)
 
+@server.PromptServer.instance.routes.get("/i9/batch/thumb")
+async def get_batch_thumbnail(request):
+    """Serve a cached WebP thumbnail of a pool image"""
+    try:
+        input_dir = folder_paths.get_input_directory()
+        pool_dir = os.path.join(input_dir, "I9_ImagePool")
+        return await serve_thumbnail(request, pool_dir, "I9_ImagePool", ensure_image_thumbnail)
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
 @server.PromptServer.instance.routes.delete("/i9/batch/delete")
 async def delete_batch_image(request):
     """Delete an image from the batch pool"""
@@ -109,7 +172,11 @@ async def delete_batch_image(request):
         filepath = os.path.join(pool_dir, filename)
         
         if os.path.exists(filepath):
+            _tensor_cache.invalidate_path(filepath)
             os.remove(filepath)
+            _pool_index.remove(filename)
+            _pool_index.save()
+            remove_thumbnail("I9_ImagePool", filename)
             return web.json_response({'success': True})
         else:
             return web.json_response({'success': False, 'error': 'File not found'}, status=404)
@@ -128,11 +195,200 @@ async def clear_batch_pool(request):
                 filepath = os.path.join(pool_dir, filename)
                 if os.path.isfile(filepath):
                     os.remove(filepath)
+        _tensor_cache.clear(disk=True)
+        _pool_index.clear()
+        remove_thumbnail("I9_ImagePool")
+        remove_packs(IMAGE_POOL)
+        _leases.reset()
         
         return web.json_response({'success': True})
     except Exception as e:
         return web.json_response({'success': False, 'error': str(e)}, status=500)
 
+@server.PromptServer.instance.routes.get("/i9/batch/leases")
+async def get_batch_leases(request):
+    """Distributed mode progress: done, claimed and pending images across all workers"""
+    try:
+        status = await asyncio.get_running_loop().run_in_executor(None, _leases.status, _pool_index.files())
+        return web.json_response({'success': True, **status})
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+@server.PromptServer.instance.routes.post("/i9/batch/leases/reset")
+async def reset_batch_leases(request):
+    """Forget all claims and finished images so Distributed mode starts over"""
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, _leases.reset)
+        return web.json_response({'success': True})
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+@server.PromptServer.instance.routes.get("/i9/batch/buckets")
+async def list_batch_buckets(request):
+    """Bucketed mode plan for the pool (query: width, height, chunk_size): resolution and image count per bucket"""
+    try:
+        width, height = int(request.query.get('width', 512)), int(request.query.get('height', 512))
+        chunk_size = int(request.query.get('chunk_size', 16))
+        if width <= 0 or height <= 0 or chunk_size <= 0:
+            raise ValueError("width, height and chunk_size must be positive")
+        batches, skipped = await asyncio.get_running_loop().run_in_executor(None, _bucket_batches, _pool_index.files(), width, height, chunk_size)
+        buckets = {}
+        for (bucket_width, bucket_height), files in batches:
+            bucket = buckets.setdefault((bucket_width, bucket_height), {
+                'width': bucket_width, 'height': bucket_height, 'aspect': bucket_label(bucket_width, bucket_height), 'images': 0, 'batches': 0})
+            bucket['images'] += len(files)
+            bucket['batches'] += 1
+        return web.json_response({'success': True, 'buckets': list(buckets.values()), 'batches': len(batches), 'skipped': skipped})
+    except ValueError as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=400)
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+@server.PromptServer.instance.routes.get("/i9/batch/cursor")
+async def get_batch_cursors(request):
+    """Auto-advance Sequential cursors per node: next position and completed passes over the pool"""
+    try:
+        return web.json_response({'success': True, 'cursors': _cursors.status()})
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+@server.PromptServer.instance.routes.post("/i9/batch/cursor/seek")
+async def seek_batch_cursor(request):
+    """Set the next image a node processes: {node_id, position}"""
+    try:
+        data = await request.json()
+        _cursors.seek(str(data['node_id']), int(data['position']))
+        return web.json_response({'success': True, 'cursors': _cursors.status()})
+    except (KeyError, ValueError) as e:
+        return web.json_response({'success': False, 'error': f"node_id and a non-negative position are required: {e}"}, status=400)
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+@server.PromptServer.instance.routes.post("/i9/batch/cursor/reset")
+async def reset_batch_cursor(request):
+    """Rewind one node's cursor ({node_id}) or every cursor (no body)"""
+    try:
+        data = await request.json() if request.can_read_body else {}
+        node_id = data.get('node_id')
+        _cursors.reset(None if node_id is None else str(node_id))
+        return web.json_response({'success': True, 'cursors': _cursors.status()})
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+@server.PromptServer.instance.routes.post("/i9/batch/pack")
+async def pack_batch_pool(request):
+    """Build or update the memory-mapped pack of the pool at {width, height, resize_mode, workers}"""
+    try:
+        data = await request.json()
+        width, height = int(data.get('width', 512)), int(data.get('height', 512))
+        resize_mode = data.get('resize_mode', "Center Crop")
+        if not _packable(resize_mode):
+            raise ValueError(f"Unsupported resize mode for a pack: {resize_mode}")
+        if width <= 0 or height <= 0:
+            raise ValueError("width and height must be positive")
+        pool_dir = _pool_index.pool_dir
+        node = I9_BatchProcessing()
+        stats = await asyncio.get_running_loop().run_in_executor(
+            None, node._update_pack, pool_dir, width, height, resize_mode, int(data.get('workers', 0)))
+        return web.json_response({'success': True, 'pack': stats})
+    except ValueError as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=400)
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+@server.PromptServer.instance.routes.get("/i9/batch/pack")
+async def list_batch_packs(request):
+    """Packs of the image pool with their size, resize mode and image counts"""
+    try:
+        packs = await asyncio.get_running_loop().run_in_executor(None, list_packs, IMAGE_POOL)
+        return web.json_response({'success': True, 'packs': packs})
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+@server.PromptServer.instance.routes.delete("/i9/batch/pack")
+async def delete_batch_packs(request):
+    """Delete every pack of the image pool"""
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, remove_packs, IMAGE_POOL)
+        return web.json_response({'success': True})
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+@server.PromptServer.instance.routes.get("/i9/metrics")
+async def get_metrics(request):
+    """Hot-path timings and counters of both I9 nodes (query: format=json|prometheus, reset=1)"""
+    try:
+        if request.query.get('format') == 'prometheus':
+            response = web.Response(text=metrics.prometheus(), headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+        else:
+            response = web.json_response({'success': True, **metrics.snapshot()})
+        if request.query.get('reset') == '1':
+            metrics.reset()
+        return response
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+
+def _packable(resize_mode):
+    """Fit to Largest can't be packed: its target size follows the pool contents, so no pack key stays valid"""
+    return resize_mode in RESIZE_MODES and resize_mode != "Fit to Largest"
+
+
+def _bucket_batches(image_files, width, height, chunk_size):
+    """Bucketed mode plan: [((bucket_width, bucket_height), filenames)] batches of at most chunk_size images
+    of one bucket, tall buckets first, plus the files whose size couldn't be read.
+
+    Sizes come from image headers memoized in the pool index, so planning never decodes pixels.
+    """
+    buckets = make_buckets(width, height)
+    groups = {}
+    skipped = []
+    with metrics.span("bucket", "image"):
+        for filename in image_files:
+            size = _pool_index.dimensions(filename)
+            if size is None:
+                skipped.append(filename)
+                continue
+            groups.setdefault(assign_bucket(size[0], size[1], buckets), []).append(filename)
+    batches = []
+    for bucket in buckets:
+        files = groups.get(bucket, [])
+        batches.extend((bucket, files[i:i + chunk_size]) for i in range(0, len(files), chunk_size))
+    return batches, skipped
+
+
+class _ChunkPrefetcher:
+    """Pulls chunks from a generator, decoding the next one in the background"""
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="i9_prefetch")
+        self._signature = None
+        self._chunks = None
+        self._pending = None  # (chunk_index, future)
+
+    def get(self, signature, chunk_index, make_chunks):
+        """Return chunk_index, reusing the prefetched result when the request matches"""
+        result = None
+        if self._pending is not None:
+            pending_index, future = self._pending
+            self._pending = None
+            if signature == self._signature and pending_index == chunk_index:
+                result = future.result()
+            elif not future.cancel():
+                # Let a running prefetch finish before its generator is dropped
+                try:
+                    future.result()
+                except Exception:
+                    pass
+
+        if result is None:
+            self._signature = signature
+            self._chunks = make_chunks(chunk_index)
+            result = next(self._chunks, None)
+
+        self._pending = (chunk_index + 1, self._executor.submit(next, self._chunks, None))
+        return result
+
 
 class I9_BatchProcessing:
 
@@ -143,15 +399,23 @@ class I9_BatchProcessing:
     def INPUT_TYPES(cls):
         return {
             "required": {
-                "mode": (["Batch Tensor", "Sequential"], {"default": "Batch Tensor"}),
+                "mode": (["Batch Tensor", "Sequential", "Chunked", "Distributed", "Bucketed"], {"default": "Batch Tensor"}),
             },
             "optional": {
-                "resize_mode": (["Center Crop", "Letterbox", "Stretch", "Fit to Largest"], {"default": "Center Crop"}),
+                "resize_mode": (RESIZE_MODES, {"default": "Center Crop"}),
                 "batch_index": ("INT", {"default": 0, "min": 0, "max": 9999, "step": 1}),
                 "width": ("INT", {"default": 512, "min": 64, "max": 8192, "step": 8}),
                 "height": ("INT", {"default": 512, "min": 64, "max": 8192, "step": 8}),
                 "aspect_label": ("STRING", {"default": "1:1"}),
                 "enable_img2img": ("BOOLEAN", {"default": True}),
+                "cache_to_disk": ("BOOLEAN", {"default": False}),
+                "workers": ("INT", {"default": 0, "min": 0, "max": 64, "step": 1}),  # decode threads, 0 = auto
+                "chunk_size": ("INT", {"default": 16, "min": 1, "max": 4096, "step": 1}),  # Chunked / Bucketed: images per batch
+                "chunk_index": ("INT", {"default": 0, "min": 0, "max": 9999, "step": 1}),  # Chunked / Bucketed: batch to output
+                "lease_timeout": ("INT", {"default": DEFAULT_LEASE_TIMEOUT, "min": 10, "max": 604800, "step": 10}),  # Distributed: seconds before a claimed image is handed out again (a worker's last image is only finished by one more run)
+                "use_pack": ("BOOLEAN", {"default": False}),  # Batch Tensor / Chunked: load from (and keep updating) a memory-mapped pack at this size; Bucketed and Fit to Largest decode instead
+                "auto_advance": ("BOOLEAN", {"default": False}),  # Sequential: ignore batch_index and move a server-side cursor on every run
+                "prefetch": ("INT", {"default": DEFAULT_PREFETCH, "min": 0, "max": 64, "step": 1}),  # Sequential with auto_advance: images decoded ahead in the background
             },
             "hidden": {
                 "node_id": "UNIQUE_ID",
@@ -163,11 +427,10 @@ class I9_BatchProcessing:
     FUNCTION = "load_batch"
     CATEGORY = "I9/Input"
 
-    def load_batch(self, mode="Batch Tensor", resize_mode="Center Crop", batch_index=0, width=512, height=512, aspect_label="1:1", enable_img2img=True, node_id=None):
-        print(f"\n{'='*60}")
-        print(f"[I9 Batch Processing] Mode: {mode} | Resize: {resize_mode} | Index: {batch_index}")
-        print(f"[I9 Batch Processing] Enable img2img: {enable_img2img} | Resolution: {width}x{height} | Aspect: {aspect_label}")
-        print(f"[I9 Batch Processing] Loading batch for node: {node_id}")
+    def load_batch(self, mode="Batch Tensor", resize_mode="Center Crop", batch_index=0, width=512, height=512, aspect_label="1:1", enable_img2img=True, cache_to_disk=False, workers=0, chunk_size=16, chunk_index=0, lease_timeout=DEFAULT_LEASE_TIMEOUT, use_pack=False, auto_advance=False, prefetch=DEFAULT_PREFETCH, node_id=None):
+        logger.debug(f"[I9 Batch Processing] Mode: {mode} | Resize: {resize_mode} | Index: {batch_index}")
+        logger.debug(f"[I9 Batch Processing] Enable img2img: {enable_img2img} | Resolution: {width}x{height} | Aspect: {aspect_label}")
+        logger.debug(f"[I9 Batch Processing] Loading batch for node: {node_id}")
 
         # Get all images from pool
         input_dir = folder_paths.get_input_directory()
@@ -178,8 +441,8 @@ class I9_BatchProcessing:
             return (empty, 0, 0, "No images in batch pool. Use the upload button to add images.")
 
         # Get all image files
-        image_files = sorted([f for f in os.listdir(pool_dir) 
-                            if f.lower().endswith(('.png', '.jpg', '.jpeg', '.webp', '.gif', '.bmp'))])
+        with metrics.span("list", "image"):
+            image_files = _pool_index.files()
         
         if not image_files:
             empty = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
@@ -192,11 +455,25 @@ class I9_BatchProcessing:
 
         # img2img mode - load images
         if mode == "Sequential":
-            return self._load_sequential_from_pool(pool_dir, image_files, batch_index, resize_mode, width, height, node_id)
+            if not auto_advance:
+                return self._load_sequential_from_pool(pool_dir, image_files, batch_index, resize_mode, width, height, node_id, cache_to_disk)
+            # Only the cursor knows which images come next; a hand-driven batch_index can jump anywhere
+            batch_index = _cursors.advance(node_id, len(image_files))
+            # A prefetch job may be decoding this very image; reuse its work
+            _cursors.wait(node_id, image_files[batch_index])
+            result = self._load_sequential_from_pool(pool_dir, image_files, batch_index, resize_mode, width, height, node_id, cache_to_disk)
+            self._prefetch_sequential(pool_dir, image_files, batch_index, prefetch, resize_mode, width, height, node_id, cache_to_disk)
+            return result
+        elif mode == "Chunked":
+            return self._load_chunk_from_pool(pool_dir, image_files, chunk_size, chunk_index, resize_mode, width, height, node_id, cache_to_disk, workers, use_pack)
+        elif mode == "Bucketed":
+            return self._load_bucket_from_pool(pool_dir, image_files, chunk_size, chunk_index, resize_mode, width, height, node_id, cache_to_disk, workers)
+        elif mode == "Distributed":
+            return self._load_distributed_from_pool(pool_dir, image_files, resize_mode, width, height, node_id, cache_to_disk, lease_timeout)
         else:
-            return self._load_batch_from_pool(pool_dir, image_files, resize_mode, width, height)
+            return self._load_batch_from_pool(pool_dir, image_files, resize_mode, width, height, cache_to_disk, workers, use_pack)
 
-    def _load_sequential_from_pool(self, pool_dir, image_files, batch_index, resize_mode, width, height, node_id):
+    def _load_sequential_from_pool(self, pool_dir, image_files, batch_index, resize_mode, width, height, node_id, cache_to_disk=False):
         """Load one image at a time in sequential mode"""
         total_count = len(image_files)
         
@@ -208,85 +485,222 @@ class I9_BatchProcessing:
         img_path = os.path.join(pool_dir, filename)
 
         try:
-            img = Image.open(img_path).convert('RGB')
-            img_tensor = torch.from_numpy(np.array(img).astype(np.float32) / 255.0)
-            
-            # Resize if needed
-            if img_tensor.shape[0] != height or img_tensor.shape[1] != width:
-                img_tensor = self._resize_image(img_tensor, width, height, resize_mode)
-            
-            img_tensor = img_tensor.unsqueeze(0)
+            if resize_mode == "Fit to Largest":
+                width, height = _pool_index.dimensions(filename) or (width, height)
+            img_tensor, errors = self._load_images([img_path], width, height, resize_mode, cache_to_disk)
+            if errors[0] is not None:
+                raise errors[0]
             info = f"[{batch_index + 1}/{total_count}] {filename}"
             return (img_tensor, batch_index, total_count, info)
         except Exception as e:
             empty = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
             return (empty, batch_index, total_count, f"Error loading {filename}: {e}")
 
-    def _load_batch_from_pool(self, pool_dir, image_files, resize_mode, target_width, target_height):
+    def _prefetch_sequential(self, pool_dir, image_files, batch_index, prefetch, resize_mode, width, height, node_id, cache_to_disk=False):
+        """Decode and resize the next prefetch images into the tensor cache while this one is being sampled"""
+        def warm(filename):
+            target_width, target_height = width, height
+            if resize_mode == "Fit to Largest":
+                target_width, target_height = _pool_index.dimensions(filename) or (width, height)
+            self._load_images([os.path.join(pool_dir, filename)], target_width, target_height, resize_mode, cache_to_disk)
+
+        upcoming = [image_files[(batch_index + k) % len(image_files)] for k in range(1, min(prefetch, len(image_files) - 1) + 1)]
+        _cursors.prefetch(node_id, {filename: lambda filename=filename: warm(filename) for filename in upcoming})
+
+    def _load_distributed_from_pool(self, pool_dir, image_files, resize_mode, width, height, node_id, cache_to_disk=False, lease_timeout=DEFAULT_LEASE_TIMEOUT):
+        """Claim the next image no worker sharing the pool has processed or claimed, and load it"""
+        filename, leases = _leases.claim(lease_owner(node_id), image_files, lease_timeout)
+        if filename is None:
+            empty = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
+            return (empty, leases['done'], len(image_files), f"Distributed: nothing left to claim ({describe(leases)})")
+
+        images, index, total, info = self._load_sequential_from_pool(pool_dir, image_files, image_files.index(filename), resize_mode, width, height, node_id, cache_to_disk)
+        return (images, index, total, f"{info} | Distributed: {describe(leases)}")
+
+    def _load_chunk_from_pool(self, pool_dir, image_files, chunk_size, chunk_index, resize_mode, width, height, node_id, cache_to_disk=False, workers=0, use_pack=False):
+        """Load one fixed-size chunk of the pool, prefetching the following chunk"""
+        total_chunks = (len(image_files) + chunk_size - 1) // chunk_size
+
+        if chunk_index >= total_chunks:
+            empty = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
+            return (empty, chunk_index, total_chunks, "Chunk index out of range")
+
+        def make_chunks(start):
+            for index in range(start, total_chunks):
+                chunk_files = image_files[index * chunk_size:(index + 1) * chunk_size]
+                yield self._load_batch_from_pool(pool_dir, chunk_files, resize_mode, width, height, cache_to_disk, workers, use_pack)
+
+        state = self.node_states.setdefault(node_id, {})
+        prefetcher = state.get("chunks")
+        if prefetcher is None:
+            prefetcher = state["chunks"] = _ChunkPrefetcher()
+        signature = (self.IS_CHANGED(), tuple(image_files), chunk_size, resize_mode, width, height, cache_to_disk, workers, use_pack)
+
+        batch_tensor, _, _, info = prefetcher.get(signature, chunk_index, make_chunks)
+        return (batch_tensor, chunk_index, total_chunks, f"[Chunk {chunk_index + 1}/{total_chunks}] {info}")
+
+    def _load_bucket_from_pool(self, pool_dir, image_files, chunk_size, chunk_index, resize_mode, width, height, node_id, cache_to_disk=False, workers=0):
+        """Load batch chunk_index of the aspect-ratio buckets at the width x height pixel budget, prefetching the next batch.
+
+        Always decodes (through the tensor cache): a pack holds the whole pool at
+        one size, so packing per bucket resolution would decode and store the
+        full pool once for every bucket.
+        """
+        batches, skipped = _bucket_batches(image_files, width, height, chunk_size)
+        for filename in skipped:
+            logger.warning(f"[I9 Batch Processing] Could not read the size of {filename}, leaving it out of the buckets")
+
+        if chunk_index >= len(batches):
+            empty = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
+            return (empty, chunk_index, len(batches), "Bucket batch index out of range")
+
+        # Each bucket already has the image's aspect ratio, so Fit to Largest has nothing to fit
+        if resize_mode == "Fit to Largest":
+            resize_mode = "Center Crop"
+
+        def make_chunks(start):
+            for (bucket_width, bucket_height), files in batches[start:]:
+                yield self._load_batch_from_pool(pool_dir, files, resize_mode, bucket_width, bucket_height, cache_to_disk, workers)
+
+        state = self.node_states.setdefault(node_id, {})
+        prefetcher = state.get("buckets")
+        if prefetcher is None:
+            prefetcher = state["buckets"] = _ChunkPrefetcher()
+        signature = (self.IS_CHANGED(), tuple(image_files), chunk_size, resize_mode, width, height, cache_to_disk, workers)
+
+        batch_tensor, _, _, info = prefetcher.get(signature, chunk_index, make_chunks)
+        (bucket_width, bucket_height), _ = batches[chunk_index]
+        bucket_count = len({bucket for bucket, _ in batches})
+        return (batch_tensor, chunk_index, len(batches),
+                f"[Bucket {bucket_width}x{bucket_height} ({bucket_label(bucket_width, bucket_height)}), {bucket_count} buckets, batch {chunk_index + 1}/{len(batches)}] {info}")
+
+    def _load_batch_from_pool(self, pool_dir, image_files, resize_mode, target_width, target_height, cache_to_disk=False, workers=0, use_pack=False):
         """Load all images as a batch tensor"""
-        loaded_images = []
         info_lines = []
-        
-        print(f"[I9 Batch Processing] Loading {len(image_files)} images as batch tensor")
 
-        for filename in image_files:
-            img_path = os.path.join(pool_dir, filename)
-            
-            try:
-                img = Image.open(img_path).convert('RGB')
-                img_tensor = torch.from_numpy(np.array(img).astype(np.float32) / 255.0)
-
-                # Resize to target dimensions
-                if img_tensor.shape[0] != target_height or img_tensor.shape[1] != target_width:
-                    img_tensor = self._resize_image(img_tensor, target_width, target_height, resize_mode)
-                
-                loaded_images.append(img_tensor)
-                info_lines.append(filename)
-            except Exception as e:
-                print(f"[I9 Batch Processing] Error loading {filename}: {e}")
+        if workers <= 0:
+            workers = min(32, os.cpu_count() or 1)
+        workers = min(workers, len(image_files))
+
+        logger.info(f"[I9 Batch Processing] Loading {len(image_files)} images as batch tensor ({workers} workers)")
+
+        if resize_mode == "Fit to Largest":
+            # Header reads only (memoized in the pool index), no decode
+            sizes = [size for size in map(_pool_index.dimensions, image_files) if size]
+            if sizes:
+                target_width, target_height = fit_to_largest_size(sizes)
+
+        source = ""
+        if use_pack and not _packable(resize_mode):
+            logger.info(f"[I9 Batch Processing] {resize_mode} can't be packed, decoding instead")
+            use_pack = False
+        if use_pack:
+            pack = self._update_pack(pool_dir, target_width, target_height, resize_mode, workers)
+            output, errors = get_pack(IMAGE_POOL, target_width, target_height, resize_mode).load(image_files)
+            source = f" from pack ({pack['bytes'] / 1024 / 1024:.0f} MB)"
+        else:
+            img_paths = [os.path.join(pool_dir, filename) for filename in image_files]
+            output, errors = self._load_images(img_paths, target_width, target_height, resize_mode, cache_to_disk, workers)
+
+        loaded = []
+        for i, (filename, error) in enumerate(zip(image_files, errors)):
+            if error is not None:
+                logger.warning(f"[I9 Batch Processing] Error loading {filename}: {error}")
+                metrics.count("images_skipped", "image")
                 continue
+            loaded.append(i)
+            info_lines.append(filename)
 
-        if not loaded_images:
+        if not loaded:
             empty = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
             return (empty, 0, 0, "Failed to load any images")
 
-        batch_tensor = torch.stack(loaded_images, dim=0)
-        return (batch_tensor, 0, len(loaded_images), f"Loaded {len(loaded_images)} images:\n" + "\n".join(info_lines))
-
-    def _resize_image(self, img_tensor, target_width, target_height, resize_mode):
-        if resize_mode == "Stretch":
-            return comfy.utils.common_upscale(img_tensor.movedim(-1, 0).unsqueeze(0), target_width, target_height, "bilinear", "disabled").squeeze(0).movedim(0, -1)
-        if resize_mode == "Center Crop":
-            return comfy.utils.common_upscale(img_tensor.movedim(-1, 0).unsqueeze(0), target_width, target_height, "bilinear", "center").squeeze(0).movedim(0, -1)
-        if resize_mode == "Letterbox":
-            scale = min(target_width / img_tensor.shape[1], target_height / img_tensor.shape[0])
-            new_w, new_h = int(img_tensor.shape[1] * scale), int(img_tensor.shape[0] * scale)
-            resized = comfy.utils.common_upscale(img_tensor.movedim(-1, 0).unsqueeze(0), new_w, new_h, "bilinear", "disabled").squeeze(0).movedim(0, -1)
-            canvas = torch.zeros((target_height, target_width, 3), dtype=torch.float32)
-            pad_top, pad_left = (target_height - new_h) // 2, (target_width - new_w) // 2
-            canvas[pad_top:pad_top+new_h, pad_left:pad_left+new_w, :] = resized
-            return canvas
-        return img_tensor
+        if len(loaded) < len(image_files):
+            output = output[loaded]
+
+        return (output, 0, len(loaded), f"Loaded {len(loaded)} images{source}:\n" + "\n".join(info_lines))
+
+    def _update_pack(self, pool_dir, target_width, target_height, resize_mode, workers=0):
+        """Create or incrementally update the pool's pack at this size; returns its stats"""
+        if workers <= 0:
+            workers = min(32, os.cpu_count() or 1)
+
+        def load_rows(filenames):
+            img_paths = [os.path.join(pool_dir, filename) for filename in filenames]
+            batch, errors = self._load_images(img_paths, target_width, target_height, resize_mode, False, min(workers, len(img_paths)), as_float=False)
+            return batch.numpy(), errors
+
+        pack = get_pack(IMAGE_POOL, target_width, target_height, resize_mode)
+        with metrics.span("pack", "image"):
+            entries = sorted(_pool_index.entries(), key=lambda entry: entry['filename'])
+            pack.update(_pool_index.generation(), entries, load_rows)
+        return pack.stats()
+
+    def _load_images(self, img_paths, target_width, target_height, resize_mode, cache_to_disk=False, workers=1, as_float=True):
+        """Decode img_paths into one float32 (or with as_float=False, uint8) batch; returns (batch, per-image error or None).
+
+        Decoding runs on worker threads, resizing is batched per source resolution
+        by BatchResizer, and resized results go through the tensor cache as uint8.
+        """
+        keys = {}
+
+        def cache_resized(i, image):
+            # image is a view into the batch's uint8 slots, which flush() turns into floats
+            _tensor_cache.put(keys[i], image.clone(), use_disk=cache_to_disk)
+
+        resizer = BatchResizer(len(img_paths), target_width, target_height, resize_mode, on_resized=cache_resized)
+
+        def load_one(i):
+            try:
+                key = _tensor_cache.make_key(img_paths[i], target_width, target_height, resize_mode, "uint8")
+                cached = _tensor_cache.get(key, use_disk=cache_to_disk)
+                if cached is not None:
+                    resizer.put_resized(i, cached)
+                    return None
+                keys[i] = key
+                image = self._decode_image(img_paths[i], target_width, target_height, resize_mode)
+            except Exception as e:
+                return e
+            # Resize failures are not specific to this image, so they propagate
+            resizer.add(i, image)
+            return None
+
+        # PIL decode releases the GIL, so threads scale across cores.
+        # map() yields in submission order, which keeps the sorted filename order.
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="i9_decode") as executor:
+                errors = list(executor.map(load_one, range(len(img_paths))))
+        else:
+            errors = [load_one(i) for i in range(len(img_paths))]
+
+        return resizer.flush(as_float), errors
+
+    def _decode_image(self, img_path, target_width, target_height, resize_mode):
+        """Decode a pool image to a uint8 RGB (h, w, 3) array.
+
+        Large JPEGs are decoded at a reduced DCT scale close to the target size
+        (see draft_size), which skips most of the IDCT work and the full-size
+        buffer; other formats ignore draft() and decode in full.
+        """
+        metrics.count("bytes_read", "image", os.path.getsize(img_path))
+        with Image.open(img_path) as img:
+            with metrics.span("decode", "image"):
+                reduced = draft_size(img.width, img.height, target_width, target_height, resize_mode)
+                if reduced is not None:
+                    img.draft('RGB', reduced)
+                img.load()
+            with metrics.span("convert", "image"):
+                if img.mode != 'RGB':
+                    img = img.convert('RGB')
+                return np.array(img)
 
     @classmethod
     def IS_CHANGED(cls, **kwargs):
         """Force update when pool contents change"""
-        input_dir = folder_paths.get_input_directory()
-        pool_dir = os.path.join(input_dir, "I9_ImagePool")
-        
-        if not os.path.exists(pool_dir):
-            return "empty"
-        
-        # Hash based on file list and modification times
-        files = sorted(os.listdir(pool_dir))
-        m = hashlib.sha256()
-        for f in files:
-            fpath = os.path.join(pool_dir, f)
-            if os.path.isfile(fpath):
-                m.update(f.encode())
-                m.update(str(os.path.getmtime(fpath)).encode())
-        
-        return m.hexdigest()
+        if kwargs.get("mode") == "Distributed" or (kwargs.get("mode") == "Sequential" and kwargs.get("auto_advance")):
+            # Every execution claims or advances to a different image
+            return float("nan")
+        return _pool_index.generation()
 
 NODE_CLASS_MAPPINGS = {"I9_BatchProcessing": I9_BatchProcessing}
 NODE_DISPLAY_NAME_MAPPINGS = {"I9_BatchProcessing": "🖼️ I9 Batch Processing"}
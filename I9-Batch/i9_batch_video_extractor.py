@@ -1,15 +1,26 @@
 import torch
-import numpy as np
-from PIL import Image
 import os
-import json
-import uuid
-import hashlib
+import asyncio
+import logging
 import folder_paths
-import comfy.utils
 import server
 from aiohttp import web
-import shutil
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from .i9_thumbnails import ensure_video_thumbnail, get_thumbnail_path, remove_thumbnail, serve_thumbnail
+from .i9_archives import receive_archive
+from .i9_uploads import receive_upload, receive_range, schedule_post_upload, ResumableUploads
+from .i9_pool_index import get_pool_index, VIDEO_POOL, VIDEO_EXTENSIONS
+from .i9_video_backends import CapturePool, DECODE_BACKENDS, available_backends, open_video
+from .i9_video_sampling import SAMPLING_MODES, detect_scene_changes, sample_frame_numbers, samples_per_video
+from .i9_video_index import get_video_index, remove_video_index, VIDEO_METADATA_FIELDS
+from .i9_metrics import metrics
+from .i9_resize import BatchResizer, RESIZE_MODES, fit_to_largest_size
+from .i9_tensor_cache import TensorCache
+from .i9_cursor import SequentialCursors, DEFAULT_PREFETCH
+from .i9_leases import LeaseStore, DEFAULT_LEASE_TIMEOUT, describe, lease_owner
 
 # Try to import cv2 - will be None if not installed
 try:
@@ -18,13 +29,157 @@ try:
 except ImportError:
     cv2 = None
     CV2_AVAILABLE = False
-    print("Warning: opencv-python not installed. Batch Video Extractor node will have limited functionality.")
-    print("Install with: pip install opencv-python>=4.8.0")
+    logging.getLogger("I9.video").warning("opencv-python not installed. Batch Video Extractor node will have limited functionality. Install with: pip install opencv-python>=4.8.0")
+
+# Each decoder already runs its own threads, so auto concurrency stays modest
+MAX_AUTO_WORKERS = 8
+# Scene detection results kept (a few frame numbers each), least recently used dropped first
+MAX_SCENE_ANALYSES = 1024
+
+
+logger = logging.getLogger("I9.video")
+_capture_pool = CapturePool()
+# Decoded + resized frames (uint8) shared by every node instance; the disk tier is compressed.
+# Videos are keyed by path/size/mtime_ns: hashing a multi-GB file would cost more than the cache saves.
+_frame_cache = TensorCache("video_frames", compress=True, hash_content=False)
+_scene_cache = OrderedDict()  # (video identity, threshold, count, stride) -> scene frame numbers
+_scene_cache_lock = threading.Lock()
+_pool_index = get_pool_index(VIDEO_POOL, VIDEO_EXTENSIONS)
+_resumable_uploads = ResumableUploads(VIDEO_POOL)
+_leases = LeaseStore(VIDEO_POOL)
+_cursors = SequentialCursors("video")
+
+
+def _post_upload(filename):
+    """Background validation and poster-frame generation of a freshly uploaded video"""
+    if not available_backends():
+        return
+    filepath = os.path.join(_pool_index.pool_dir, filename)
+    handle = open_video(filepath)
+    try:
+        readable = handle.opened and handle.read(0) is not None
+        width, height = handle.width, handle.height
+    finally:
+        handle.release()
+
+    if not readable:
+        logger.warning(f"[I9 Video Extractor] Uploaded file {filename} is not a readable video")
+        _pool_index.update_entry(filename, valid=False)
+        _pool_index.save()
+        return
+
+    _pool_index.update_entry(filename, width=width, height=height)
+    try:
+        _index_video(filename)
+    except Exception as e:
+        logger.warning(f"[I9 Video Extractor] Could not index {filename}: {e}")
+    if CV2_AVAILABLE:
+        ensure_video_thumbnail(filepath, get_thumbnail_path(VIDEO_POOL, filename))
+    _pool_index.save()
+
+
+_indexing = set()
+
+
+def _index_video(filename):
+    """Build the metadata/keyframe index of a pool video and mirror its metadata into the pool index"""
+    try:
+        video_index = get_video_index(VIDEO_POOL, filename, os.path.join(_pool_index.pool_dir, filename), build=True)
+        _pool_index.update_entry(filename, **{field: video_index[field] for field in VIDEO_METADATA_FIELDS})
+        _pool_index.save()
+    finally:
+        _indexing.discard(filename)
+
+
+def _video_metadata(filename):
+    """Cached index of a pool video; videos that have none yet (e.g. copied in by hand) get indexed in the background"""
+    video_index = get_video_index(VIDEO_POOL, filename, os.path.join(_pool_index.pool_dir, filename))
+    if video_index is None and available_backends() and filename not in _indexing:
+        _indexing.add(filename)
+        schedule_post_upload(_index_video, filename)
+    return video_index
+
+
+def _cached_scenes(scene_key):
+    """Scene frame numbers of an earlier analysis, or None"""
+    with _scene_cache_lock:
+        frame_numbers = _scene_cache.get(scene_key)
+        if frame_numbers is not None:
+            _scene_cache.move_to_end(scene_key)
+        return frame_numbers
+
+
+def _cache_scenes(scene_key, frame_numbers):
+    with _scene_cache_lock:
+        _scene_cache[scene_key] = frame_numbers
+        _scene_cache.move_to_end(scene_key)
+        while len(_scene_cache) > MAX_SCENE_ANALYSES:
+            _scene_cache.popitem(last=False)
+
+
+def _video_size(filename, backend="auto"):
+    """(width, height) of a pool video, from the index when the upload recorded it, otherwise from a pooled decoder"""
+    entry = _pool_index.get(filename)
+    if entry and 'width' in entry:
+        return entry['width'], entry['height']
+    video_path = os.path.join(_pool_index.pool_dir, filename)
+    handle = _capture_pool.acquire(video_path, backend)
+    try:
+        if not handle.opened or not handle.width:
+            return None
+        _pool_index.update_entry(filename, width=handle.width, height=handle.height)
+        return handle.width, handle.height
+    finally:
+        _capture_pool.release(video_path, handle)
+
+class _FrameSlots:
+    """Output batch of one extraction: a BatchResizer whose slots are looked up in and written back to the frame cache"""
+
+    def __init__(self, count, target_width, target_height, resize_mode, cache_frames=True, cache_to_disk=False):
+        self.cache_frames = cache_frames
+        self.cache_to_disk = cache_to_disk
+        self._keys = {}  # slot -> cache key of a frame that still has to be resized
+        self.resizer = BatchResizer(count, target_width, target_height, resize_mode, bgr=True, on_resized=self._cache_resized if cache_frames else None, node="video")
+
+    def place_cached(self, slot, video_path, frame_number):
+        """Fill slot from the frame cache; on a miss remember its key so the resized frame gets cached. True on a hit."""
+        if not self.cache_frames:
+            return False
+        resizer = self.resizer
+        key = _frame_cache.make_key(video_path, frame_number, resizer.target_width, resizer.target_height, resizer.resize_mode, "uint8")
+        cached = _frame_cache.get(key, use_disk=self.cache_to_disk)
+        if cached is not None:
+            resizer.put_resized(slot, cached)
+            return True
+        self._keys[slot] = key
+        return False
+
+    def add(self, slot, frame):
+        self.resizer.add(slot, frame)
+
+    def flush(self):
+        return self.resizer.flush()
+
+    def _cache_resized(self, slot, image):
+        key = self._keys.pop(slot, None)
+        if key is not None:
+            # image is a view into the batch's uint8 slots, which flush() turns into floats
+            _frame_cache.put(key, image.clone(), use_disk=self.cache_to_disk)
+
+def _check_archive_video(path):
+    """Container check of a video extracted from an archive; an error message, or None if it opens"""
+    if not available_backends():
+        return None
+    handle = open_video(path)
+    try:
+        return None if handle.opened else "not a readable video"
+    finally:
+        handle.release()
 
 # API Routes for video batch management
 @server.PromptServer.instance.routes.post("/i9/video/upload")
 async def upload_batch_videos(request):
-    """Handle multiple video uploads"""
+    """Handle multiple video uploads, deduplicating by content hash"""
     try:
         reader = await request.multipart()
         uploaded_files = []
@@ -36,35 +191,15 @@ async def upload_batch_videos(request):
         field = await reader.next()
         while field is not None:
             if field.name == 'video':
-                filename = field.filename
-                # Generate unique filename if exists
-                base, ext = os.path.splitext(filename)
-                counter = 1
-                final_filename = filename
-                while os.path.exists(os.path.join(pool_dir, final_filename)):
-                    final_filename = f"{base}_{counter}{ext}"
-                    counter += 1
-
-                filepath = os.path.join(pool_dir, final_filename)
-
-                with open(filepath, 'wb') as f:
-                    while True:
-                        chunk = await field.read_chunk()
-                        if not chunk:
-                            break
-                        f.write(chunk)
-
-                uploaded_files.append({
-                    'filename': final_filename,
-                    'original_name': filename,
-                    'path': filepath
-                })
+                uploaded_files.append(await receive_upload(field, _pool_index, _post_upload))
 
             field = await reader.next()
 
+        await asyncio.get_running_loop().run_in_executor(None, _pool_index.save)
         return web.json_response({
             'success': True,
-            'files': uploaded_files
+            'files': uploaded_files,
+            'deduplicated': sum(1 for f in uploaded_files if f['deduplicated'])
         })
     except Exception as e:
         return web.json_response({
@@ -72,31 +207,117 @@ async def upload_batch_videos(request):
             'error': str(e)
         }, status=500)
 
+@server.PromptServer.instance.routes.post("/i9/video/upload/archive")
+async def upload_video_archive(request):
+    """Extract a streamed zip/tar (the request body, or multipart field 'archive') into the pool.
+
+    Progress goes out as 'i9.archive.progress' websocket events, to the client
+    in ?client_id= if given.
+    """
+    try:
+        client_id = request.query.get('client_id') or None
+
+        def report(progress):
+            server.PromptServer.instance.send_sync("i9.archive.progress", {'pool': VIDEO_POOL, 'total': request.content_length, **progress}, client_id)
+
+        result = await receive_archive(request, _pool_index, _check_archive_video, _post_upload, report)
+        await asyncio.get_running_loop().run_in_executor(None, _pool_index.save)
+        if 'error' in result:
+            return web.json_response({'success': False, **result}, status=400)
+        return web.json_response({'success': True, **result})
+    except ValueError as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=400)
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+@server.PromptServer.instance.routes.post("/i9/video/upload/init")
+async def init_resumable_video_upload(request):
+    """Start (or resume) a chunked upload: {filename, size, fingerprint} -> upload id and received ranges"""
+    try:
+        data = await request.json()
+        state = await asyncio.get_running_loop().run_in_executor(
+            None, _resumable_uploads.init, data.get('filename'), int(data.get('size', -1)), data.get('fingerprint'))
+        return web.json_response({'success': True, **state})
+    except ValueError as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=400)
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+@server.PromptServer.instance.routes.get("/i9/video/upload/{upload_id}")
+async def get_resumable_video_upload(request):
+    """Report the byte ranges already committed for a chunked upload"""
+    try:
+        state = await asyncio.get_running_loop().run_in_executor(None, _resumable_uploads.status, request.match_info['upload_id'])
+        return web.json_response({'success': True, **state})
+    except KeyError as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=404)
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+@server.PromptServer.instance.routes.put("/i9/video/upload/{upload_id}")
+async def put_resumable_video_chunk(request):
+    """Write one byte range (?offset=N, raw body) of a chunked upload"""
+    try:
+        state = await receive_range(request, _resumable_uploads, request.match_info['upload_id'])
+        return web.json_response({'success': True, **state})
+    except KeyError as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=404)
+    except ValueError as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=400)
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+@server.PromptServer.instance.routes.post("/i9/video/upload/{upload_id}/finalize")
+async def finalize_resumable_video_upload(request):
+    """Verify a complete chunked upload ({sha256} optional) and move it into the pool"""
+    try:
+        data = await request.json() if request.can_read_body else {}
+        result = await asyncio.get_running_loop().run_in_executor(
+            None, _resumable_uploads.finalize, request.match_info['upload_id'], _pool_index, data.get('sha256'), _post_upload)
+        await asyncio.get_running_loop().run_in_executor(None, _pool_index.save)
+        return web.json_response({'success': True, 'file': result})
+    except KeyError as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=404)
+    except ValueError as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=400)
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+@server.PromptServer.instance.routes.delete("/i9/video/upload/{upload_id}")
+async def abort_resumable_video_upload(request):
+    """Discard a chunked upload and its partial data"""
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, _resumable_uploads.abort, request.match_info['upload_id'])
+        return web.json_response({'success': True})
+    except KeyError as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=404)
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
 @server.PromptServer.instance.routes.get("/i9/video/list")
 async def list_batch_videos(request):
-    """List all videos in the batch pool"""
+    """List videos in the batch pool (query: offset, limit, sort=name|mtime|size, order, filter)"""
     try:
         input_dir = folder_paths.get_input_directory()
         pool_dir = os.path.join(input_dir, "I9_VideoPool")
         os.makedirs(pool_dir, exist_ok=True)
 
-        videos = []
-        for filename in os.listdir(pool_dir):
-            if filename.lower().endswith(('.mp4', '.avi', '.mov', '.mkv', '.webm', '.flv', '.wmv', '.m4v')):
-                filepath = os.path.join(pool_dir, filename)
-                stat = os.stat(filepath)
-                videos.append({
-                    'filename': filename,
-                    'size': stat.st_size,
-                    'modified': stat.st_mtime
-                })
+        offset = max(0, int(request.query.get('offset', 0)))
+        limit = max(0, int(request.query.get('limit', 0)))  # 0 = everything from offset
+        sort = request.query.get('sort', 'mtime')
+        descending = request.query.get('order', 'desc') != 'asc'
+        name_filter = request.query.get('filter') or None
 
-        # Sort by modification time (newest first)
-        videos.sort(key=lambda x: x['modified'], reverse=True)
+        # Default order is newest first, served from the index's cached sorted view
+        videos, total = _pool_index.query(sort, descending, name_filter, offset, limit or None)
 
+        next_offset = offset + len(videos)
         return web.json_response({
             'success': True,
-            'videos': videos
+            'videos': videos,
+            'total': total,
+            'offset': offset,
+            'next_offset': next_offset if next_offset < total else None
         })
     except Exception as e:
         return web.json_response({
@@ -104,6 +325,28 @@ async def list_batch_videos(request):
             'error': str(e)
         }, status=500)
 
+@server.PromptServer.instance.routes.get("/i9/video/cache")
+async def get_video_cache_stats(request):
+    """Hit/miss statistics and size of the decoded-frame cache"""
+    try:
+        return web.json_response({
+            'success': True,
+            'frames': _frame_cache.stats(),
+            'scene_analyses': len(_scene_cache)
+        })
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+@server.PromptServer.instance.routes.get("/i9/video/thumb")
+async def get_video_thumbnail(request):
+    """Serve a cached WebP poster frame of a pool video"""
+    try:
+        input_dir = folder_paths.get_input_directory()
+        pool_dir = os.path.join(input_dir, "I9_VideoPool")
+        return await serve_thumbnail(request, pool_dir, "I9_VideoPool", ensure_video_thumbnail)
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
 @server.PromptServer.instance.routes.delete("/i9/video/delete")
 async def delete_batch_video(request):
     """Delete a video from the batch pool"""
@@ -119,7 +362,13 @@ async def delete_batch_video(request):
         filepath = os.path.join(pool_dir, filename)
 
         if os.path.exists(filepath):
+            _capture_pool.invalidate(filepath)
+            _frame_cache.invalidate_path(filepath)
             os.remove(filepath)
+            _pool_index.remove(filename)
+            _pool_index.save()
+            remove_thumbnail("I9_VideoPool", filename)
+            remove_video_index(VIDEO_POOL, filename)
             return web.json_response({'success': True})
         else:
             return web.json_response({'success': False, 'error': 'File not found'}, status=404)
@@ -133,16 +382,74 @@ async def clear_video_pool(request):
         input_dir = folder_paths.get_input_directory()
         pool_dir = os.path.join(input_dir, "I9_VideoPool")
 
+        _capture_pool.invalidate()
+        _frame_cache.clear(disk=True)
+        with _scene_cache_lock:
+            _scene_cache.clear()
+
         if os.path.exists(pool_dir):
             for filename in os.listdir(pool_dir):
                 filepath = os.path.join(pool_dir, filename)
                 if os.path.isfile(filepath):
                     os.remove(filepath)
+        _pool_index.clear()
+        remove_thumbnail("I9_VideoPool")
+        remove_video_index(VIDEO_POOL)
+        _leases.reset()
 
         return web.json_response({'success': True})
     except Exception as e:
         return web.json_response({'success': False, 'error': str(e)}, status=500)
 
+@server.PromptServer.instance.routes.get("/i9/video/cursor")
+async def get_video_cursors(request):
+    """Auto-advance Sequential cursors per node: next position and completed passes over the pool"""
+    try:
+        return web.json_response({'success': True, 'cursors': _cursors.status()})
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+@server.PromptServer.instance.routes.post("/i9/video/cursor/seek")
+async def seek_video_cursor(request):
+    """Set the next video a node processes: {node_id, position}"""
+    try:
+        data = await request.json()
+        _cursors.seek(str(data['node_id']), int(data['position']))
+        return web.json_response({'success': True, 'cursors': _cursors.status()})
+    except (KeyError, ValueError) as e:
+        return web.json_response({'success': False, 'error': f"node_id and a non-negative position are required: {e}"}, status=400)
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+@server.PromptServer.instance.routes.post("/i9/video/cursor/reset")
+async def reset_video_cursor(request):
+    """Rewind one node's cursor ({node_id}) or every cursor (no body)"""
+    try:
+        data = await request.json() if request.can_read_body else {}
+        node_id = data.get('node_id')
+        _cursors.reset(None if node_id is None else str(node_id))
+        return web.json_response({'success': True, 'cursors': _cursors.status()})
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+@server.PromptServer.instance.routes.get("/i9/video/leases")
+async def get_video_leases(request):
+    """Distributed mode progress: done, claimed and pending videos across all workers"""
+    try:
+        status = await asyncio.get_running_loop().run_in_executor(None, _leases.status, _pool_index.files())
+        return web.json_response({'success': True, **status})
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+@server.PromptServer.instance.routes.post("/i9/video/leases/reset")
+async def reset_video_leases(request):
+    """Forget all claims and finished videos so Distributed mode starts over"""
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, _leases.reset)
+        return web.json_response({'success': True})
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
 
 class I9_BatchVideoExtractor:
 
@@ -153,14 +460,30 @@ class I9_BatchVideoExtractor:
     def INPUT_TYPES(cls):
         return {
             "required": {
-                "mode": (["Batch Tensor", "Sequential"], {"default": "Batch Tensor"}),
+                "mode": (["Batch Tensor", "Sequential", "Frame Range", "Distributed"], {"default": "Batch Tensor"}),
                 "frame_number": ("INT", {"default": 0, "min": 0, "max": 999999, "step": 1}),
             },
             "optional": {
-                "resize_mode": (["Center Crop", "Letterbox", "Stretch", "Fit to Largest"], {"default": "Center Crop"}),
+                "resize_mode": (RESIZE_MODES, {"default": "Center Crop"}),
                 "batch_index": ("INT", {"default": 0, "min": 0, "max": 9999, "step": 1}),
                 "width": ("INT", {"default": 512, "min": 64, "max": 8192, "step": 8}),
                 "height": ("INT", {"default": 512, "min": 64, "max": 8192, "step": 8}),
+                "frame_end": ("INT", {"default": -1, "min": -1, "max": 999999, "step": 1}),  # Frame Range: last frame, -1 = end of video
+                "frame_step": ("INT", {"default": 1, "min": 1, "max": 10000, "step": 1}),
+                "workers": ("INT", {"default": 0, "min": 0, "max": 64, "step": 1}),  # videos decoded concurrently, 0 = auto
+                "decode_backend": (DECODE_BACKENDS, {"default": "auto"}),
+                # Batch Tensor / Sequential: which frames to take from each video (Scene Changes analyses every frame_step-th frame)
+                "sampling": (SAMPLING_MODES, {"default": "Frame Number"}),
+                "sample_time": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 86400.0, "step": 0.01}),  # Timestamp: seconds
+                "sample_percent": ("FLOAT", {"default": 50.0, "min": 0.0, "max": 100.0, "step": 0.1}),  # Percentage: position in the video
+                "sample_count": ("INT", {"default": 8, "min": 1, "max": 1000, "step": 1}),  # Evenly Spaced / Scene Changes: frames per video
+                "scene_threshold": ("FLOAT", {"default": 0.35, "min": 0.01, "max": 1.0, "step": 0.01}),
+                "cache_frames": ("BOOLEAN", {"default": True}),
+                "cache_to_disk": ("BOOLEAN", {"default": False}),
+                "frame_cache_mb": ("INT", {"default": 2048, "min": 64, "max": 262144, "step": 64}),  # memory budget of the decoded-frame cache
+                "lease_timeout": ("INT", {"default": DEFAULT_LEASE_TIMEOUT, "min": 10, "max": 604800, "step": 10}),  # Distributed: seconds before a claimed video is handed out again (a worker's last video is only finished by one more run)
+                "auto_advance": ("BOOLEAN", {"default": False}),  # Sequential: ignore batch_index and move a server-side cursor on every run
+                "prefetch": ("INT", {"default": DEFAULT_PREFETCH, "min": 0, "max": 64, "step": 1}),  # Sequential with auto_advance: videos extracted ahead into the frame cache (needs cache_frames)
             },
             "hidden": {
                 "node_id": "UNIQUE_ID",
@@ -172,16 +495,15 @@ class I9_BatchVideoExtractor:
     FUNCTION = "extract_frames"
     CATEGORY = "I9/Video"
 
-    def extract_frames(self, mode="Batch Tensor", frame_number=0, resize_mode="Center Crop", batch_index=0, width=512, height=512, node_id=None):
-        print(f"\n{'='*60}")
-        print(f"[I9 Video Extractor] Mode: {mode} | Frame: {frame_number} | Resize: {resize_mode}")
-        print(f"[I9 Video Extractor] Resolution: {width}x{height} | Batch Index: {batch_index}")
-        print(f"[I9 Video Extractor] Processing videos for node: {node_id}")
+    def extract_frames(self, mode="Batch Tensor", frame_number=0, resize_mode="Center Crop", batch_index=0, width=512, height=512, frame_end=-1, frame_step=1, workers=0, decode_backend="auto", sampling="Frame Number", sample_time=0.0, sample_percent=50.0, sample_count=8, scene_threshold=0.35, cache_frames=True, cache_to_disk=False, frame_cache_mb=2048, lease_timeout=DEFAULT_LEASE_TIMEOUT, auto_advance=False, prefetch=DEFAULT_PREFETCH, node_id=None):
+        logger.debug(f"[I9 Video Extractor] Mode: {mode} | Sampling: {sampling} | Frame: {frame_number} | Resize: {resize_mode}")
+        logger.debug(f"[I9 Video Extractor] Resolution: {width}x{height} | Batch Index: {batch_index} | Backend: {decode_backend}")
+        logger.debug(f"[I9 Video Extractor] Processing videos for node: {node_id}")
 
-        # Check if cv2 is available
-        if not CV2_AVAILABLE:
+        # Check that the selected decode backend is installed
+        if not available_backends() or (decode_backend != "auto" and decode_backend not in available_backends()):
             empty = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
-            return (empty, 0, 0, "opencv-python not installed. Run: pip install opencv-python>=4.8.0")
+            return (empty, 0, 0, f"Decode backend {decode_backend} not available (installed: {', '.join(available_backends()) or 'none'}). Run: pip install opencv-python>=4.8.0 or pip install av")
 
         # Get all videos from pool
         input_dir = folder_paths.get_input_directory()
@@ -192,20 +514,58 @@ class I9_BatchVideoExtractor:
             return (empty, 0, 0, "No videos in batch pool. Use the upload button to add videos.")
 
         # Get all video files
-        video_files = sorted([f for f in os.listdir(pool_dir)
-                            if f.lower().endswith(('.mp4', '.avi', '.mov', '.mkv', '.webm', '.flv', '.wmv', '.m4v'))])
+        with metrics.span("list", "video"):
+            video_files = _pool_index.files()
 
         if not video_files:
             empty = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
             return (empty, 0, 0, "No videos in batch pool. Use the upload button to add videos.")
 
         # Process videos
-        if mode == "Sequential":
-            return self._extract_sequential_from_pool(pool_dir, video_files, batch_index, frame_number, resize_mode, width, height, node_id)
+        _frame_cache.set_max_bytes(frame_cache_mb * 1024 * 1024)
+        cache = (cache_frames, cache_to_disk)
+        sample_params = (sampling, frame_number, sample_time, sample_percent, sample_count, scene_threshold, frame_step)
+        if mode == "Distributed":
+            # Claim the next video no worker sharing the pool has processed or claimed, then extract it like Sequential
+            filename, leases = _leases.claim(lease_owner(node_id), video_files, lease_timeout)
+            if filename is None:
+                empty = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
+                return (empty, leases['done'], len(video_files), f"Distributed: nothing left to claim ({describe(leases)})")
+            batch_index = video_files.index(filename)
+            images, _, _, info = self._extract_one_from_pool(pool_dir, video_files, batch_index, frame_number, sample_params, resize_mode, width, height, node_id, decode_backend, cache)
+            return (images, batch_index, len(video_files), f"{info} | Distributed: {describe(leases)}")
+        elif mode == "Sequential":
+            if auto_advance:
+                batch_index = _cursors.advance(node_id, len(video_files))
+                # A prefetch job may be extracting this very video; reuse its work
+                _cursors.wait(node_id, video_files[batch_index])
+            result = self._extract_one_from_pool(pool_dir, video_files, batch_index, frame_number, sample_params, resize_mode, width, height, node_id, decode_backend, cache)
+            # Only the cursor knows which videos come next; a hand-driven batch_index can jump anywhere
+            if auto_advance and cache_frames and prefetch:
+                # Extracting the next videos now leaves their frames in the frame cache for the following runs
+                upcoming = [(batch_index + k) % len(video_files) for k in range(1, min(prefetch, len(video_files) - 1) + 1)]
+                _cursors.prefetch(node_id, {
+                    video_files[index]: lambda index=index: self._extract_one_from_pool(pool_dir, video_files, index, frame_number, sample_params, resize_mode, width, height, node_id, decode_backend, cache)
+                    for index in upcoming})
+            return result
+        elif mode == "Batch Tensor" and sampling != "Frame Number":
+            return self._extract_samples_from_pool(pool_dir, video_files, sample_params, resize_mode, width, height, workers, decode_backend, cache)
+        elif mode == "Frame Range":
+            return self._extract_range_from_pool(pool_dir, video_files, batch_index, frame_number, frame_end, frame_step, resize_mode, width, height, decode_backend, cache)
         else:
-            return self._extract_batch_from_pool(pool_dir, video_files, frame_number, resize_mode, width, height)
+            return self._extract_batch_from_pool(pool_dir, video_files, frame_number, resize_mode, width, height, workers, decode_backend, cache)
 
-    def _extract_sequential_from_pool(self, pool_dir, video_files, batch_index, frame_number, resize_mode, width, height, node_id):
+    def _extract_one_from_pool(self, pool_dir, video_files, batch_index, frame_number, sample_params, resize_mode, width, height, node_id, decode_backend="auto", cache=(True, False)):
+        """Sequential mode: frame_number, or the sampled frames, of the video at batch_index"""
+        if sample_params[0] == "Frame Number":
+            return self._extract_sequential_from_pool(pool_dir, video_files, batch_index, frame_number, resize_mode, width, height, node_id, decode_backend, cache)
+        if batch_index >= len(video_files):
+            empty = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
+            return (empty, batch_index, len(video_files), "Index out of range")
+        images, _, _, info = self._extract_samples_from_pool(pool_dir, video_files[batch_index:batch_index + 1], sample_params, resize_mode, width, height, 1, decode_backend, cache)
+        return (images, batch_index, len(video_files), f"[{batch_index + 1}/{len(video_files)}] {info}")
+
+    def _extract_sequential_from_pool(self, pool_dir, video_files, batch_index, frame_number, resize_mode, width, height, node_id, decode_backend="auto", cache=(True, False)):
         """Extract frame from one video at a time in sequential mode"""
         total_count = len(video_files)
 
@@ -217,128 +577,314 @@ class I9_BatchVideoExtractor:
         video_path = os.path.join(pool_dir, filename)
 
         try:
-            frame_tensor = self._extract_frame_from_video(video_path, frame_number, width, height, resize_mode)
+            if resize_mode == "Fit to Largest":
+                width, height = _video_size(filename, decode_backend) or (width, height)
+            slots = _FrameSlots(1, width, height, resize_mode, *cache)
 
-            if frame_tensor is None:
-                empty = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
-                return (empty, batch_index, total_count, f"Could not extract frame {frame_number} from {filename}")
+            if not slots.place_cached(0, video_path, frame_number):
+                frame = self._extract_frame_from_video(video_path, frame_number, decode_backend)
+
+                if frame is None:
+                    empty = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
+                    return (empty, batch_index, total_count, f"Could not extract frame {frame_number} from {filename}")
 
-            frame_tensor = frame_tensor.unsqueeze(0)
+                slots.add(0, frame)
+
+            frame_tensor = slots.flush()
             info = f"[{batch_index + 1}/{total_count}] {filename} - Frame {frame_number}"
             return (frame_tensor, batch_index, total_count, info)
         except Exception as e:
             empty = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
             return (empty, batch_index, total_count, f"Error processing {filename}: {e}")
 
-    def _extract_batch_from_pool(self, pool_dir, video_files, frame_number, resize_mode, target_width, target_height):
+    def _extract_range_from_pool(self, pool_dir, video_files, batch_index, frame_start, frame_end, frame_step, resize_mode, width, height, decode_backend="auto", cache=(True, False)):
+        """Extract frame_start..frame_end (inclusive, every frame_step) from one video in a single forward pass"""
+        total_count = len(video_files)
+
+        if batch_index >= total_count:
+            empty = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
+            return (empty, batch_index, total_count, "Index out of range")
+
+        filename = video_files[batch_index]
+        video_path = os.path.join(pool_dir, filename)
+        video_index = _video_metadata(filename)
+        handle = None
+
+        try:
+            # With a cached index the range is known without opening the file, and fully cached ranges never open it
+            if video_index is None:
+                handle = _capture_pool.acquire(video_path, decode_backend)
+                if not handle.opened:
+                    empty = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
+                    return (empty, batch_index, total_count, f"Could not open video: {filename}")
+            frame_count = video_index['frame_count'] if video_index is not None else handle.frame_count
+
+            last_frame = frame_count - 1 if frame_end < 0 else min(frame_end, frame_count - 1)
+            frame_numbers = list(range(frame_start, last_frame + 1, frame_step))
+            if not frame_numbers:
+                empty = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
+                return (empty, batch_index, total_count, f"No frames in range {frame_start}-{frame_end} (total: {frame_count})")
+
+            if resize_mode == "Fit to Largest":
+                width, height = _video_size(filename, decode_backend) or (width, height)
+
+            # Every frame has the same resolution, so frames are resized in groups as they are decoded
+            slots = _FrameSlots(len(frame_numbers), width, height, resize_mode, *cache)
+            missing = [i for i, frame_number in enumerate(frame_numbers) if not slots.place_cached(i, video_path, frame_number)]
+            extracted = sorted(set(range(len(frame_numbers))) - set(missing))
+
+            if missing and handle is None:
+                handle = _capture_pool.acquire(video_path, decode_backend, video_index)
+                if not handle.opened:
+                    empty = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
+                    return (empty, batch_index, total_count, f"Could not open video: {filename}")
+
+            for i in missing:
+                frame = handle.read(frame_numbers[i])
+                if frame is None:
+                    logger.warning(f"[I9 Video Extractor] Could not read frame {frame_numbers[i]} from {filename}")
+                    continue
+                slots.add(i, frame)
+                extracted.append(i)
+            extracted.sort()
+            output = slots.flush()
+        except Exception as e:
+            empty = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
+            return (empty, batch_index, total_count, f"Error processing {filename}: {e}")
+        finally:
+            if handle is not None:
+                _capture_pool.release(video_path, handle)
+
+        if not extracted:
+            empty = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
+            return (empty, batch_index, total_count, f"Could not extract frames {frame_start}-{last_frame} from {filename}")
+
+        if len(extracted) < len(frame_numbers):
+            output = output[extracted]
+
+        cached = len(frame_numbers) - len(missing)
+        info = f"[{batch_index + 1}/{total_count}] {filename} - Frames {frame_start}-{last_frame} step {frame_step} ({len(extracted)} frames, {cached} cached)"
+        return (output, batch_index, total_count, info)
+
+    def _extract_batch_from_pool(self, pool_dir, video_files, frame_number, resize_mode, target_width, target_height, workers=0, decode_backend="auto", cache=(True, False)):
         """Extract frames from all videos as a batch tensor"""
-        extracted_frames = []
         info_lines = []
+        extracted = []
 
-        print(f"[I9 Video Extractor] Extracting frame {frame_number} from {len(video_files)} videos as batch tensor")
+        if workers <= 0:
+            workers = min(MAX_AUTO_WORKERS, os.cpu_count() or 1)
+        workers = min(workers, len(video_files))
 
-        for filename in video_files:
-            video_path = os.path.join(pool_dir, filename)
+        logger.info(f"[I9 Video Extractor] Extracting frame {frame_number} from {len(video_files)} videos as batch tensor ({workers} workers)")
 
-            try:
-                frame_tensor = self._extract_frame_from_video(video_path, frame_number, target_width, target_height, resize_mode)
+        if resize_mode == "Fit to Largest":
+            sizes = [size for size in (_video_size(filename, decode_backend) for filename in video_files) if size]
+            if sizes:
+                target_width, target_height = fit_to_largest_size(sizes)
 
-                if frame_tensor is not None:
-                    extracted_frames.append(frame_tensor)
-                    info_lines.append(f"{filename} (frame {frame_number})")
-                else:
-                    print(f"[I9 Video Extractor] Could not extract frame {frame_number} from {filename}")
-            except Exception as e:
-                print(f"[I9 Video Extractor] Error processing {filename}: {e}")
-                continue
+        # Decoded frames are resized in groups of equal source resolution straight into the output batch
+        slots = _FrameSlots(len(video_files), target_width, target_height, resize_mode, *cache)
 
-        if not extracted_frames:
+        def extract_one(i):
+            video_path = os.path.join(pool_dir, video_files[i])
+            start_time = time.perf_counter()
+            try:
+                hit = slots.place_cached(i, video_path, frame_number)
+                frame = None if hit else self._extract_frame_from_video(video_path, frame_number, decode_backend)
+            except Exception as e:
+                return False, False, e, time.perf_counter() - start_time
+            elapsed = time.perf_counter() - start_time
+            if frame is not None:
+                slots.add(i, frame)
+            return hit or frame is not None, hit, None, elapsed
+
+        # The decoders release the GIL while demuxing and decoding, so videos overlap on a thread pool.
+        # map() yields in submission order, which keeps the sorted filename order.
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="i9_video") as executor:
+                results = list(executor.map(extract_one, range(len(video_files))))
+        else:
+            results = [extract_one(i) for i in range(len(video_files))]
+        output = slots.flush()
+
+        for i, (filename, (ok, hit, error, elapsed)) in enumerate(zip(video_files, results)):
+            if error is not None:
+                logger.warning(f"[I9 Video Extractor] Error processing {filename}: {error}")
+            elif not ok:
+                logger.warning(f"[I9 Video Extractor] Could not extract frame {frame_number} from {filename}")
+            else:
+                extracted.append(i)
+                info_lines.append(f"{filename} (frame {frame_number}, {'cached' if hit else f'{elapsed * 1000:.0f} ms'})")
+
+        if not extracted:
             empty = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
             return (empty, 0, 0, f"Failed to extract frame {frame_number} from any videos")
 
-        batch_tensor = torch.stack(extracted_frames, dim=0)
-        return (batch_tensor, 0, len(extracted_frames), f"Extracted frame {frame_number} from {len(extracted_frames)} videos:\n" + "\n".join(info_lines))
+        if len(extracted) < len(video_files):
+            output = output[extracted]
 
-    def _extract_frame_from_video(self, video_path, frame_number, target_width, target_height, resize_mode):
-        """Extract a specific frame from a video file using OpenCV"""
-        try:
-            cap = cv2.VideoCapture(video_path)
+        return (output, 0, len(extracted), f"Extracted frame {frame_number} from {len(extracted)} videos:\n" + "\n".join(info_lines))
 
-            if not cap.isOpened():
-                print(f"[I9 Video Extractor] Could not open video: {video_path}")
-                return None
+    def _extract_samples_from_pool(self, pool_dir, video_files, sample_params, resize_mode, target_width, target_height, workers=0, decode_backend="auto", cache=(True, False)):
+        """Extract the sampled frames of every video into one batch tensor, with per-frame provenance in info"""
+        sampling, _, _, _, sample_count, _, _ = sample_params
+        slots = samples_per_video(sampling, sample_count)
 
-            # Get total frame count
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if workers <= 0:
+            workers = min(MAX_AUTO_WORKERS, os.cpu_count() or 1)
+        workers = min(workers, len(video_files))
 
-            # Validate frame number
-            if frame_number >= total_frames:
-                print(f"[I9 Video Extractor] Frame {frame_number} out of range (total: {total_frames})")
-                cap.release()
-                return None
+        logger.info(f"[I9 Video Extractor] Sampling {sampling} from {len(video_files)} videos ({workers} workers)")
+
+        if resize_mode == "Fit to Largest":
+            sizes = [size for size in (_video_size(filename, decode_backend) for filename in video_files) if size]
+            if sizes:
+                target_width, target_height = fit_to_largest_size(sizes)
 
-            # Set frame position
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+        # Video i owns output slots i * slots ... i * slots + slots - 1; unused slots are dropped at the end
+        frame_slots = _FrameSlots(len(video_files) * slots, target_width, target_height, resize_mode, *cache)
+
+        def extract_one(i):
+            video_path = os.path.join(pool_dir, video_files[i])
+            start_time = time.perf_counter()
+            try:
+                fps, samples = self._sample_video(video_path, sample_params, frame_slots, i * slots, decode_backend)
+            except Exception as e:
+                return [], None, e, time.perf_counter() - start_time
+            return samples, fps, None, time.perf_counter() - start_time
 
-            # Read the frame
-            ret, frame = cap.read()
-            cap.release()
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="i9_video") as executor:
+                results = list(executor.map(extract_one, range(len(video_files))))
+        else:
+            results = [extract_one(i) for i in range(len(video_files))]
+        output = frame_slots.flush()
 
-            if not ret or frame is None:
-                print(f"[I9 Video Extractor] Could not read frame {frame_number}")
+        extracted = []
+        info_lines = []
+        for i, (filename, (samples, fps, error, elapsed)) in enumerate(zip(video_files, results)):
+            if error is not None:
+                logger.warning(f"[I9 Video Extractor] Error processing {filename}: {error}")
+                continue
+            if not samples:
+                logger.warning(f"[I9 Video Extractor] {sampling} sampling found no frames in {filename}")
+                continue
+            for j, frame_number in samples:
+                extracted.append(i * slots + j)
+                timestamp = f", {frame_number / fps:.2f}s" if fps else ""
+                info_lines.append(f"#{len(extracted) - 1}: {filename} (frame {frame_number}{timestamp})")
+            logger.debug(f"[I9 Video Extractor] {filename}: {len(samples)} frames in {elapsed * 1000:.0f} ms")
+
+        if not extracted:
+            empty = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
+            return (empty, 0, 0, f"{sampling} sampling found no frames in any video")
+
+        if len(extracted) < output.shape[0]:
+            output = output[extracted]
+
+        return (output, 0, len(extracted), f"{sampling}: {len(extracted)} frames from {len(video_files)} videos:\n" + "\n".join(info_lines))
+
+    def _sample_video(self, video_path, sample_params, slots, first_slot, decode_backend="auto"):
+        """Fill slots from first_slot with the sampled frames of one video; returns (fps, [(slot offset, frame_number)]).
+
+        Cached frames are placed without opening the file (sample positions come
+        from the video index, scene cuts from an earlier analysis); the rest are
+        decoded in a single forward pass.
+        """
+        sampling, frame_number, sample_time, sample_percent, sample_count, scene_threshold, frame_step = sample_params
+        video_index = _video_metadata(os.path.basename(video_path))
+        fps = video_index['fps'] if video_index is not None else None
+
+        frame_numbers = None
+        scene_key = None
+        if sampling == "Scene Changes":
+            if slots.cache_frames:
+                scene_key = (_frame_cache.file_digest(video_path), scene_threshold, sample_count, frame_step)
+                frame_numbers = _cached_scenes(scene_key)
+        elif video_index is not None:
+            frame_numbers = sample_frame_numbers(sampling, video_index['frame_count'], fps, frame_number, sample_time, sample_percent, sample_count)
+
+        missing = None
+        if frame_numbers is not None:
+            missing = [j for j, sample_frame in enumerate(frame_numbers) if not slots.place_cached(first_slot + j, video_path, sample_frame)]
+            if not missing:
+                return fps, list(enumerate(frame_numbers))
+
+        handle = _capture_pool.acquire(video_path, decode_backend, video_index)
+        try:
+            if not handle.opened:
+                raise RuntimeError(f"Could not open video: {video_path}")
+            fps = handle.fps
+
+            if frame_numbers is None and sampling == "Scene Changes":
+                scenes = detect_scene_changes(handle.read, handle.frame_count, handle.fps, scene_threshold, sample_count, frame_step)
+                if scene_key is not None:
+                    _cache_scenes(scene_key, [scene_frame for scene_frame, _, _ in scenes])
+                for j, (scene_frame, frame, _) in enumerate(scenes):
+                    if not slots.place_cached(first_slot + j, video_path, scene_frame):
+                        slots.add(first_slot + j, frame)
+                return fps, [(j, scene_frame) for j, (scene_frame, _, _) in enumerate(scenes)]
+
+            if frame_numbers is None:
+                frame_numbers = sample_frame_numbers(sampling, handle.frame_count, handle.fps, frame_number, sample_time, sample_percent, sample_count)
+                missing = [j for j, sample_frame in enumerate(frame_numbers) if not slots.place_cached(first_slot + j, video_path, sample_frame)]
+
+            # Ascending frame numbers, so the handle decodes forward and only seeks across keyframes
+            failed = set()
+            for j in missing:
+                frame = handle.read(frame_numbers[j])
+                if frame is None:
+                    failed.add(j)
+                    continue
+                slots.add(first_slot + j, frame)
+            return fps, [(j, sample_frame) for j, sample_frame in enumerate(frame_numbers) if j not in failed]
+        finally:
+            _capture_pool.release(video_path, handle)
+
+    def _extract_frame_from_video(self, video_path, frame_number, decode_backend="auto"):
+        """Extract a specific frame from a video file using a pooled decoder, as a BGR uint8 (h, w, 3) array"""
+        handle = None
+        try:
+            # Out-of-range frames are rejected from the cached index without opening the file
+            video_index = _video_metadata(os.path.basename(video_path))
+            if video_index is not None and frame_number >= video_index['frame_count']:
+                logger.warning(f"[I9 Video Extractor] Frame {frame_number} out of range (total: {video_index['frame_count']})")
+                return None
+
+            handle = _capture_pool.acquire(video_path, decode_backend, video_index)
+
+            if not handle.opened:
+                logger.warning(f"[I9 Video Extractor] Could not open video: {video_path}")
                 return None
 
-            # Convert BGR to RGB (OpenCV uses BGR by default)
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            # Validate frame number
+            if frame_number >= handle.frame_count:
+                logger.warning(f"[I9 Video Extractor] Frame {frame_number} out of range (total: {handle.frame_count})")
+                return None
 
-            # Convert to PIL Image for consistency with existing code
-            img = Image.fromarray(frame)
-            img_tensor = torch.from_numpy(np.array(img).astype(np.float32) / 255.0)
+            # Continues decoding from the last read position when possible, seeks otherwise
+            frame = handle.read(frame_number)
 
-            # Resize if needed
-            if img_tensor.shape[0] != target_height or img_tensor.shape[1] != target_width:
-                img_tensor = self._resize_image(img_tensor, target_width, target_height, resize_mode)
+            if frame is None:
+                logger.warning(f"[I9 Video Extractor] Could not read frame {frame_number}")
+                return None
 
-            return img_tensor
+            return frame
 
         except Exception as e:
-            print(f"[I9 Video Extractor] Exception extracting frame: {e}")
+            logger.warning(f"[I9 Video Extractor] Exception extracting frame: {e}")
             return None
-
-    def _resize_image(self, img_tensor, target_width, target_height, resize_mode):
-        if resize_mode == "Stretch":
-            return comfy.utils.common_upscale(img_tensor.movedim(-1, 0).unsqueeze(0), target_width, target_height, "bilinear", "disabled").squeeze(0).movedim(0, -1)
-        if resize_mode == "Center Crop":
-            return comfy.utils.common_upscale(img_tensor.movedim(-1, 0).unsqueeze(0), target_width, target_height, "bilinear", "center").squeeze(0).movedim(0, -1)
-        if resize_mode == "Letterbox":
-            scale = min(target_width / img_tensor.shape[1], target_height / img_tensor.shape[0])
-            new_w, new_h = int(img_tensor.shape[1] * scale), int(img_tensor.shape[0] * scale)
-            resized = comfy.utils.common_upscale(img_tensor.movedim(-1, 0).unsqueeze(0), new_w, new_h, "bilinear", "disabled").squeeze(0).movedim(0, -1)
-            canvas = torch.zeros((target_height, target_width, 3), dtype=torch.float32)
-            pad_top, pad_left = (target_height - new_h) // 2, (target_width - new_w) // 2
-            canvas[pad_top:pad_top+new_h, pad_left:pad_left+new_w, :] = resized
-            return canvas
-        return img_tensor
+        finally:
+            if handle is not None:
+                _capture_pool.release(video_path, handle)
 
     @classmethod
     def IS_CHANGED(cls, **kwargs):
         """Force update when pool contents change"""
-        input_dir = folder_paths.get_input_directory()
-        pool_dir = os.path.join(input_dir, "I9_VideoPool")
-
-        if not os.path.exists(pool_dir):
-            return "empty"
-
-        # Hash based on file list and modification times
-        files = sorted(os.listdir(pool_dir))
-        m = hashlib.sha256()
-        for f in files:
-            fpath = os.path.join(pool_dir, f)
-            if os.path.isfile(fpath):
-                m.update(f.encode())
-                m.update(str(os.path.getmtime(fpath)).encode())
-
-        return m.hexdigest()
+        if kwargs.get("mode") == "Distributed" or (kwargs.get("mode") == "Sequential" and kwargs.get("auto_advance")):
+            # Every execution claims or advances to a different video
+            return float("nan")
+        return _pool_index.generation()
 
 NODE_CLASS_MAPPINGS = {"I9_BatchVideoExtractor": I9_BatchVideoExtractor}
 NODE_DISPLAY_NAME_MAPPINGS = {"I9_BatchVideoExtractor": "🎬 I9 Batch Video Extractor"}
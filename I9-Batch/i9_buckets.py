@@ -0,0 +1,36 @@
+import math
+
+# Bucket sides are multiples of this, which keeps them divisible by the VAE/latent factors
+BUCKET_STEP = 64
+# Most elongated bucket allowed, as long side / short side
+BUCKET_MAX_ASPECT = 4.0
+
+
+def make_buckets(target_width, target_height, step=BUCKET_STEP, max_aspect=BUCKET_MAX_ASPECT):
+    """Aspect-ratio buckets holding at most target_width * target_height pixels, ordered tall to wide.
+
+    For each short side (a multiple of step) the long side is the largest
+    multiple of step that stays within the pixel budget, in both
+    orientations, so every bucket costs the sampler about the same as the
+    uniform target size.
+    """
+    budget = target_width * target_height
+    buckets = {(target_width, target_height)}
+    short = step
+    while short * short <= budget:
+        long = budget // short // step * step
+        if long >= short and long / short <= max_aspect:
+            buckets.update({(short, long), (long, short)})
+        short += step
+    return sorted(buckets, key=lambda bucket: bucket[0] / bucket[1])
+
+
+def assign_bucket(width, height, buckets):
+    """Bucket whose aspect ratio is closest to width x height (compared in log space, so 2:1 and 1:2 are symmetric)"""
+    aspect = math.log(width / height)
+    return min(buckets, key=lambda bucket: abs(math.log(bucket[0] / bucket[1]) - aspect))
+
+
+def bucket_label(width, height):
+    divisor = math.gcd(width, height)
+    return f"{width // divisor}:{height // divisor}"
@@ -0,0 +1,91 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("I9.cursor")
+
+DEFAULT_PREFETCH = 2
+
+
+class SequentialCursors:
+    """Server-side Sequential positions per node_id, plus background prefetch of the items after them.
+
+    advance() hands out the cursor's position and moves it on by one, wrapping
+    to the start of the pool (and counting a pass) at the end, so an
+    unattended queue of prompts walks the whole pool without anyone touching
+    batch_index. Prefetch jobs run on one background thread per pool and are
+    keyed by the item they warm. Jobs a node queued earlier for items it no
+    longer wants are dropped if they haven't started, so a seek or a fast queue
+    never decodes stale items; wait() lets the foreground pick up the job for
+    the item it needs now instead of decoding that item a second time.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._cursors = {}  # node_id -> {'position', 'passes'}
+        self._pending = {}  # node_id -> {item key: future of its queued or running prefetch job}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"i9_{name}_prefetch")
+        self._lock = threading.Lock()
+
+    def advance(self, node_id, total):
+        """Index to process now for node_id (0 <= index < total); the next call returns the following one"""
+        with self._lock:
+            cursor = self._cursors.setdefault(node_id, {'position': 0, 'passes': 0})
+            if cursor['position'] >= total:
+                cursor['position'] = 0
+                cursor['passes'] += 1
+            index = cursor['position']
+            cursor['position'] += 1
+            return index
+
+    def seek(self, node_id, position):
+        """Make position the next index node_id processes"""
+        if position < 0:
+            raise ValueError("position must be >= 0")
+        with self._lock:
+            self._cursors.setdefault(node_id, {'position': 0, 'passes': 0})['position'] = position
+
+    def reset(self, node_id=None):
+        """Rewind one node's cursor, or forget every cursor when node_id is None"""
+        with self._lock:
+            if node_id is None:
+                self._cursors.clear()
+            else:
+                self._cursors.pop(node_id, None)
+            for pending_id in (list(self._pending) if node_id is None else [node_id]):
+                for future in self._pending.pop(pending_id, {}).values():
+                    future.cancel()
+
+    def status(self):
+        with self._lock:
+            return {str(node_id): dict(cursor) for node_id, cursor in self._cursors.items()}
+
+    def prefetch(self, node_id, jobs):
+        """Run jobs ({item key: callable warming the caches}) in the background, replacing node_id's queued ones.
+
+        A job for a key that is still queued or running from an earlier call is kept, not submitted again.
+        """
+        with self._lock:
+            pending = {}
+            for key, future in self._pending.get(node_id, {}).items():
+                if key in jobs and not future.done():
+                    pending[key] = future
+                else:
+                    future.cancel()
+            for key, job in jobs.items():
+                if key not in pending:
+                    pending[key] = self._executor.submit(self._run, job)
+            self._pending[node_id] = pending
+
+    def wait(self, node_id, key):
+        """Let node_id's running prefetch job for key finish, so its result is in the caches; a queued one is dropped"""
+        with self._lock:
+            future = self._pending.get(node_id, {}).pop(key, None)
+        if future is not None and not future.cancel():
+            future.result()
+
+    def _run(self, job):
+        try:
+            job()
+        except Exception as e:
+            logger.warning(f"[I9 Prefetch] {self.name} prefetch failed: {e}")
@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import uuid
+import socket
+import logging
+import threading
+from contextlib import contextmanager
+from .i9_tensor_cache import get_cache_root
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger("I9.leases")
+
+LEASE_STATE_VERSION = 1
+DEFAULT_LEASE_TIMEOUT = 1800
+# Identifies this ComfyUI process among the workers sharing a pool; set I9_WORKER_ID for stable names
+WORKER_ID = os.environ.get("I9_WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+# Tells a restarted worker (same WORKER_ID) apart from the process that made its earlier claims
+_INSTANCE = uuid.uuid4().hex
+
+
+def lease_owner(node_id):
+    return f"{WORKER_ID}/{node_id}"
+
+
+def describe(summary):
+    return f"{summary['done']}/{summary['total']} done, {summary['claimed']} claimed, {summary['pending']} pending"
+
+
+@contextmanager
+def _file_lock(path):
+    """Exclusive lock on path that holds across processes and hosts sharing the directory.
+
+    POSIX record locks (lockf) are forwarded to the server on NFS/SMB mounts,
+    unlike flock; Windows uses msvcrt byte-range locks.
+    """
+    with open(path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.lockf(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass  # LK_LOCK gives up after ~10 s; keep waiting
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.lockf(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class LeaseStore:
+    """Claims on pool items shared by every ComfyUI worker that sees the same input directory.
+
+    The state (claims with their expiry, and finished items) is one JSON file
+    under I9_Cache/leases, read and rewritten under a file lock, so claiming the
+    next item is atomic across processes and machines. Expiry uses wall-clock
+    time, so worker clocks should be in sync.
+
+    A node doesn't see its prompt finish, so a claim counts as done when the
+    same node claims again: the previous prompt ran to completion before the
+    next one started. Processing is therefore at-least-once. The last item a
+    worker processes stays claimed until it runs the node once more (a run
+    that finds nothing left still finishes it); otherwise it is handed out
+    again once its timeout passes, like the claim of a crashed worker. A
+    worker restarted under the same I9_WORKER_ID gives up its earlier claim
+    right away instead of waiting for the timeout; the default WORKER_ID
+    includes the process id, so a restart without it looks like a new worker.
+    """
+
+    def __init__(self, pool_name):
+        self.pool_name = pool_name
+        # lockf locks belong to the process, so threads of one worker also need a local lock
+        self._lock = threading.Lock()
+
+    @property
+    def state_path(self):
+        return os.path.join(get_cache_root(), "leases", f"{self.pool_name}.json")
+
+    def claim(self, owner, files, timeout=DEFAULT_LEASE_TIMEOUT):
+        """Finish owner's previous claim and claim the first unclaimed, unfinished file.
+
+        Returns (filename or None when nothing is left, status summary); the
+        previous claim is finished either way.
+        """
+        with self._transaction() as state:
+            now = time.time()
+            claims, done = state['claims'], state['done']
+            for filename, lease in list(claims.items()):
+                if lease['owner'] == owner and lease.get('instance') == _INSTANCE:
+                    done[filename] = {'owner': owner, 'finished': now}
+                    del claims[filename]
+                elif lease['owner'] == owner:
+                    logger.warning(f"[I9 Leases] {owner} restarted before finishing {filename}, handing it out again")
+                    del claims[filename]
+                    state['reclaimed'] += 1
+                elif lease['expires'] <= now:
+                    logger.warning(f"[I9 Leases] Claim on {filename} by {lease['owner']} expired, handing it out again")
+                    del claims[filename]
+                    state['reclaimed'] += 1
+
+            claimed = None
+            for filename in files:
+                if filename not in done and filename not in claims:
+                    claims[filename] = {'owner': owner, 'instance': _INSTANCE, 'claimed': now, 'expires': now + timeout}
+                    claimed = filename
+                    break
+            return claimed, self._summary(state, files, now)
+
+    def status(self, files):
+        with self._transaction(write=False) as state:
+            return self._summary(state, files, time.time())
+
+    def reset(self):
+        """Forget every claim and finished item"""
+        with self._transaction() as state:
+            state.update(self._empty())
+
+    @staticmethod
+    def _empty():
+        return {'version': LEASE_STATE_VERSION, 'claims': {}, 'done': {}, 'reclaimed': 0}
+
+    @contextmanager
+    def _transaction(self, write=True):
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        with self._lock, _file_lock(f"{self.state_path}.lock"):
+            try:
+                with open(self.state_path) as f:
+                    state = json.load(f)
+                if state.get('version') != LEASE_STATE_VERSION:
+                    state = self._empty()
+            except FileNotFoundError:
+                state = self._empty()
+            except ValueError as e:
+                logger.warning(f"[I9 Leases] Ignoring unreadable lease file for {self.pool_name}: {e}")
+                state = self._empty()
+
+            yield state
+
+            if write:
+                tmp_path = f"{self.state_path}.{socket.gethostname()}-{os.getpid()}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, self.state_path)
+
+    @staticmethod
+    def _summary(state, files, now):
+        """Counts over the current pool listing; entries for files no longer in the pool are ignored"""
+        in_pool = set(files)
+        workers = {}
+        claimed = expired = done = 0
+        for filename, lease in state['claims'].items():
+            if filename not in in_pool:
+                continue
+            claimed += 1
+            worker = workers.setdefault(lease['owner'], {'claimed': [], 'done': 0})
+            worker['claimed'].append({'filename': filename, 'claimed': lease['claimed'], 'expires': lease['expires']})
+            if lease['expires'] <= now:
+                expired += 1
+        for filename, entry in state['done'].items():
+            if filename in in_pool:
+                done += 1
+                workers.setdefault(entry['owner'], {'claimed': [], 'done': 0})['done'] += 1
+        return {
+            'total': len(in_pool),
+            'done': done,
+            'claimed': claimed,
+            'expired': expired,
+            'pending': len(in_pool) - done - claimed,
+            'reclaimed': state['reclaimed'],
+            'workers': workers,
+        }
@@ -0,0 +1,110 @@
+import os
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+
+# Verbosity of every I9 logger ("I9.*"); per-run banners are DEBUG, per-batch summaries INFO
+LOG_LEVEL = os.environ.get("I9_LOG_LEVEL", "WARNING").upper()
+logging.getLogger("I9").setLevel(getattr(logging, LOG_LEVEL, logging.WARNING))
+
+# Upper bounds (seconds) of the span histogram buckets; the last bucket is +Inf
+SPAN_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(SPAN_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(SPAN_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Process-wide timing histograms and counters for the hot paths of both nodes.
+
+    Spans (list, decode, convert, resize, stack, seek, ...) and counters (bytes
+    read, images skipped, ...) are labelled with the node they belong to.
+    Recording is a dict lookup and a few additions under a lock, so it stays on
+    in production; /i9/metrics renders the aggregate as JSON or Prometheus text.
+    """
+
+    def __init__(self):
+        self._histograms = {}  # (span, node) -> _Histogram
+        self._counters = {}  # (name, node) -> value
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, node):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, node, time.perf_counter() - start)
+
+    def observe(self, name, node, seconds):
+        with self._lock:
+            histogram = self._histograms.get((name, node))
+            if histogram is None:
+                histogram = self._histograms[(name, node)] = _Histogram()
+            histogram.observe(seconds)
+
+    def count(self, name, node, value=1):
+        with self._lock:
+            self._counters[(name, node)] = self._counters.get((name, node), 0) + value
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def snapshot(self):
+        """JSON-friendly copy: spans with count/sum/mean/cumulative buckets, and counters"""
+        with self._lock:
+            spans = []
+            for (name, node), histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                buckets = {}
+                for bound, count in zip(SPAN_BUCKETS + (float('inf'),), histogram.counts):
+                    cumulative += count
+                    buckets['+Inf' if bound == float('inf') else str(bound)] = cumulative
+                spans.append({
+                    'span': name,
+                    'node': node,
+                    'count': histogram.count,
+                    'sum': histogram.sum,
+                    'mean': histogram.sum / histogram.count if histogram.count else 0.0,
+                    'buckets': buckets,
+                })
+            counters = [{'name': name, 'node': node, 'value': value} for (name, node), value in sorted(self._counters.items())]
+        return {'spans': spans, 'counters': counters}
+
+    def prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        data = self.snapshot()
+        lines = [
+            "# HELP i9_span_seconds Time spent in I9 node hot-path stages",
+            "# TYPE i9_span_seconds histogram",
+        ]
+        for span in data['spans']:
+            labels = f'span="{span["span"]}",node="{span["node"]}"'
+            for bound, count in span['buckets'].items():
+                lines.append(f'i9_span_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'i9_span_seconds_sum{{{labels}}} {span["sum"]}')
+            lines.append(f'i9_span_seconds_count{{{labels}}} {span["count"]}')
+
+        names = sorted({counter['name'] for counter in data['counters']})
+        for name in names:
+            lines.append(f"# TYPE i9_{name}_total counter")
+            for counter in data['counters']:
+                if counter['name'] == name:
+                    lines.append(f'i9_{name}_total{{node="{counter["node"]}"}} {counter["value"]}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
@@ -0,0 +1,256 @@
+import os
+import json
+import struct
+import logging
+import threading
+import numpy as np
+import torch
+from .i9_tensor_cache import get_cache_root
+
+logger = logging.getLogger("I9.pack")
+
+PACK_MAGIC = b"I9PACK01"
+PACK_VERSION = 1
+PACK_EXTENSION = ".i9pack"
+# Images decoded per step while (re)building, which bounds the staging memory
+PACK_BUILD_BATCH = 64
+_TRAILER = struct.Struct("<Q8s")  # index length, magic
+
+
+def get_pack_dir(pool_name):
+    return os.path.join(get_cache_root(), "packs", pool_name)
+
+
+def _read_index(path):
+    """The JSON index stored at the end of a pack file, or None if the file isn't a usable pack"""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            end = f.tell()
+            if end < _TRAILER.size:
+                return None
+            f.seek(end - _TRAILER.size)
+            length, magic = _TRAILER.unpack(f.read(_TRAILER.size))
+            if magic != PACK_MAGIC or length > end - _TRAILER.size:
+                return None
+            f.seek(end - _TRAILER.size - length)
+            index = json.loads(f.read(length))
+    except (OSError, ValueError) as e:
+        logger.warning(f"[I9 Pack] Ignoring unreadable pack {path}: {e}")
+        return None
+    return index if index.get('version') == PACK_VERSION else None
+
+
+class PoolPack:
+    """The pool resized to one (width, height, resize_mode), stored as uint8 rows in one memory-mapped file.
+
+    The file holds a (rows, height, width, 3) uint8 array from offset 0,
+    followed by a JSON index (filename/size/mtime -> row, plus images that
+    failed to decode) and a fixed trailer with the index length and magic.
+    Rows follow the sorted pool listing, so loading the whole pool or a chunk
+    of it is a slice of the map and the float conversion is the only copy.
+
+    update() rewrites the file when the pool changed, copying the rows of
+    unchanged images from the old map and decoding only new or modified ones.
+    """
+
+    def __init__(self, pool_name, target_width, target_height, resize_mode):
+        self.pool_name = pool_name
+        self.target_width = target_width
+        self.target_height = target_height
+        self.resize_mode = resize_mode
+        self._index = None
+        self._rows = None  # np.memmap, None for an empty pack
+        self._slots = {}  # filename -> row
+        self._generation = None
+        self._opened = False
+        self._lock = threading.Lock()
+
+    @property
+    def path(self):
+        mode = self.resize_mode.lower().replace(" ", "_")
+        return os.path.join(get_pack_dir(self.pool_name), f"{self.target_width}x{self.target_height}_{mode}{PACK_EXTENSION}")
+
+    def update(self, generation, entries, load_rows):
+        """Bring the pack in line with the pool entries (in pool order); returns True if the file was rewritten.
+
+        load_rows(filenames) returns (uint8 (n, height, width, 3) array, per-file
+        error or None). A generation equal to the last update's is a no-op, so
+        calling this before every load is cheap.
+        """
+        with self._lock:
+            if generation is not None and generation == self._generation:
+                return False
+            self._open()
+            current = self._index['entries'] + self._index['failed'] if self._index else []
+            if sorted(self._signature(e) for e in current) != sorted(self._signature(e) for e in entries):
+                self._rebuild(entries, load_rows)
+                rebuilt = True
+            else:
+                rebuilt = False
+            self._generation = generation
+            return rebuilt
+
+    def load(self, filenames):
+        """Float [0, 1] batch of filenames and a per-file error (None when loaded), like BatchResizer.flush()"""
+        with self._lock:
+            self._open()
+            rows = [self._slots.get(filename) for filename in filenames]
+            failed = {entry['filename']: entry['error'] for entry in self._index['failed']} if self._index else {}
+            errors = [None if row is not None else RuntimeError(failed.get(filename, "not in pack"))
+                      for filename, row in zip(filenames, rows)]
+
+            first = rows[0] if rows else None
+            if first is not None and rows == list(range(first, first + len(rows))):
+                # Zero-copy slice of the map; converting to float is the first copy
+                return torch.from_numpy(self._rows[first:first + len(rows)]).to(torch.float32).div_(255.0), errors
+
+            output = torch.zeros((len(filenames), self.target_height, self.target_width, 3), dtype=torch.float32)
+            for i, row in enumerate(rows):
+                if row is not None:
+                    output[i] = torch.from_numpy(self._rows[row]).to(torch.float32).div_(255.0)
+            return output, errors
+
+    def stats(self):
+        with self._lock:
+            self._open()
+            return self._stats(self.path, self._index)
+
+    def close(self):
+        with self._lock:
+            self._rows = None
+            self._index = None
+            self._slots = {}
+            self._generation = None
+            self._opened = False
+
+    @staticmethod
+    def _signature(entry):
+        return entry['filename'], entry['size'], entry['modified']
+
+    @staticmethod
+    def _stats(path, index):
+        return {
+            'path': path,
+            'width': index['width'] if index else None,
+            'height': index['height'] if index else None,
+            'resize_mode': index['resize_mode'] if index else None,
+            'images': len(index['entries']) if index else 0,
+            'failed': len(index['failed']) if index else 0,
+            'bytes': os.path.getsize(path) if index else 0,
+        }
+
+    def _open(self):
+        if self._opened:
+            return
+        self._opened = True
+        index = _read_index(self.path) if os.path.exists(self.path) else None
+        if index and (index['width'], index['height'], index['resize_mode']) != (self.target_width, self.target_height, self.resize_mode):
+            index = None
+        self._index = index
+        self._slots = {entry['filename']: entry['row'] for entry in index['entries']} if index else {}
+        # Copy-on-write mapping: writable for torch.from_numpy, never written back
+        self._rows = np.memmap(self.path, dtype=np.uint8, mode='c', shape=(index['rows'], self.target_height, self.target_width, 3)) if index and index['rows'] else None
+
+    def _rebuild(self, entries, load_rows):
+        old_rows = {self._signature(e): e['row'] for e in self._index['entries']} if self._index else {}
+        old_failed = {self._signature(e): e for e in self._index['failed']} if self._index else {}
+        # Images that failed before and haven't changed are not retried
+        failed = [old_failed[self._signature(e)] for e in entries if self._signature(e) in old_failed]
+        packed = [e for e in entries if self._signature(e) not in old_failed]
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.truncate(len(packed) * self.target_height * self.target_width * 3)
+        rows = np.memmap(tmp_path, dtype=np.uint8, mode='r+', shape=(len(packed), self.target_height, self.target_width, 3)) if packed else None
+
+        decode = []
+        for row, entry in enumerate(packed):
+            old_row = old_rows.get(self._signature(entry))
+            if old_row is not None:
+                rows[row] = self._rows[old_row]
+            else:
+                decode.append(row)
+
+        ok = [True] * len(packed)
+        for start in range(0, len(decode), PACK_BUILD_BATCH):
+            batch_rows = decode[start:start + PACK_BUILD_BATCH]
+            images, errors = load_rows([packed[row]['filename'] for row in batch_rows])
+            for i, (row, error) in enumerate(zip(batch_rows, errors)):
+                if error is None:
+                    rows[row] = images[i]
+                else:
+                    ok[row] = False
+                    failed.append({'filename': packed[row]['filename'], 'size': packed[row]['size'],
+                                   'modified': packed[row]['modified'], 'error': str(error)})
+        if rows is not None:
+            rows.flush()
+            del rows
+
+        index = {
+            'version': PACK_VERSION,
+            'width': self.target_width,
+            'height': self.target_height,
+            'resize_mode': self.resize_mode,
+            'rows': len(packed),
+            # Rows of images that failed mid-build stay allocated but unreferenced until the next rebuild
+            'entries': [{'filename': e['filename'], 'size': e['size'], 'modified': e['modified'], 'row': row}
+                        for row, e in enumerate(packed) if ok[row]],
+            'failed': failed,
+        }
+        data = json.dumps(index).encode()
+        with open(tmp_path, 'ab') as f:
+            f.write(data)
+            f.write(_TRAILER.pack(len(data), PACK_MAGIC))
+
+        # Drop the old map first: Windows can't replace a file that is still mapped
+        self._rows = None
+        os.replace(tmp_path, self.path)
+        self._opened = False
+        self._open()
+        logger.info(f"[I9 Pack] Packed {len(index['entries'])} images at {self.target_width}x{self.target_height} "
+                    f"({len(decode)} decoded, {len(packed) - len(decode)} reused, {len(failed)} failed)")
+
+
+_packs = {}
+_packs_lock = threading.Lock()
+
+
+def get_pack(pool_name, target_width, target_height, resize_mode):
+    """Shared PoolPack for a pool at one size and resize mode, one per process"""
+    key = (pool_name, target_width, target_height, resize_mode)
+    with _packs_lock:
+        pack = _packs.get(key)
+        if pack is None:
+            pack = _packs[key] = PoolPack(*key)
+        return pack
+
+
+def list_packs(pool_name):
+    """Stats of every pack file of the pool"""
+    pack_dir = get_pack_dir(pool_name)
+    if not os.path.isdir(pack_dir):
+        return []
+    packs = []
+    for filename in sorted(os.listdir(pack_dir)):
+        if filename.endswith(PACK_EXTENSION):
+            path = os.path.join(pack_dir, filename)
+            index = _read_index(path)
+            if index:
+                packs.append(PoolPack._stats(path, index))
+    return packs
+
+
+def remove_packs(pool_name):
+    """Close and delete every pack of the pool"""
+    with _packs_lock:
+        for key in [key for key in _packs if key[0] == pool_name]:
+            _packs.pop(key).close()
+    pack_dir = get_pack_dir(pool_name)
+    if os.path.isdir(pack_dir):
+        for filename in os.listdir(pack_dir):
+            try:
+                os.remove(os.path.join(pack_dir, filename))
+            except OSError:
+                pass
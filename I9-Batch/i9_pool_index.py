@@ -0,0 +1,322 @@
+import os
+import logging
+import json
+import time
+import threading
+from PIL import Image
+import folder_paths
+from .i9_tensor_cache import get_cache_root, file_sha256
+
+logger = logging.getLogger("I9.pool")
+
+IMAGE_POOL = "I9_ImagePool"
+VIDEO_POOL = "I9_VideoPool"
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.gif', '.bmp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm', '.flv', '.wmv', '.m4v')
+
+# Adding or removing a file bumps the directory mtime, which is one stat to check.
+# In-place overwrites don't: generation() stats the listed files for those, and
+# the other accessors pick them up with a full rescan at most this often.
+RESCAN_INTERVAL = 60.0
+MANIFEST_VERSION = 1
+# API sort keys for the /list routes mapped to entry fields
+SORT_KEYS = {'name': 'filename', 'mtime': 'modified', 'size': 'size'}
+
+
+class PoolIndex:
+    """In-memory index of a pool directory (filename -> size/mtime/dimensions).
+
+    The upload/delete/clear routes update it incrementally; external changes are
+    picked up by refresh(), which only rescans when the directory mtime moved or
+    RESCAN_INTERVAL elapsed. Every change bumps a generation counter that
+    IS_CHANGED returns instead of hashing the whole listing; generation() also
+    stats the listed files, so overwriting one in place changes it. The index is also
+    persisted as a JSON manifest under I9_Cache so dimensions survive restarts.
+    """
+
+    def __init__(self, pool_name, extensions):
+        self.pool_name = pool_name
+        self.extensions = extensions
+        self._entries = {}
+        self._sorted = None
+        self._views = {}
+        self._generation = 0
+        self._dir_mtime = None
+        self._last_scan = 0.0
+        self._loaded = False
+        self._dirty = False
+        self._lock = threading.RLock()
+
+    @property
+    def pool_dir(self):
+        return os.path.join(folder_paths.get_input_directory(), self.pool_name)
+
+    @property
+    def manifest_path(self):
+        return os.path.join(get_cache_root(), f"{self.pool_name}.manifest.json")
+
+    def generation(self):
+        """Cheap change token for IS_CHANGED.
+
+        Besides the directory mtime check of refresh(), every listed file is
+        stat'ed (no reads), so overwriting a file under the same name changes
+        the token too.
+        """
+        with self._lock:
+            self.refresh()
+            if self._overwritten():
+                self.refresh(force=True)
+            return f"{self.pool_name}:{self._generation}"
+
+    def files(self):
+        """Sorted filenames currently in the pool"""
+        with self._lock:
+            self.refresh()
+            if self._sorted is None:
+                self._sorted = sorted(self._entries)
+            return self._sorted
+
+    def entries(self):
+        """Copies of every entry as dicts with filename, size, modified and optional width/height"""
+        with self._lock:
+            self.refresh()
+            return [dict(entry) for entry in self._entries.values()]
+
+    def query(self, sort='mtime', descending=True, name_filter=None, offset=0, limit=None):
+        """One page of entries in the requested order, plus the total number of matches.
+
+        Sorted views are cached until the next change, so paging through a large
+        pool doesn't re-sort it on every request.
+        """
+        sort_field = SORT_KEYS.get(sort)
+        if sort_field is None:
+            raise ValueError(f"Unknown sort key: {sort}")
+
+        with self._lock:
+            self.refresh()
+            view = self._views.get((sort_field, descending))
+            if view is None:
+                view = sorted(self._entries.values(), key=lambda e: (e[sort_field], e['filename']), reverse=descending)
+                self._views[(sort_field, descending)] = view
+
+        if name_filter:
+            needle = name_filter.lower()
+            view = [entry for entry in view if needle in entry['filename'].lower()]
+
+        page = view[offset:offset + limit] if limit else view[offset:]
+        return [dict(entry) for entry in page], len(view)
+
+    def get(self, filename):
+        with self._lock:
+            entry = self._entries.get(filename)
+            return dict(entry) if entry else None
+
+    def dimensions(self, filename):
+        """(width, height) of a pool image read from its header, memoized in the index"""
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is None:
+                return None
+            if 'width' in entry:
+                return entry['width'], entry['height']
+        try:
+            with Image.open(os.path.join(self.pool_dir, filename)) as img:
+                width, height = img.size
+        except Exception:
+            return None
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is not None:
+                entry['width'], entry['height'] = width, height
+                self._dirty = True
+        return width, height
+
+    def update_entry(self, filename, **fields):
+        """Attach extra metadata (e.g. dimensions) to an existing entry"""
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is not None:
+                entry.update(fields)
+                self._dirty = True
+
+    def unique_name(self, filename):
+        """filename, or filename_N if it is taken; index lookups avoid probing the disk for every candidate"""
+        base, ext = os.path.splitext(filename)
+        counter = 1
+        candidate = filename
+        with self._lock:
+            self.refresh()
+            while candidate in self._entries or os.path.exists(os.path.join(self.pool_dir, candidate)):
+                candidate = f"{base}_{counter}{ext}"
+                counter += 1
+        return candidate
+
+    def claim(self, tmp_path, filename, **fields):
+        """Rename a finished upload into the pool under a unique name and record it.
+
+        Naming and renaming happen under the index lock so two concurrent uploads
+        of the same name can't both pick the same free name.
+        """
+        with self._lock:
+            final_filename = self.unique_name(filename)
+            os.replace(tmp_path, os.path.join(self.pool_dir, final_filename))
+            self.add(final_filename, **fields)
+        return final_filename
+
+    def find_duplicate(self, size, digest):
+        """Name of a pool file with this SHA-256, or None.
+
+        Only files of the same size are compared; files that were not uploaded
+        through the routes get hashed on first comparison and remember it.
+        """
+        with self._lock:
+            self.refresh()
+            candidates = [(name, entry.get('sha256')) for name, entry in self._entries.items() if entry['size'] == size]
+
+        for name, known in candidates:
+            path = os.path.join(self.pool_dir, name)
+            if known is None:
+                try:
+                    known = file_sha256(path)
+                except OSError:
+                    continue
+                self.update_entry(name, sha256=known)
+            if known == digest and os.path.isfile(path):
+                return name
+        return None
+
+    def add(self, filename, **fields):
+        """Record a file written by an upload route"""
+        if not filename.lower().endswith(self.extensions):
+            return
+        stat = os.stat(os.path.join(self.pool_dir, filename))
+        with self._lock:
+            self._load()
+            self._entries[filename] = {'filename': filename, 'size': stat.st_size, 'modified': stat.st_mtime, **fields}
+            self._changed()
+            self._sync_dir_mtime()
+
+    def remove(self, filename):
+        """Forget a file removed by the delete route"""
+        with self._lock:
+            self._load()
+            if self._entries.pop(filename, None) is not None:
+                self._changed()
+            self._sync_dir_mtime()
+
+    def clear(self):
+        with self._lock:
+            self._loaded = True
+            if self._entries:
+                self._entries.clear()
+                self._changed()
+            self._sync_dir_mtime()
+            self.save()
+
+    def refresh(self, force=False):
+        """Rescan the directory if it changed behind the index's back"""
+        with self._lock:
+            self._load()
+            try:
+                dir_mtime = os.stat(self.pool_dir).st_mtime_ns
+            except FileNotFoundError:
+                if self._entries:
+                    self._entries.clear()
+                    self._changed()
+                self._dir_mtime = None
+                return
+
+            now = time.monotonic()
+            if not force and dir_mtime == self._dir_mtime and now - self._last_scan < RESCAN_INTERVAL:
+                return
+
+            entries = {}
+            with os.scandir(self.pool_dir) as it:
+                for dir_entry in it:
+                    if not dir_entry.name.lower().endswith(self.extensions) or not dir_entry.is_file():
+                        continue
+                    stat = dir_entry.stat()
+                    old = self._entries.get(dir_entry.name)
+                    if old and old['size'] == stat.st_size and old['modified'] == stat.st_mtime:
+                        entries[dir_entry.name] = old
+                    else:
+                        entries[dir_entry.name] = {'filename': dir_entry.name, 'size': stat.st_size, 'modified': stat.st_mtime}
+
+            if entries != self._entries:
+                self._entries = entries
+                self._changed()
+            self._dir_mtime = dir_mtime
+            self._last_scan = now
+            self.save()
+
+    def save(self):
+        """Write the manifest if anything changed since the last save"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                'version': MANIFEST_VERSION,
+                'generation': self._generation,
+                'entries': list(self._entries.values()),
+            }
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+            tmp_path = f"{self.manifest_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.manifest_path)
+        except Exception as e:
+            logger.warning(f"[I9 Pool Index] Could not write manifest for {self.pool_name}: {e}")
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.manifest_path) as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self._entries = {entry['filename']: entry for entry in data['entries']}
+                self._generation = data.get('generation', 0)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"[I9 Pool Index] Ignoring unreadable manifest for {self.pool_name}: {e}")
+
+    def _overwritten(self):
+        """True if a listed file's size or mtime no longer matches its entry"""
+        for filename, entry in self._entries.items():
+            try:
+                stat = os.stat(os.path.join(self.pool_dir, filename))
+            except OSError:
+                return True
+            if stat.st_size != entry['size'] or stat.st_mtime != entry['modified']:
+                return True
+        return False
+
+    def _changed(self):
+        self._generation += 1
+        self._sorted = None
+        self._views = {}
+        self._dirty = True
+
+    def _sync_dir_mtime(self):
+        # Our own writes move the directory mtime too; don't rescan for them
+        try:
+            self._dir_mtime = os.stat(self.pool_dir).st_mtime_ns
+        except FileNotFoundError:
+            self._dir_mtime = None
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_pool_index(pool_name, extensions):
+    """Shared PoolIndex for a pool, one per process"""
+    with _indexes_lock:
+        index = _indexes.get(pool_name)
+        if index is None:
+            index = _indexes[pool_name] = PoolIndex(pool_name, extensions)
+        return index
@@ -0,0 +1,191 @@
+import math
+import threading
+import torch
+import torch.nn.functional as F
+from .i9_metrics import metrics
+
+RESIZE_MODES = ["Center Crop", "Letterbox", "Stretch", "Fit to Largest"]
+# Same-resolution images waiting before they are resized together in one interpolate call on a
+# GPU; on the CPU the kernel's cost is per pixel, so each image is resized as soon as it arrives
+RESIZE_GROUP_SIZE = 16
+# uint8 -> float32 conversion of the finished batch runs in steps of this many values
+FLOAT_CONVERT_CHUNK = 1 << 22
+# Decoder-level downscaling (JPEG draft) keeps at least this many source pixels per output
+# pixel along each axis, so the final bilinear resize still samples real detail
+DRAFT_OVERSAMPLE = 2.0
+
+
+def get_resize_device():
+    """ComfyUI's torch device when one is available, CPU otherwise (e.g. outside ComfyUI)"""
+    try:
+        import comfy.model_management
+        return comfy.model_management.get_torch_device()
+    except Exception:
+        return torch.device("cpu")
+
+
+def center_crop_box(src_width, src_height, target_width, target_height):
+    """(x, y) margins of the crop box common_upscale(..., "center") uses"""
+    old_aspect, new_aspect = src_width / src_height, target_width / target_height
+    x = y = 0
+    if old_aspect > new_aspect:
+        x = round((src_width - src_width * (new_aspect / old_aspect)) / 2)
+    elif old_aspect < new_aspect:
+        y = round((src_height - src_height * (old_aspect / new_aspect)) / 2)
+    return x, y
+
+
+def draft_size(src_width, src_height, target_width, target_height, resize_mode):
+    """Smallest decode size that still resizes to the target within tolerance, or None to decode in full.
+
+    The result is meant for PIL's Image.draft(), which picks the largest JPEG
+    DCT scale (1/2, 1/4, 1/8) whose output is still at least this big.
+    """
+    if resize_mode == "Letterbox":
+        scale = min(target_width / src_width, target_height / src_height)
+    elif resize_mode in ("Center Crop", "Stretch"):
+        # Center Crop keeps the full scale along the tighter axis; Stretch needs both axes
+        scale = max(target_width / src_width, target_height / src_height)
+    else:
+        return None
+    scale *= DRAFT_OVERSAMPLE
+    if scale >= 0.5:
+        return None
+    return math.ceil(src_width * scale), math.ceil(src_height * scale)
+
+
+def fit_to_largest_size(sizes):
+    """Target (width, height) for "Fit to Largest": the largest source by area"""
+    return max(sizes, key=lambda size: size[0] * size[1])
+
+
+def to_uint8(image):
+    """Quantize a float [0, 1] image back to uint8 (for caching)"""
+    return image.mul(255.0).round_().to(torch.uint8)
+
+
+class BatchResizer:
+    """Resizes uint8 images into one preallocated (N, H, W, 3) batch, converted to float32 once at the end.
+
+    Decode threads add() uint8 (h, w, 3) images as they finish. On a GPU,
+    images with the same source resolution are stacked and resized by a single
+    batched interpolate call as soon as RESIZE_GROUP_SIZE of them are waiting;
+    flush() resizes whatever is left. On the CPU the group size defaults to 1:
+    batching saves nothing there and stacking would copy and hold full-size
+    sources. On the CPU, interpolate runs on the uint8 data
+    directly; other devices get the stacked uint8 group, resize in float and
+    hand back uint8. Results are written straight into their slots.
+
+    The uint8 slots live in the last quarter of the float32 output's own
+    storage. flush() converts them front to back in FLOAT_CONVERT_CHUNK steps:
+    a float written at element i only overwrites bytes of elements <= i, which
+    have already been read, so the batch never needs more than its float32
+    size plus one step.
+
+    Letterbox and "Fit to Largest" (letterboxed into the largest source size)
+    draw on zeroed slots, which are the one padding canvas for the whole batch.
+    """
+
+    def __init__(self, count, target_width, target_height, resize_mode, bgr=False, device=None, group_size=None, on_resized=None, node="image"):
+        self.target_width = target_width
+        self.target_height = target_height
+        self.resize_mode = resize_mode
+        self.letterbox = resize_mode in ("Letterbox", "Fit to Largest")
+        self.bgr = bgr
+        self.device = device if device is not None else get_resize_device()
+        self.group_size = group_size or (1 if self.device.type == "cpu" else RESIZE_GROUP_SIZE)
+        self.on_resized = on_resized
+        self.node = node  # metrics label
+
+        shape = (count, target_height, target_width, 3)
+        values = count * target_height * target_width * 3
+        self._storage = torch.empty(values, dtype=torch.float32)
+        self.pixels = self._storage.view(torch.uint8)[3 * values:].view(shape)
+        if self.letterbox:
+            self.pixels.zero_()
+        self._shape = shape
+        self._groups = {}  # (h, w) -> [(index, uint8 image)]
+        self._lock = threading.Lock()
+
+    def add(self, index, image):
+        """Queue a uint8 (h, w, 3) image for slot index, resizing its group once it is full"""
+        image = torch.as_tensor(image)
+        key = tuple(image.shape[:2])
+        with self._lock:
+            group = self._groups.setdefault(key, [])
+            group.append((index, image))
+            if len(group) < self.group_size:
+                return
+            del self._groups[key]
+        self._resize_group(group)
+
+    def put_resized(self, index, image):
+        """Place an image that is already at the target size (e.g. a cache hit)"""
+        self.pixels[index].copy_(image if image.dtype == torch.uint8 else to_uint8(image))
+
+    def flush(self, as_float=True):
+        """Resize every queued image and return the batch: float32 in [0, 1], or the uint8 slots.
+
+        Call it once; the float conversion reuses the uint8 slots' memory.
+        """
+        with self._lock:
+            groups = list(self._groups.values())
+            self._groups.clear()
+        for group in groups:
+            self._resize_group(group)
+        if not as_float:
+            return self.pixels
+
+        with metrics.span("convert", self.node):
+            source = self.pixels.view(-1)
+            for start in range(0, self._storage.numel(), FLOAT_CONVERT_CHUNK):
+                end = min(start + FLOAT_CONVERT_CHUNK, self._storage.numel())
+                # Read the step before writing it: its float bytes overlap its own uint8 bytes
+                self._storage[start:end].copy_(source[start:end].clone()).div_(255.0)
+        return self._storage.view(self._shape)
+
+    def _resize_group(self, group):
+        indices = [index for index, _ in group]
+        if len(group) == 1:
+            batch = group[0][1].unsqueeze(0)
+        else:
+            with metrics.span("stack", self.node):
+                batch = torch.stack([image for _, image in group])
+        src_height, src_width = batch.shape[1:3]
+
+        if self.bgr:
+            batch = batch.flip(-1)
+
+        if self.resize_mode == "Center Crop":
+            x, y = center_crop_box(src_width, src_height, self.target_width, self.target_height)
+            batch = batch[:, y:src_height - y, x:src_width - x]
+
+        if self.letterbox:
+            scale = min(self.target_width / src_width, self.target_height / src_height)
+            new_width, new_height = max(1, int(src_width * scale)), max(1, int(src_height * scale))
+            top, left = (self.target_height - new_height) // 2, (self.target_width - new_width) // 2
+        else:
+            new_width, new_height = self.target_width, self.target_height
+            top = left = 0
+
+        if batch.shape[1] == new_height and batch.shape[2] == new_width:
+            resized = batch
+        else:
+            with metrics.span("resize", self.node):
+                # NHWC viewed as channels-last NCHW: no transpose copy, and the layout
+                # torch's vectorized uint8 bilinear kernel works on. Plain (not antialiased)
+                # bilinear, the filter common_upscale applies, so batches match the stock nodes
+                pixels = batch.permute(0, 3, 1, 2).contiguous(memory_format=torch.channels_last)
+                if self.device.type == "cpu":
+                    pixels = F.interpolate(pixels, size=(new_height, new_width), mode="bilinear", align_corners=False)
+                else:
+                    pixels = pixels.to(self.device).to(torch.float32)
+                    pixels = F.interpolate(pixels, size=(new_height, new_width), mode="bilinear", align_corners=False)
+                    pixels = pixels.round_().clamp_(0, 255).to(torch.uint8).cpu()
+                resized = pixels.permute(0, 2, 3, 1)
+
+        self.pixels[indices, top:top + new_height, left:left + new_width] = resized
+
+        if self.on_resized is not None:
+            for index in indices:
+                self.on_resized(index, self.pixels[index])
@@ -0,0 +1,212 @@
+import os
+import logging
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import torch
+import folder_paths
+
+logger = logging.getLogger("I9.cache")
+
+# Cache root lives next to the pools so it survives ComfyUI restarts
+# (the ComfyUI temp directory is wiped on startup)
+CACHE_DIR_NAME = "I9_Cache"
+DEFAULT_MEMORY_BUDGET = 2 * 1024 * 1024 * 1024  # 2 GB
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def get_cache_root():
+    return os.path.join(folder_paths.get_input_directory(), CACHE_DIR_NAME)
+
+
+def file_sha256(path):
+    m = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            m.update(chunk)
+    return m.hexdigest()
+
+
+class TensorCache:
+    """Content-addressed LRU cache for processed image tensors.
+
+    Keys are built from the file's SHA-256 plus the processing parameters, so
+    identical files share entries and a re-uploaded file (new size/mtime) is
+    re-hashed and misses automatically. The memory tier is bounded by a byte
+    budget; the optional disk tier stores .npy files under I9_Cache, or
+    compressed .npz files when compress is set.
+
+    With hash_content=False files are identified by path, size and mtime_ns
+    instead of their SHA-256: one stat instead of reading the whole file,
+    for multi-GB sources where hashing would cost more than the cache saves.
+    """
+
+    def __init__(self, name, max_bytes=DEFAULT_MEMORY_BUDGET, compress=False, hash_content=True):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.hash_content = hash_content
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._digests = {}  # path -> (size, mtime, digest)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def disk_dir(self):
+        return os.path.join(get_cache_root(), self.name)
+
+    def file_digest(self, path):
+        """SHA-256 of the file (or of its path/size/mtime_ns, see hash_content), memoized on the same size/mtime IS_CHANGED reads"""
+        stat = os.stat(path)
+        with self._lock:
+            cached = self._digests.get(path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime:
+            return cached[2]
+
+        if self.hash_content:
+            digest = file_sha256(path)
+        else:
+            digest = hashlib.sha256(f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}".encode()).hexdigest()
+
+        with self._lock:
+            stale = self._digests.get(path)
+            self._digests[path] = (stat.st_size, stat.st_mtime, digest)
+        if stale and stale[2] != digest:
+            self._drop_digest(stale[2])
+        return digest
+
+    def set_max_bytes(self, max_bytes):
+        """Change the memory budget, evicting least recently used entries if it shrank"""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def make_key(self, path, *params):
+        suffix = "_".join(str(p).replace(" ", "").replace(os.sep, "") for p in params)
+        return f"{self.file_digest(path)}_{suffix}"
+
+    def get(self, key, use_disk=False):
+        with self._lock:
+            tensor = self._entries.get(key)
+            if tensor is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return tensor
+
+        if use_disk:
+            disk_path = self._disk_path(key)
+            if os.path.exists(disk_path):
+                try:
+                    tensor = torch.from_numpy(self._load_file(disk_path))
+                    with self._lock:
+                        self.disk_hits += 1
+                    self._insert(key, tensor)
+                    return tensor
+                except Exception as e:
+                    logger.warning(f"[I9 Cache] Discarding unreadable cache file {disk_path}: {e}")
+                    self._remove_file(disk_path)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, tensor, use_disk=False):
+        tensor = tensor.contiguous()
+        self._insert(key, tensor)
+
+        if use_disk:
+            disk_path = self._disk_path(key)
+            if not os.path.exists(disk_path):
+                os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+                tmp_path = f"{disk_path}.{threading.get_ident()}.tmp"
+                try:
+                    with open(tmp_path, 'wb') as f:
+                        if self.compress:
+                            np.savez_compressed(f, tensor=tensor.numpy())
+                        else:
+                            np.save(f, tensor.numpy())
+                    os.replace(tmp_path, disk_path)
+                except Exception as e:
+                    logger.warning(f"[I9 Cache] Could not write {disk_path}: {e}")
+                    self._remove_file(tmp_path)
+
+    def invalidate_path(self, path):
+        """Drop every entry derived from the file at path (delete/re-upload)"""
+        with self._lock:
+            cached = self._digests.pop(path, None)
+        if cached:
+            self._drop_digest(cached[2], disk=True)
+
+    def clear(self, disk=False):
+        with self._lock:
+            self._entries.clear()
+            self._digests.clear()
+            self._bytes = 0
+        if disk and os.path.isdir(self.disk_dir):
+            for root, _, files in os.walk(self.disk_dir):
+                for filename in files:
+                    self._remove_file(os.path.join(root, filename))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+            }
+
+    def _insert(self, key, tensor):
+        size = tensor.element_size() * tensor.nelement()
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.element_size() * old.nelement()
+            self._entries[key] = tensor
+            self._bytes += size
+            self._evict()
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.element_size() * evicted.nelement()
+
+    def _drop_digest(self, digest, disk=False):
+        prefix = f"{digest}_"
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                evicted = self._entries.pop(key)
+                self._bytes -= evicted.element_size() * evicted.nelement()
+        if disk:
+            shard_dir = os.path.join(self.disk_dir, digest[:2])
+            if os.path.isdir(shard_dir):
+                for filename in os.listdir(shard_dir):
+                    if filename.startswith(prefix):
+                        self._remove_file(os.path.join(shard_dir, filename))
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.npz" if self.compress else f"{key}.npy")
+
+    def _load_file(self, disk_path):
+        if self.compress:
+            with np.load(disk_path) as data:
+                return data['tensor']
+        return np.load(disk_path)
+
+    @staticmethod
+    def _remove_file(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,116 @@
+import os
+import asyncio
+from email.utils import formatdate
+from PIL import Image
+from aiohttp import web
+from .i9_tensor_cache import get_cache_root
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+THUMB_SIZE = 256
+THUMB_QUALITY = 80
+
+
+def get_thumbnail_path(pool_name, filename):
+    return os.path.join(get_cache_root(), "thumbs", pool_name, f"{filename}.webp")
+
+
+def remove_thumbnail(pool_name, filename=None):
+    """Remove one cached thumbnail, or every thumbnail of the pool when filename is None"""
+    if filename is not None:
+        paths = [get_thumbnail_path(pool_name, filename)]
+    else:
+        thumb_dir = os.path.join(get_cache_root(), "thumbs", pool_name)
+        paths = [os.path.join(thumb_dir, f) for f in os.listdir(thumb_dir)] if os.path.isdir(thumb_dir) else []
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _is_fresh(src_path, thumb_path):
+    return os.path.exists(thumb_path) and os.path.getmtime(thumb_path) >= os.path.getmtime(src_path)
+
+
+def _save_thumbnail(img, thumb_path):
+    img.thumbnail((THUMB_SIZE, THUMB_SIZE), Image.BILINEAR)
+    os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+    tmp_path = f"{thumb_path}.{os.getpid()}.{id(img)}.tmp"
+    try:
+        img.save(tmp_path, "WEBP", quality=THUMB_QUALITY)
+        os.replace(tmp_path, thumb_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def ensure_image_thumbnail(src_path, thumb_path):
+    """Generate a small WebP thumbnail for a pool image unless an up-to-date one exists"""
+    if _is_fresh(src_path, thumb_path):
+        return thumb_path
+    with Image.open(src_path) as img:
+        # Let the JPEG decoder skip straight to a reduced scale
+        img.draft('RGB', (THUMB_SIZE, THUMB_SIZE))
+        _save_thumbnail(img.convert('RGB'), thumb_path)
+    return thumb_path
+
+
+def ensure_video_thumbnail(src_path, thumb_path):
+    """Generate a WebP poster frame (10% into the video) unless an up-to-date one exists"""
+    if _is_fresh(src_path, thumb_path):
+        return thumb_path
+    if cv2 is None:
+        raise RuntimeError("opencv-python not installed")
+
+    cap = cv2.VideoCapture(src_path)
+    try:
+        if not cap.isOpened():
+            raise RuntimeError(f"Could not open video: {src_path}")
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if frame_count > 10:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_count // 10)
+        ret, frame = cap.read()
+        if not ret or frame is None:
+            raise RuntimeError(f"Could not read poster frame: {src_path}")
+    finally:
+        cap.release()
+
+    _save_thumbnail(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)), thumb_path)
+    return thumb_path
+
+
+async def serve_thumbnail(request, pool_dir, pool_name, generate):
+    """Serve a cached thumbnail with ETag/Last-Modified, generating it off the event loop if needed"""
+    filename = request.query.get('filename')
+    if not filename or os.path.basename(filename) != filename:
+        return web.json_response({'success': False, 'error': 'Invalid filename'}, status=400)
+
+    src_path = os.path.join(pool_dir, filename)
+    if not os.path.isfile(src_path):
+        return web.json_response({'success': False, 'error': 'File not found'}, status=404)
+
+    thumb_path = get_thumbnail_path(pool_name, filename)
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, generate, src_path, thumb_path)
+
+    stat = os.stat(thumb_path)
+    etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    headers = {
+        'ETag': etag,
+        'Last-Modified': formatdate(stat.st_mtime, usegmt=True),
+        'Cache-Control': 'public, max-age=86400',
+    }
+    if request.headers.get('If-None-Match') == etag:
+        return web.Response(status=304, headers=headers)
+
+    body = await loop.run_in_executor(None, _read_file, thumb_path)
+    return web.Response(body=body, content_type='image/webp', headers=headers)
+
+
+def _read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
@@ -0,0 +1,347 @@
+import os
+import logging
+import re
+import json
+import time
+import uuid
+import shutil
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .i9_tensor_cache import get_cache_root, file_sha256
+
+logger = logging.getLogger("I9.upload")
+
+# Prefix for in-flight uploads, which are written under I9_Cache/staging rather than
+# the pool: chunk writes would otherwise keep moving the pool's directory mtime
+TEMP_PREFIX = ".i9_upload_"
+STAGING_DIR_NAME = "staging"
+# In-flight files untouched for this long are leftovers of a crash or a dropped connection
+STALE_STAGING_SECONDS = 24 * 3600
+# Largest multipart read per step; aiohttp's 8 KiB default would cost an executor round trip per 8 KiB
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Validation and thumbnailing after an upload; kept small so it never competes with prompts
+_post_upload_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="i9_post_upload")
+
+# Resumable uploads: default chunk size suggested to clients, and how long unfinished uploads are kept
+RESUMABLE_CHUNK_SIZE = 8 * 1024 * 1024
+STALE_UPLOAD_SECONDS = 7 * 24 * 3600
+UPLOAD_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+async def receive_upload(field, pool_index, post_process=None):
+    """Stream one multipart file field into the pool, hashing it on the way.
+
+    The bytes go to a temporary file in the staging directory first. If the pool already holds a file with
+    the same SHA-256 the temporary file is dropped and the existing filename is
+    returned as an alias, so re-uploading an asset set doesn't duplicate it on
+    disk or in every later batch load. Otherwise the file is atomically renamed
+    into place under a unique name.
+
+    Hashing and all file I/O run on the default executor so a multi-GB upload
+    doesn't stall the PromptServer event loop; hashing and writing one chunk
+    overlap the network read of the next. post_process(filename) is scheduled in the background for new
+    files (validation, thumbnails).
+    """
+    loop = asyncio.get_running_loop()
+    filename = os.path.basename(field.filename)
+    tmp_path = await loop.run_in_executor(None, staging_path)
+
+    m = hashlib.sha256()
+    size = 0
+    f = await loop.run_in_executor(None, open, tmp_path, 'wb')
+
+    def consume(chunk):
+        m.update(chunk)
+        f.write(chunk)
+
+    try:
+        try:
+            pending_write = None
+            while True:
+                chunk = await field.read_chunk(UPLOAD_CHUNK_SIZE)
+                if pending_write is not None:
+                    await pending_write
+                    pending_write = None
+                if not chunk:
+                    break
+                size += len(chunk)
+                pending_write = loop.run_in_executor(None, consume, chunk)
+        finally:
+            if pending_write is not None:
+                await asyncio.gather(pending_write, return_exceptions=True)
+            await loop.run_in_executor(None, f.close)
+
+        digest = m.hexdigest()
+        return await loop.run_in_executor(None, store_upload, pool_index, tmp_path, filename, size, digest, post_process)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+_staging_cleaned = False
+
+
+def staging_path():
+    """Fresh path for an incoming file under I9_Cache/staging (next to the pools, so the final rename is cheap)"""
+    global _staging_cleaned
+    staging_dir = os.path.join(get_cache_root(), STAGING_DIR_NAME)
+    os.makedirs(staging_dir, exist_ok=True)
+    if not _staging_cleaned:
+        _staging_cleaned = True
+        cutoff = time.time() - STALE_STAGING_SECONDS
+        for entry in os.scandir(staging_dir):
+            try:
+                if entry.name.startswith(TEMP_PREFIX) and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+    return os.path.join(staging_dir, f"{TEMP_PREFIX}{uuid.uuid4().hex}.part")
+
+
+def _move_to_pool_filesystem(tmp_path, pool_dir):
+    """tmp_path, or a copy of it in pool_dir when the pool lives on another filesystem (e.g. a symlinked pool),
+    so that the claim stays a single rename"""
+    if os.stat(tmp_path).st_dev == os.stat(pool_dir).st_dev:
+        return tmp_path
+    local_path = os.path.join(pool_dir, os.path.basename(tmp_path))
+    try:
+        shutil.copyfile(tmp_path, local_path)
+    except BaseException:
+        if os.path.exists(local_path):
+            os.remove(local_path)
+        raise
+    os.remove(tmp_path)
+    return local_path
+
+
+def store_upload(pool_index, tmp_path, filename, size, digest, post_process=None):
+    """Move a fully received temp file into the pool, or drop it if the content is already there"""
+    duplicate = pool_index.find_duplicate(size, digest)
+    if duplicate is not None:
+        os.remove(tmp_path)
+        return {
+            'filename': duplicate,
+            'original_name': filename,
+            'path': os.path.join(pool_index.pool_dir, duplicate),
+            'deduplicated': True
+        }
+
+    os.makedirs(pool_index.pool_dir, exist_ok=True)
+    tmp_path = _move_to_pool_filesystem(tmp_path, pool_index.pool_dir)
+    final_filename = pool_index.claim(tmp_path, filename, sha256=digest)
+    if post_process is not None:
+        schedule_post_upload(post_process, final_filename)
+
+    return {
+        'filename': final_filename,
+        'original_name': filename,
+        'path': os.path.join(pool_index.pool_dir, final_filename),
+        'deduplicated': False
+    }
+
+
+def schedule_post_upload(post_process, filename):
+    """Run post_process(filename) on the background executor, logging failures"""
+    def report(future):
+        error = future.exception()
+        if error is not None:
+            logger.warning(f"[I9 Upload] Post-upload processing failed for {filename}: {error}")
+
+    _post_upload_executor.submit(post_process, filename).add_done_callback(report)
+
+
+class ResumableUploads:
+    """Chunked, resumable uploads whose partial state survives dropped connections and restarts.
+
+    Each upload keeps a preallocated .part file and a JSON state file under
+    I9_Cache/uploads/<name>. Clients PUT byte ranges in any order (and in
+    parallel); a range is only recorded after its bytes are flushed to disk and,
+    if the client sent one, its per-chunk SHA-256 matched. Finalize checks that
+    the whole file arrived, verifies the full SHA-256 and moves the file into the
+    pool through the same dedup path as regular uploads.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+
+    @property
+    def state_dir(self):
+        return os.path.join(get_cache_root(), "uploads", self.name)
+
+    def init(self, filename, size, fingerprint=None):
+        """Start an upload, or return the unfinished one with the same fingerprint so it can resume"""
+        filename = os.path.basename(filename or "")
+        if not filename or size < 0:
+            raise ValueError("filename and size are required")
+
+        os.makedirs(self.state_dir, exist_ok=True)
+        with self._lock:
+            self._remove_stale()
+            if fingerprint:
+                for state in self._states():
+                    if state['fingerprint'] == fingerprint and state['size'] == size:
+                        return self._public(state)
+
+            state = {
+                'upload_id': uuid.uuid4().hex,
+                'filename': filename,
+                'size': size,
+                'fingerprint': fingerprint,
+                'ranges': [],
+                'created': time.time(),
+            }
+            with open(self._part_path(state['upload_id']), 'wb') as f:
+                f.truncate(size)
+            self._save(state)
+            return self._public(state)
+
+    def status(self, upload_id):
+        with self._lock:
+            return self._public(self._load(upload_id))
+
+    def open_range(self, upload_id, offset, length):
+        """Open the .part file positioned at offset, after validating the range"""
+        with self._lock:
+            state = self._load(upload_id)
+        if offset < 0 or length < 0 or offset + length > state['size']:
+            raise ValueError(f"Range {offset}+{length} outside upload of {state['size']} bytes")
+        f = open(self._part_path(upload_id), 'r+b')
+        f.seek(offset)
+        return f
+
+    def commit_range(self, upload_id, start, end):
+        """Record [start, end) as durably received"""
+        with self._lock:
+            state = self._load(upload_id)
+            ranges = sorted(state['ranges'] + [[start, end]])
+            merged = []
+            for range_start, range_end in ranges:
+                if merged and range_start <= merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], range_end)
+                else:
+                    merged.append([range_start, range_end])
+            state['ranges'] = merged
+            self._save(state)
+            return self._public(state)
+
+    def finalize(self, upload_id, pool_index, expected_sha256=None, post_process=None):
+        """Verify a complete upload and move it into the pool"""
+        with self._lock:
+            state = self._load(upload_id)
+        if self._committed(state) < state['size']:
+            raise ValueError(f"Upload incomplete: {self._committed(state)} of {state['size']} bytes received")
+
+        part_path = self._part_path(upload_id)
+        digest = file_sha256(part_path)
+        if expected_sha256 and expected_sha256.lower() != digest:
+            raise ValueError(f"Checksum mismatch: expected {expected_sha256}, got {digest}")
+
+        result = store_upload(pool_index, part_path, state['filename'], state['size'], digest, post_process)
+        result['sha256'] = digest
+        self.abort(upload_id)
+        return result
+
+    def abort(self, upload_id):
+        self._check_id(upload_id)
+        for path in (self._part_path(upload_id), self._state_path(upload_id)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _states(self):
+        for filename in os.listdir(self.state_dir):
+            if filename.endswith('.json'):
+                try:
+                    with open(os.path.join(self.state_dir, filename)) as f:
+                        yield json.load(f)
+                except (OSError, ValueError):
+                    continue
+
+    def _remove_stale(self):
+        cutoff = time.time() - STALE_UPLOAD_SECONDS
+        for state in list(self._states()):
+            if state['created'] < cutoff:
+                self.abort(state['upload_id'])
+
+    def _load(self, upload_id):
+        self._check_id(upload_id)
+        try:
+            with open(self._state_path(upload_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise KeyError(f"Unknown upload: {upload_id}")
+
+    def _save(self, state):
+        path = self._state_path(state['upload_id'])
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _committed(state):
+        """Bytes received contiguously from the start of the file"""
+        ranges = state['ranges']
+        return ranges[0][1] if ranges and ranges[0][0] == 0 else 0
+
+    def _public(self, state):
+        return {
+            'upload_id': state['upload_id'],
+            'filename': state['filename'],
+            'size': state['size'],
+            'ranges': state['ranges'],
+            'committed': self._committed(state),
+            'chunk_size': RESUMABLE_CHUNK_SIZE,
+        }
+
+    @staticmethod
+    def _check_id(upload_id):
+        if not UPLOAD_ID_PATTERN.match(upload_id or ""):
+            raise KeyError(f"Unknown upload: {upload_id}")
+
+    def _part_path(self, upload_id):
+        return os.path.join(self.state_dir, f"{upload_id}.part")
+
+    def _state_path(self, upload_id):
+        return os.path.join(self.state_dir, f"{upload_id}.json")
+
+
+async def receive_range(request, uploads, upload_id):
+    """Stream a PUT body into an upload at ?offset=N, verifying an optional X-Chunk-SHA256 header"""
+    loop = asyncio.get_running_loop()
+    offset = int(request.query.get('offset', 0))
+    length = request.content_length
+    if length is None:
+        raise ValueError("Content-Length is required")
+    expected = request.headers.get('X-Chunk-SHA256')
+
+    f = await loop.run_in_executor(None, uploads.open_range, upload_id, offset, length)
+    m = hashlib.sha256()
+    received = 0
+
+    def consume(piece):
+        m.update(piece)
+        f.write(piece)
+
+    try:
+        async for piece in request.content.iter_chunked(UPLOAD_CHUNK_SIZE):
+            received += len(piece)
+            if received > length:
+                raise ValueError("Body longer than Content-Length")
+            await loop.run_in_executor(None, consume, piece)
+        await loop.run_in_executor(None, lambda: (f.flush(), os.fsync(f.fileno())))
+    finally:
+        await loop.run_in_executor(None, f.close)
+
+    if received != length:
+        raise ValueError(f"Expected {length} bytes, received {received}")
+    if expected and expected.lower() != m.hexdigest():
+        raise ValueError("Chunk checksum mismatch")
+
+    return await loop.run_in_executor(None, uploads.commit_range, upload_id, offset, offset + length)
@@ -0,0 +1,384 @@
+import os
+import json
+import bisect
+import logging
+import shutil
+import threading
+import subprocess
+from collections import OrderedDict
+from fractions import Fraction
+import numpy as np
+from .i9_metrics import metrics
+
+logger = logging.getLogger("I9.video")
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+try:
+    import av
+except ImportError:
+    av = None
+
+# Forward gaps up to this many frames are decoded through instead of seeking
+SEEK_THRESHOLD = 32
+MAX_OPEN_CAPTURES = 8
+DECODE_BACKENDS = ["auto", "OpenCV", "PyAV", "FFmpeg"]
+
+
+class _VideoHandle:
+    """An open video decoder together with the index of the next frame it will return.
+
+    Backends fill in frame_count/width/height/fps and implement read(), which
+    returns frame frame_number as a BGR uint8 (h, w, 3) array or None.
+    """
+
+    backend = None
+
+    def __init__(self, video_path):
+        stat = os.stat(video_path)
+        self.video_path = video_path
+        self.signature = (stat.st_size, stat.st_mtime)
+        self.opened = False
+        self.position = 0
+        self.frame_count = 0
+        self.width = 0
+        self.height = 0
+        self.fps = 0.0
+        self.keyframes = None
+        try:
+            self._open()
+        except Exception as e:
+            logger.warning(f"[I9 Video Extractor] {self.backend} could not open {video_path}: {e}")
+            self.release()
+            self.opened = False
+
+    def apply_index(self, video_index):
+        """Use a cached video index: its exact frame count and keyframe table"""
+        if video_index.get('frame_count'):
+            self.frame_count = video_index['frame_count']
+        self.keyframes = video_index.get('keyframes')
+
+    def _needs_seek(self, frame_number):
+        if self.position is None or frame_number < self.position:
+            return True
+        if self.keyframes:
+            # A seek can only start decoding at the prior keyframe, so it only pays off
+            # when that keyframe is far enough past the current position
+            return prior_keyframe(self.keyframes, frame_number) - self.position > SEEK_THRESHOLD
+        return frame_number - self.position > SEEK_THRESHOLD
+
+    def _seek_frame(self, frame_number):
+        """Frame a seek for frame_number should land on: the prior keyframe when the table is known"""
+        return prior_keyframe(self.keyframes, frame_number) if self.keyframes else frame_number
+
+    def _open(self):
+        raise NotImplementedError
+
+    def read(self, frame_number):
+        """Frame frame_number as a BGR uint8 (h, w, 3) array, or None"""
+        with metrics.span("decode", "video"):
+            frame = self._read(frame_number)
+        metrics.count("frames_decoded" if frame is not None else "frames_skipped", "video")
+        return frame
+
+    def _read(self, frame_number):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+
+class _OpenCVHandle(_VideoHandle):
+    """cv2.VideoCapture; frame counts come from container metadata and seeks are not always exact"""
+
+    backend = "OpenCV"
+
+    def _open(self):
+        self.cap = cv2.VideoCapture(self.video_path)
+        self.opened = self.cap.isOpened()
+        if self.opened:
+            self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+
+    def _seek_frame(self, frame_number):
+        # CAP_PROP_POS_FRAMES already decodes forward from the prior keyframe internally; aiming it at
+        # a keyframe makes it back off to the one before and decode a whole extra GOP
+        return frame_number
+
+    def _read(self, frame_number):
+        """Read frame_number, continuing forward from the current position when that is cheaper than a seek"""
+        if self._needs_seek(frame_number):
+            seek_frame = self._seek_frame(frame_number)
+            with metrics.span("seek", "video"):
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, seek_frame)
+            self.position = seek_frame
+
+        while self.position < frame_number:
+            if not self.cap.grab():
+                return None
+            self.position += 1
+
+        ret, frame = self.cap.read()
+        if not ret or frame is None:
+            # Position is unknown after a failed read, force a seek next time
+            self.position = None
+            return None
+        self.position += 1
+        return frame
+
+    def release(self):
+        cap = getattr(self, 'cap', None)
+        if cap is not None:
+            cap.release()
+
+
+class _PyAVHandle(_VideoHandle):
+    """PyAV decoder with frame-threaded decoding and keyframe-aware, frame-exact seeking.
+
+    A seek jumps to the keyframe at or before the target timestamp and decodes
+    forward, identifying frames by their pts instead of trusting the demuxer.
+    """
+
+    backend = "PyAV"
+
+    def _open(self):
+        self.container = av.open(self.video_path)
+        self.stream = self.container.streams.video[0]
+        self.stream.thread_type = "AUTO"
+        self.width = self.stream.codec_context.width
+        self.height = self.stream.codec_context.height
+        rate = self.stream.average_rate or self.stream.guessed_rate
+        self.fps = float(rate) if rate else 0.0
+        self.time_base = self.stream.time_base
+        self.start_pts = self.stream.start_time or 0
+
+        self.frame_count = self.stream.frames
+        if not self.frame_count and self.fps:
+            if self.stream.duration:
+                seconds = float(self.stream.duration * self.time_base)
+            else:
+                seconds = (self.container.duration or 0) / av.time_base
+            self.frame_count = int(round(seconds * self.fps))
+        self._frames = None
+        self.position = None
+        self.opened = True
+
+    def _frame_index(self, frame):
+        if frame.pts is None or not self.fps:
+            return self.position
+        return int(round(float((frame.pts - self.start_pts) * self.time_base) * self.fps))
+
+    def _read(self, frame_number):
+        if self._frames is None or self._needs_seek(frame_number):
+            seek_frame = self._seek_frame(frame_number)
+            seconds = Fraction(seek_frame) / Fraction(self.fps).limit_denominator(100000) if self.fps else 0
+            target = self.start_pts + int(seconds / self.time_base)
+            with metrics.span("seek", "video"):
+                self.container.seek(target, stream=self.stream, backward=True, any_frame=False)
+            self._frames = self.container.decode(self.stream)
+            self.position = 0 if not self.fps else None
+
+        try:
+            for frame in self._frames:
+                index = self._frame_index(frame)
+                if index is not None and index < frame_number:
+                    self.position = index + 1
+                    continue
+                self.position = (index if index is not None else frame_number) + 1
+                return frame.to_ndarray(format='bgr24')
+        except Exception as e:
+            logger.warning(f"[I9 Video Extractor] PyAV decode error in {self.video_path}: {e}")
+        self._frames = None
+        self.position = None
+        return None
+
+    def release(self):
+        container = getattr(self, 'container', None)
+        if container is not None:
+            container.close()
+
+
+_ffmpeg_passthrough = None
+
+
+def _passthrough_args():
+    """ffmpeg output options that emit every decoded frame once, unchanged.
+
+    -vsync is deprecated since ffmpeg 5.1 in favour of -fps_mode; builds whose
+    help doesn't list -fps_mode get -vsync 0. Checked once per process.
+    """
+    global _ffmpeg_passthrough
+    if _ffmpeg_passthrough is None:
+        try:
+            result = subprocess.run(["ffmpeg", "-hide_banner", "-h", "long"], capture_output=True, text=True, timeout=10)
+            supported = any(line.startswith("-fps_mode") for line in result.stdout.splitlines())
+        except (OSError, subprocess.SubprocessError):
+            supported = True
+        _ffmpeg_passthrough = ["-fps_mode", "passthrough"] if supported else ["-vsync", "0"]
+    return _ffmpeg_passthrough
+
+
+class _FFmpegHandle(_VideoHandle):
+    """ffmpeg subprocess writing raw BGR frames to a pipe.
+
+    Seeking restarts ffmpeg with an input-side -ss, which jumps to the nearest
+    keyframe and decodes accurately up to the requested timestamp; reads close
+    ahead of the current position keep consuming the running pipe.
+    """
+
+    backend = "FFmpeg"
+
+    def _open(self):
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-select_streams", "v:0",
+             "-show_entries", "stream=width,height,avg_frame_rate,nb_frames,duration",
+             "-of", "json", self.video_path],
+            capture_output=True, check=True, text=True)
+        stream = json.loads(result.stdout)['streams'][0]
+        self.width, self.height = int(stream['width']), int(stream['height'])
+        num, _, den = stream.get('avg_frame_rate', '0/1').partition('/')
+        self.fps = float(num) / float(den) if den and float(den) else 0.0
+        if stream.get('nb_frames', 'N/A') != 'N/A':
+            self.frame_count = int(stream['nb_frames'])
+        elif stream.get('duration', 'N/A') != 'N/A' and self.fps:
+            self.frame_count = int(round(float(stream['duration']) * self.fps))
+        self._process = None
+        self.position = None
+        self.opened = True
+
+    def _start(self, frame_number):
+        self._stop()
+        # Half a frame early so rounding of the target pts can't drop the frame itself
+        seconds = max(0.0, (frame_number - 0.5) / self.fps) if self.fps else 0.0
+        self._process = subprocess.Popen(
+            ["ffmpeg", "-v", "error", "-threads", "0", "-ss", f"{seconds:.6f}", "-i", self.video_path,
+             "-map", "0:v:0", "-f", "rawvideo", "-pix_fmt", "bgr24", *_passthrough_args(), "pipe:1"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=0)
+        self.position = frame_number if self.fps else 0
+
+    def _read_frame(self):
+        frame = bytearray(self.width * self.height * 3)
+        view = memoryview(frame)
+        received = 0
+        while received < len(frame):
+            count = self._process.stdout.readinto(view[received:])
+            if not count:
+                return None
+            received += count
+        return np.frombuffer(frame, dtype=np.uint8).reshape(self.height, self.width, 3)
+
+    def _read(self, frame_number):
+        if self._process is None or self._needs_seek(frame_number):
+            with metrics.span("seek", "video"):
+                self._start(frame_number)
+
+        while True:
+            frame = self._read_frame()
+            if frame is None:
+                self._stop()
+                self.position = None
+                return None
+            self.position += 1
+            if self.position > frame_number:
+                return frame
+
+    def _stop(self):
+        process = getattr(self, '_process', None)
+        if process is not None:
+            process.kill()
+            process.stdout.close()
+            process.wait()
+            self._process = None
+
+    def release(self):
+        self._stop()
+
+
+def prior_keyframe(keyframes, frame_number):
+    """Frame number of the last keyframe at or before frame_number (0 if none is known)"""
+    position = bisect.bisect_right(keyframes, frame_number)
+    return keyframes[position - 1] if position else 0
+
+
+# "auto" keeps OpenCV, the decoder the node has always used, first; PyAV and the
+# FFmpeg pipe are picked explicitly or when OpenCV isn't installed
+_BACKEND_HANDLES = {
+    "OpenCV": (_OpenCVHandle, lambda: cv2 is not None),
+    "PyAV": (_PyAVHandle, lambda: av is not None),
+    "FFmpeg": (_FFmpegHandle, lambda: shutil.which("ffmpeg") is not None and shutil.which("ffprobe") is not None),
+}
+
+
+def available_backends():
+    """Installed decode backends in "auto" preference order"""
+    return [name for name, (_, available) in _BACKEND_HANDLES.items() if available()]
+
+
+def resolve_backend(backend="auto"):
+    """Concrete backend name for a node setting, raising if it isn't installed"""
+    if backend == "auto":
+        installed = available_backends()
+        if not installed:
+            raise RuntimeError("No video decode backend installed. Install av (PyAV) or opencv-python, or put ffmpeg on PATH.")
+        return installed[0]
+    if backend not in _BACKEND_HANDLES:
+        raise ValueError(f"Unknown decode backend: {backend}")
+    if not _BACKEND_HANDLES[backend][1]():
+        raise RuntimeError(f"Decode backend {backend} is not installed")
+    return backend
+
+
+def open_video(video_path, backend="auto"):
+    """Open video_path with a (resolved) backend; check handle.opened before reading"""
+    return _BACKEND_HANDLES[resolve_backend(backend)][0](video_path)
+
+
+class CapturePool:
+    """LRU pool of open decoder handles so consecutive sequential calls keep decoding instead of re-seeking"""
+
+    def __init__(self, max_handles=MAX_OPEN_CAPTURES):
+        self.max_handles = max_handles
+        self._handles = OrderedDict()  # (backend, path) -> handle
+        self._lock = threading.Lock()
+
+    def acquire(self, video_path, backend="auto", video_index=None):
+        """Take exclusive ownership of a handle for video_path, opening one if none is idle"""
+        backend = resolve_backend(backend)
+        stat = os.stat(video_path)
+        with self._lock:
+            handle = self._handles.pop((backend, video_path), None)
+        if handle is not None and handle.signature != (stat.st_size, stat.st_mtime):
+            handle.release()
+            handle = None
+        if handle is None:
+            handle = open_video(video_path, backend)
+        if video_index is not None:
+            handle.apply_index(video_index)
+        return handle
+
+    def release(self, video_path, handle):
+        """Return a handle to the pool, closing whatever falls out of the LRU"""
+        key = (handle.backend, video_path)
+        evicted = []
+        with self._lock:
+            if key in self._handles or not handle.opened:
+                evicted.append(handle)
+            else:
+                self._handles[key] = handle
+            while len(self._handles) > self.max_handles:
+                evicted.append(self._handles.popitem(last=False)[1])
+        for stale in evicted:
+            stale.release()
+
+    def invalidate(self, video_path=None):
+        """Close idle handles for video_path, or every idle handle (needed before deleting files on Windows)"""
+        with self._lock:
+            keys = [key for key in self._handles if video_path is None or key[1] == video_path]
+            evicted = [self._handles.pop(key) for key in keys]
+        for stale in evicted:
+            stale.release()
@@ -0,0 +1,172 @@
+import os
+import json
+import shutil
+import threading
+import subprocess
+from .i9_tensor_cache import get_cache_root
+from .i9_video_backends import open_video
+
+try:
+    import av
+except ImportError:
+    av = None
+
+VIDEO_INDEX_VERSION = 1
+# Entry fields mirrored into the pool index so /i9/video/list can return them
+VIDEO_METADATA_FIELDS = ('frame_count', 'fps', 'width', 'height', 'duration')
+
+_memo = {}  # video_path -> (size, mtime, index)
+_memo_lock = threading.Lock()
+
+
+def get_video_index_path(pool_name, filename):
+    return os.path.join(get_cache_root(), "video_index", pool_name, f"{filename}.json")
+
+
+def build_video_index(video_path):
+    """Scan a video's packets (without decoding) for frame count, fps, resolution, duration and keyframe times.
+
+    Uses PyAV when installed, ffprobe otherwise. OpenCV can't list keyframes, so
+    with only OpenCV available the index holds container metadata and
+    keyframe_times is None.
+    """
+    if av is not None:
+        return _index_with_pyav(video_path)
+    if shutil.which("ffprobe") is not None:
+        return _index_with_ffprobe(video_path)
+
+    handle = open_video(video_path)
+    try:
+        if not handle.opened:
+            raise RuntimeError(f"Could not open video: {video_path}")
+        return {
+            'frame_count': handle.frame_count,
+            'fps': handle.fps,
+            'width': handle.width,
+            'height': handle.height,
+            'duration': handle.frame_count / handle.fps if handle.fps else 0.0,
+            'keyframe_times': None,
+        }
+    finally:
+        handle.release()
+
+
+def _index_with_pyav(video_path):
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        rate = stream.average_rate or stream.guessed_rate
+        fps = float(rate) if rate else 0.0
+        start = stream.start_time or 0
+        frame_count = 0
+        keyframe_times = []
+        for packet in container.demux(stream):
+            if packet.size == 0:
+                continue  # flush packet
+            frame_count += 1
+            if packet.is_keyframe and packet.pts is not None:
+                keyframe_times.append(round(float((packet.pts - start) * stream.time_base), 6))
+        width, height = stream.codec_context.width, stream.codec_context.height
+
+    return {
+        'frame_count': frame_count,
+        'fps': fps,
+        'width': width,
+        'height': height,
+        'duration': frame_count / fps if fps else 0.0,
+        'keyframe_times': sorted(keyframe_times),
+    }
+
+
+def _index_with_ffprobe(video_path):
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "stream=width,height,avg_frame_rate,start_time", "-of", "json", video_path],
+        capture_output=True, check=True, text=True)
+    stream = json.loads(result.stdout)['streams'][0]
+    num, _, den = stream.get('avg_frame_rate', '0/1').partition('/')
+    fps = float(num) / float(den) if den and float(den) else 0.0
+    start = float(stream['start_time']) if stream.get('start_time', 'N/A') != 'N/A' else 0.0
+
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", video_path],
+        capture_output=True, check=True, text=True)
+    frame_count = 0
+    keyframe_times = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(',')
+        if not pts_time:
+            continue
+        frame_count += 1
+        if 'K' in flags and pts_time != 'N/A':
+            keyframe_times.append(round(float(pts_time) - start, 6))
+
+    return {
+        'frame_count': frame_count,
+        'fps': fps,
+        'width': int(stream['width']),
+        'height': int(stream['height']),
+        'duration': frame_count / fps if fps else 0.0,
+        'keyframe_times': sorted(keyframe_times),
+    }
+
+
+def get_video_index(pool_name, filename, video_path, build=False):
+    """Cached index of a pool video, or None if it has none yet (build=True creates it).
+
+    The sidecar is only trusted while the video's size and mtime match, so a
+    replaced file is re-indexed. Loaded indexes carry a derived 'keyframes'
+    list of frame numbers used by the decoders' keyframe seeks.
+    """
+    stat = os.stat(video_path)
+    with _memo_lock:
+        cached = _memo.get(video_path)
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime:
+        return cached[2]
+
+    index_path = get_video_index_path(pool_name, filename)
+    index = None
+    try:
+        with open(index_path) as f:
+            data = json.load(f)
+        if data.get('version') == VIDEO_INDEX_VERSION and data['size'] == stat.st_size and data['modified'] == stat.st_mtime:
+            index = data
+    except (OSError, ValueError, KeyError):
+        pass
+
+    if index is None:
+        if not build:
+            return None
+        index = build_video_index(video_path)
+        index.update(version=VIDEO_INDEX_VERSION, size=stat.st_size, modified=stat.st_mtime)
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        tmp_path = f"{index_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, index_path)
+
+    times = index.get('keyframe_times')
+    index['keyframes'] = sorted({round(t * index['fps']) for t in times}) if times and index['fps'] else None
+    with _memo_lock:
+        _memo[video_path] = (stat.st_size, stat.st_mtime, index)
+    return index
+
+
+def remove_video_index(pool_name, filename=None):
+    """Remove one video's index, or every index of the pool when filename is None"""
+    if filename is not None:
+        paths = [get_video_index_path(pool_name, filename)]
+    else:
+        index_dir = os.path.join(get_cache_root(), "video_index", pool_name)
+        paths = [os.path.join(index_dir, f) for f in os.listdir(index_dir)] if os.path.isdir(index_dir) else []
+    with _memo_lock:
+        if filename is None:
+            _memo.clear()
+        else:
+            for video_path in [p for p in _memo if os.path.basename(p) == filename]:
+                del _memo[video_path]
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
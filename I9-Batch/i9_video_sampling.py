@@ -0,0 +1,77 @@
+import heapq
+import numpy as np
+
+SAMPLING_MODES = ["Frame Number", "Timestamp", "Percentage", "Evenly Spaced", "Scene Changes"]
+# Scene detection compares joint colour histograms with this many levels per channel,
+# computed on frames subsampled to roughly SCENE_ANALYSIS_SIZE pixels on the short side
+SCENE_HISTOGRAM_LEVELS = 16
+SCENE_ANALYSIS_SIZE = 64
+# Cuts closer together than this (flashes, fades) count as one scene
+SCENE_MIN_GAP_SECONDS = 0.5
+
+
+def samples_per_video(sampling, sample_count):
+    """Upper bound of frames one video contributes in a sampling mode"""
+    return sample_count if sampling in ("Evenly Spaced", "Scene Changes") else 1
+
+
+def sample_frame_numbers(sampling, frame_count, fps, frame_number=0, sample_time=0.0, sample_percent=0.0, sample_count=1):
+    """Ascending frame numbers to extract for the position-based sampling modes.
+
+    Timestamp and Percentage resolve against each video's own fps and length, so
+    clips with different frame rates still yield matching moments. Evenly Spaced
+    takes the centre frame of sample_count equal segments, which skips the
+    black/fade frames at the very start and end.
+    """
+    if frame_count <= 0:
+        return []
+    if sampling == "Timestamp":
+        frames = [int(round(sample_time * fps))] if fps else []
+    elif sampling == "Percentage":
+        frames = [min(frame_count - 1, int(frame_count * sample_percent / 100.0))]
+    elif sampling == "Evenly Spaced":
+        count = min(sample_count, frame_count)
+        frames = [int((k + 0.5) * frame_count / count) for k in range(count)]
+    else:
+        frames = [frame_number]
+    return [frame for frame in frames if 0 <= frame < frame_count]
+
+
+def _histogram(frame):
+    step = max(1, min(frame.shape[:2]) // SCENE_ANALYSIS_SIZE)
+    levels = (frame[::step, ::step] // (256 // SCENE_HISTOGRAM_LEVELS)).astype(np.int32)
+    codes = (levels[..., 0] * SCENE_HISTOGRAM_LEVELS + levels[..., 1]) * SCENE_HISTOGRAM_LEVELS + levels[..., 2]
+    hist = np.bincount(codes.ravel(), minlength=SCENE_HISTOGRAM_LEVELS ** 3).astype(np.float32)
+    return hist / hist.sum()
+
+
+def detect_scene_changes(read_frame, frame_count, fps, threshold, max_scenes, stride=1):
+    """Find scene starts in one forward decode pass.
+
+    read_frame(n) returns frame n (uint8 (h, w, 3)) or None. A frame starts a
+    scene when the histogram distance to the previously analysed frame (0..1)
+    is at least threshold; the first frame always does. When there are more
+    than max_scenes cuts the strongest are kept. The decoded frames are
+    returned with the result, so nothing is read twice.
+
+    Returns ascending (frame_number, frame, score) tuples.
+    """
+    min_gap = max(1, int(SCENE_MIN_GAP_SECONDS * fps)) if fps else 1
+    scenes = []  # min-heap of (score, frame_number, frame)
+    previous = None
+    last_cut = None
+    for frame_number in range(0, frame_count, stride):
+        frame = read_frame(frame_number)
+        if frame is None:
+            break
+        hist = _histogram(frame)
+        score = 1.0 if previous is None else 0.5 * float(np.abs(hist - previous).sum())
+        previous = hist
+        if score < threshold or (last_cut is not None and frame_number - last_cut < min_gap):
+            continue
+        last_cut = frame_number
+        if len(scenes) < max_scenes:
+            heapq.heappush(scenes, (score, frame_number, frame))
+        elif score > scenes[0][0]:
+            heapq.heapreplace(scenes, (score, frame_number, frame))
+    return sorted((frame_number, frame, score) for score, frame_number, frame in scenes)
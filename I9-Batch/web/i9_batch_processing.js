@@ -82,12 +82,23 @@ app.registerExtension({
                     <button id="i9_upload_btn" style="background: #4a4; color: #fff; border: none; padding: 10px 20px; border-radius: 4px; cursor: pointer; font-weight: bold;">
                         ⬆️ Upload Images
                     </button>
+                    <input type="file" id="i9_archive_input" accept=".zip,.tar,.tgz,.gz,.bz2,.xz" style="display: none;">
+                    <button id="i9_archive_btn" style="background: #4a4; color: #fff; border: none; padding: 10px 20px; border-radius: 4px; cursor: pointer;">
+                        📦 Upload Archive
+                    </button>
                     <button id="i9_refresh_btn" style="background: #44a; color: #fff; border: none; padding: 10px 20px; border-radius: 4px; cursor: pointer;">
                         🔄 Refresh
                     </button>
                     <button id="i9_clear_btn" style="background: #c44; color: #fff; border: none; padding: 10px 20px; border-radius: 4px; cursor: pointer;">
                         🗑️ Clear All
                     </button>
+                    <input type="text" id="i9_filter" placeholder="Filter by name..." style="background: #1a1a1a; color: #fff; border: 1px solid #444; padding: 9px 12px; border-radius: 4px;">
+                    <select id="i9_sort" style="background: #1a1a1a; color: #fff; border: 1px solid #444; padding: 9px 12px; border-radius: 4px;">
+                        <option value="mtime:desc">Newest first</option>
+                        <option value="mtime:asc">Oldest first</option>
+                        <option value="name:asc">Name</option>
+                        <option value="size:desc">Largest first</option>
+                    </select>
                     <span id="i9_status" style="margin-left: auto; color: #aaa;"></span>
                 `;
                 
@@ -149,7 +160,9 @@ app.registerExtension({
                         const result = await response.json();
                         
                         if (result.success) {
-                            status.textContent = `✓ Uploaded ${result.files.length} image(s)`;
+                            status.textContent = result.deduplicated
+                                ? `✓ Uploaded ${result.files.length} image(s), ${result.deduplicated} already in pool`
+                                : `✓ Uploaded ${result.files.length} image(s)`;
                             setTimeout(() => {
                                 status.textContent = '';
                             }, 3000);
@@ -166,8 +179,72 @@ app.registerExtension({
                     fileInput.value = '';
                 };
                 
+                // Archive handler: the zip/tar is streamed as the request body and extracted server-side
+                const archiveInput = document.getElementById("i9_archive_input");
+                document.getElementById("i9_archive_btn").onclick = () => archiveInput.click();
+
+                archiveInput.onchange = async (e) => {
+                    const file = e.target.files[0];
+                    if (!file) return;
+
+                    const status = document.getElementById("i9_status");
+                    status.textContent = `Extracting ${file.name}...`;
+                    status.style.color = "#4a4";
+
+                    const onProgress = (event) => {
+                        const progress = event.detail;
+                        if (progress.pool !== "I9_ImagePool" || progress.done) return;
+                        const percent = progress.total ? ` ${Math.round(100 * progress.received / progress.total)}%` : '';
+                        status.textContent = `Extracting ${file.name}${percent}: ${progress.added} added, ${progress.rejected} rejected`;
+                    };
+                    api.addEventListener("i9.archive.progress", onProgress);
+
+                    try {
+                        const response = await fetch(`/i9/batch/upload/archive?client_id=${encodeURIComponent(api.clientId ?? '')}`, {
+                            method: 'POST',
+                            body: file
+                        });
+
+                        const result = await response.json();
+                        const summary = `${result.added ?? 0} added, ${result.deduplicated ?? 0} already in pool, ${result.rejected ?? 0} rejected`;
+
+                        if (result.success) {
+                            status.textContent = `✓ ${file.name}: ${summary}`;
+                            setTimeout(() => {
+                                status.textContent = '';
+                            }, 5000);
+                        } else {
+                            status.textContent = `✗ ${file.name}: ${result.error} (${summary})`;
+                            status.style.color = "#c44";
+                        }
+                        loadImages();
+                    } catch (err) {
+                        status.textContent = `✗ Upload error: ${err.message}`;
+                        status.style.color = "#c44";
+                    } finally {
+                        api.removeEventListener("i9.archive.progress", onProgress);
+                    }
+
+                    archiveInput.value = '';
+                };
+
                 // Refresh handler
                 document.getElementById("i9_refresh_btn").onclick = loadImages;
+
+                // Filter and sort reload from the first page
+                let filterTimer = null;
+                document.getElementById("i9_filter").oninput = () => {
+                    clearTimeout(filterTimer);
+                    filterTimer = setTimeout(loadImages, 250);
+                };
+                document.getElementById("i9_sort").onchange = loadImages;
+
+                // Fetch the next page when the grid is scrolled near the bottom
+                gridContainer.onscroll = () => {
+                    if (gridContainer.scrollTop + gridContainer.clientHeight >= gridContainer.scrollHeight - 400) {
+                        loadMoreImages();
+                    }
+                };
                 
                 // Clear all handler
                 document.getElementById("i9_clear_btn").onclick = async () => {
@@ -196,17 +273,41 @@ app.registerExtension({
                     }
                 };
                 
-                // Load and display images
+                // Paged listing state: the gallery only renders what has been scrolled into view
+                const PAGE_SIZE = 100;
+                let nextOffset = 0;
+                let listGeneration = 0;
+                let loadingPage = false;
+                
+                // Load and display images from the first page
                 async function loadImages() {
                     const grid = document.getElementById("i9_image_grid");
-                    const status = document.getElementById("i9_status");
-                    
+                    listGeneration++;
+                    nextOffset = 0;
+                    loadingPage = false;
                     grid.innerHTML = '<div style="grid-column: 1/-1; text-align: center; color: #888; padding: 40px;">Loading...</div>';
+                    await loadMoreImages();
+                }
+                
+                async function loadMoreImages() {
+                    if (loadingPage || nextOffset === null) return;
+                    loadingPage = true;
+                    const generation = listGeneration;
+                    
+                    const grid = document.getElementById("i9_image_grid");
+                    const status = document.getElementById("i9_status");
+                    const [sort, order] = document.getElementById("i9_sort").value.split(":");
+                    const filter = document.getElementById("i9_filter").value.trim();
                     
                     try {
-                        const response = await fetch('/i9/batch/list');
+                        const params = new URLSearchParams({offset: nextOffset, limit: PAGE_SIZE, sort, order});
+                        if (filter) params.set("filter", filter);
+                        const response = await fetch(`/i9/batch/list?${params}`);
                         const result = await response.json();
                         
+                        // A newer reload started while this page was in flight
+                        if (generation !== listGeneration) return;
+                        
                         if (!result.success) {
                             grid.innerHTML = `<div style="grid-column: 1/-1; text-align: center; color: #c44; padding: 40px;">Error: ${result.error}</div>`;
                             return;
@@ -214,14 +315,17 @@ app.registerExtension({
                         
                         const images = result.images;
                         
-                        if (images.length === 0) {
-                            grid.innerHTML = '<div style="grid-column: 1/-1; text-align: center; color: #888; padding: 40px;">No images in batch. Click "Upload Images" to add some.</div>';
-                            status.textContent = '0 images';
-                            return;
+                        if (result.offset === 0) {
+                            grid.innerHTML = '';
+                            if (images.length === 0) {
+                                grid.innerHTML = filter
+                                    ? '<div style="grid-column: 1/-1; text-align: center; color: #888; padding: 40px;">No images match the filter.</div>'
+                                    : '<div style="grid-column: 1/-1; text-align: center; color: #888; padding: 40px;">No images in batch. Click "Upload Images" to add some.</div>';
+                            }
                         }
                         
-                        grid.innerHTML = '';
-                        status.textContent = `${images.length} image(s)`;
+                        status.textContent = `${result.total} image(s)`;
+                        nextOffset = result.next_offset;
                         
                         images.forEach(img => {
                             const card = document.createElement("div");
@@ -241,11 +345,12 @@ app.registerExtension({
                                 card.style.transform = "scale(1)";
                             };
                             
-                            const imgUrl = `/view?filename=${encodeURIComponent(img.filename)}&subfolder=I9_ImagePool&type=input&rand=${Math.random()}`;
+                            // Small cached WebP thumbnail; the mtime only changes the URL when the file changes
+                            const imgUrl = `/i9/batch/thumb?filename=${encodeURIComponent(img.filename)}&v=${img.modified}`;
                             
                             card.innerHTML = `
                                 <div style="position: relative; padding-top: 100%; background: #1a1a1a;">
-                                    <img src="${imgUrl}" style="position: absolute; top: 0; left: 0; width: 100%; height: 100%; object-fit: cover;" />
+                                    <img src="${imgUrl}" loading="lazy" decoding="async" style="position: absolute; top: 0; left: 0; width: 100%; height: 100%; object-fit: cover;" />
                                 </div>
                                 <div style="padding: 10px;">
                                     <div style="font-size: 12px; color: #ccc; margin-bottom: 5px; overflow: hidden; text-overflow: ellipsis; white-space: nowrap;" title="${img.filename}">
@@ -255,19 +360,16 @@ app.registerExtension({
                                         ${formatFileSize(img.size)}
                                     </div>
                                 </div>
-                                <button class="i9_delete_btn" data-filename="${img.filename}" style="position: absolute; top: 8px; right: 8px; background: rgba(204,68,68,0.9); color: #fff; border: none; padding: 6px 10px; border-radius: 4px; cursor: pointer; font-size: 12px; font-weight: bold;">
+                                <button class="i9_delete_btn" style="position: absolute; top: 8px; right: 8px; background: rgba(204,68,68,0.9); color: #fff; border: none; padding: 6px 10px; border-radius: 4px; cursor: pointer; font-size: 12px; font-weight: bold;">
                                     ✕
                                 </button>
                             `;
                             
                             grid.appendChild(card);
-                        });
-                        
-                        // Attach delete handlers
-                        grid.querySelectorAll(".i9_delete_btn").forEach(btn => {
-                            btn.onclick = async (e) => {
+                            
+                            card.querySelector(".i9_delete_btn").onclick = async (e) => {
                                 e.stopPropagation();
-                                const filename = btn.dataset.filename;
+                                const filename = img.filename;
                                 
                                 if (!confirm(`Delete ${filename}?`)) return;
                                 
@@ -287,9 +389,17 @@ app.registerExtension({
                                 }
                             };
                         });
-                        
+                    
                     } catch (err) {
                         grid.innerHTML = `<div style="grid-column: 1/-1; text-align: center; color: #c44; padding: 40px;">Error loading images: ${err.message}</div>`;
+                        return;
+                    } finally {
+                        if (generation === listGeneration) loadingPage = false;
+                    }
+                    
+                    // Keep filling until the grid can scroll, otherwise no scroll event will fire
+                    if (nextOffset !== null && gridContainer.scrollHeight <= gridContainer.clientHeight) {
+                        loadMoreImages();
                     }
                 }
                 
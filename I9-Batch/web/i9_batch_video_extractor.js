@@ -82,12 +82,23 @@ app.registerExtension({
                     <button id="i9_video_upload_btn" style="background: #4a4; color: #fff; border: none; padding: 10px 20px; border-radius: 4px; cursor: pointer; font-weight: bold;">
                         ⬆️ Upload Videos
                     </button>
+                    <input type="file" id="i9_video_archive_input" accept=".zip,.tar,.tgz,.gz,.bz2,.xz" style="display: none;">
+                    <button id="i9_video_archive_btn" style="background: #4a4; color: #fff; border: none; padding: 10px 20px; border-radius: 4px; cursor: pointer;">
+                        📦 Upload Archive
+                    </button>
                     <button id="i9_video_refresh_btn" style="background: #44a; color: #fff; border: none; padding: 10px 20px; border-radius: 4px; cursor: pointer;">
                         🔄 Refresh
                     </button>
                     <button id="i9_video_clear_btn" style="background: #c44; color: #fff; border: none; padding: 10px 20px; border-radius: 4px; cursor: pointer;">
                         🗑️ Clear All
                     </button>
+                    <input type="text" id="i9_video_filter" placeholder="Filter by name..." style="background: #1a1a1a; color: #fff; border: 1px solid #444; padding: 9px 12px; border-radius: 4px;">
+                    <select id="i9_video_sort" style="background: #1a1a1a; color: #fff; border: 1px solid #444; padding: 9px 12px; border-radius: 4px;">
+                        <option value="mtime:desc">Newest first</option>
+                        <option value="mtime:asc">Oldest first</option>
+                        <option value="name:asc">Name</option>
+                        <option value="size:desc">Largest first</option>
+                    </select>
                     <span id="i9_video_status" style="margin-left: auto; color: #aaa;"></span>
                 `;
 
@@ -127,6 +138,95 @@ app.registerExtension({
                 const fileInput = document.getElementById("i9_video_file_input");
                 document.getElementById("i9_video_upload_btn").onclick = () => fileInput.click();
 
+                // Videos above this size go through the resumable chunked protocol
+                const CHUNKED_UPLOAD_THRESHOLD = 64 * 1024 * 1024;
+                const PARALLEL_CHUNKS = 4;
+                const CHUNK_RETRIES = 3;
+                // crypto.subtle can't hash incrementally, so the whole-file checksum sent to
+                // /finalize needs the file in memory at once; larger files skip it
+                const WHOLE_FILE_HASH_LIMIT = 1024 * 1024 * 1024;
+
+                // crypto.subtle only exists in secure contexts (HTTPS or localhost). Over plain
+                // HTTP no checksums are sent and the upload is not integrity-checked by the server
+                const canHash = () => Boolean(window.crypto && crypto.subtle);
+
+                async function sha256Hex(buffer) {
+                    const digest = await crypto.subtle.digest('SHA-256', buffer);
+                    return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+                }
+
+                async function uploadResumable(file, onProgress) {
+                    // The server hands back the unfinished upload with the same fingerprint, so a
+                    // dropped connection or a reloaded page resumes instead of starting over
+                    const fingerprint = `${file.name}:${file.size}:${file.lastModified}`;
+                    const initResponse = await fetch('/i9/video/upload/init', {
+                        method: 'POST',
+                        headers: {'Content-Type': 'application/json'},
+                        body: JSON.stringify({filename: file.name, size: file.size, fingerprint})
+                    });
+                    const upload = await initResponse.json();
+                    if (!upload.success) throw new Error(upload.error);
+
+                    const received = (start, end) => upload.ranges.some(([s, e]) => s <= start && end <= e);
+                    const pending = [];
+                    for (let start = 0; start < file.size; start += upload.chunk_size) {
+                        const end = Math.min(start + upload.chunk_size, file.size);
+                        if (!received(start, end)) pending.push([start, end]);
+                    }
+
+                    let done = file.size - pending.reduce((sum, [s, e]) => sum + e - s, 0);
+                    onProgress(done);
+
+                    // Hashed alongside the chunk uploads; /finalize rejects the upload if the
+                    // assembled file doesn't match
+                    const wholeFileHash = canHash() && file.size <= WHOLE_FILE_HASH_LIMIT
+                        ? file.arrayBuffer().then(sha256Hex).catch(() => null)
+                        : Promise.resolve(null);
+
+                    const putChunk = async (start, end) => {
+                        const chunk = file.slice(start, end);
+                        const headers = {'Content-Type': 'application/octet-stream'};
+                        // The server treats the header as optional
+                        if (canHash()) {
+                            headers['X-Chunk-SHA256'] = await sha256Hex(await chunk.arrayBuffer());
+                        }
+                        for (let attempt = 1; ; attempt++) {
+                            try {
+                                const response = await fetch(`/i9/video/upload/${upload.upload_id}?offset=${start}`, {
+                                    method: 'PUT',
+                                    headers,
+                                    body: chunk
+                                });
+                                const result = await response.json();
+                                if (!result.success) throw new Error(result.error);
+                                return;
+                            } catch (err) {
+                                if (attempt >= CHUNK_RETRIES) throw err;
+                            }
+                        }
+                    };
+
+                    const worker = async () => {
+                        while (pending.length > 0) {
+                            const [start, end] = pending.shift();
+                            await putChunk(start, end);
+                            done += end - start;
+                            onProgress(done);
+                        }
+                    };
+                    await Promise.all(Array.from({length: PARALLEL_CHUNKS}, worker));
+
+                    const sha256 = await wholeFileHash;
+                    const finalizeResponse = await fetch(`/i9/video/upload/${upload.upload_id}/finalize`, {
+                        method: 'POST',
+                        headers: {'Content-Type': 'application/json'},
+                        body: JSON.stringify(sha256 ? {sha256} : {})
+                    });
+                    const result = await finalizeResponse.json();
+                    if (!result.success) throw new Error(result.error);
+                    return result.file;
+                }
+
                 fileInput.onchange = async (e) => {
                     const files = Array.from(e.target.files);
                     if (files.length === 0) return;
@@ -135,40 +235,117 @@ app.registerExtension({
                     status.textContent = `Uploading ${files.length} video(s)...`;
                     status.style.color = "#4a4";
 
-                    const formData = new FormData();
-                    files.forEach(file => {
-                        formData.append('video', file);
-                    });
+                    const smallFiles = files.filter(file => file.size <= CHUNKED_UPLOAD_THRESHOLD);
+                    const largeFiles = files.filter(file => file.size > CHUNKED_UPLOAD_THRESHOLD);
+                    const uploaded = [];
+
+                    try {
+                        if (smallFiles.length > 0) {
+                            const formData = new FormData();
+                            smallFiles.forEach(file => {
+                                formData.append('video', file);
+                            });
+
+                            const response = await fetch('/i9/video/upload', {
+                                method: 'POST',
+                                body: formData
+                            });
+
+                            const result = await response.json();
+                            if (!result.success) throw new Error(result.error);
+                            uploaded.push(...result.files);
+                        }
+
+                        for (const file of largeFiles) {
+                            uploaded.push(await uploadResumable(file, (bytes) => {
+                                status.textContent = `Uploading ${file.name}: ${formatFileSize(bytes)} / ${formatFileSize(file.size)}`;
+                            }));
+                        }
+
+                        const deduplicated = uploaded.filter(file => file.deduplicated).length;
+                        status.textContent = deduplicated
+                            ? `✓ Uploaded ${uploaded.length} video(s), ${deduplicated} already in pool`
+                            : `✓ Uploaded ${uploaded.length} video(s)`;
+                        setTimeout(() => {
+                            status.textContent = '';
+                        }, 3000);
+                        loadVideos();
+                    } catch (err) {
+                        status.textContent = `✗ Upload failed: ${err.message}`;
+                        status.style.color = "#c44";
+                        if (uploaded.length > 0) loadVideos();
+                    }
+
+                    fileInput.value = '';
+                };
+
+                // Archive handler: the zip/tar is streamed as the request body and extracted server-side
+                const archiveInput = document.getElementById("i9_video_archive_input");
+                document.getElementById("i9_video_archive_btn").onclick = () => archiveInput.click();
+
+                archiveInput.onchange = async (e) => {
+                    const file = e.target.files[0];
+                    if (!file) return;
+
+                    const status = document.getElementById("i9_video_status");
+                    status.textContent = `Extracting ${file.name}...`;
+                    status.style.color = "#4a4";
+
+                    const onProgress = (event) => {
+                        const progress = event.detail;
+                        if (progress.pool !== "I9_VideoPool" || progress.done) return;
+                        const percent = progress.total ? ` ${Math.round(100 * progress.received / progress.total)}%` : '';
+                        status.textContent = `Extracting ${file.name}${percent}: ${progress.added} added, ${progress.rejected} rejected`;
+                    };
+                    api.addEventListener("i9.archive.progress", onProgress);
 
                     try {
-                        const response = await fetch('/i9/video/upload', {
+                        const response = await fetch(`/i9/video/upload/archive?client_id=${encodeURIComponent(api.clientId ?? '')}`, {
                             method: 'POST',
-                            body: formData
+                            body: file
                         });
 
                         const result = await response.json();
+                        const summary = `${result.added ?? 0} added, ${result.deduplicated ?? 0} already in pool, ${result.rejected ?? 0} rejected`;
 
                         if (result.success) {
-                            status.textContent = `✓ Uploaded ${result.files.length} video(s)`;
+                            status.textContent = `✓ ${file.name}: ${summary}`;
                             setTimeout(() => {
                                 status.textContent = '';
-                            }, 3000);
-                            loadVideos();
+                            }, 5000);
                         } else {
-                            status.textContent = `✗ Upload failed: ${result.error}`;
+                            status.textContent = `✗ ${file.name}: ${result.error} (${summary})`;
                             status.style.color = "#c44";
                         }
+                        loadVideos();
                     } catch (err) {
                         status.textContent = `✗ Upload error: ${err.message}`;
                         status.style.color = "#c44";
+                    } finally {
+                        api.removeEventListener("i9.archive.progress", onProgress);
                     }
 
-                    fileInput.value = '';
+                    archiveInput.value = '';
                 };
 
                 // Refresh handler
                 document.getElementById("i9_video_refresh_btn").onclick = loadVideos;
 
+                // Filter and sort reload from the first page
+                let filterTimer = null;
+                document.getElementById("i9_video_filter").oninput = () => {
+                    clearTimeout(filterTimer);
+                    filterTimer = setTimeout(loadVideos, 250);
+                };
+                document.getElementById("i9_video_sort").onchange = loadVideos;
+
+                // Fetch the next page when the grid is scrolled near the bottom
+                gridContainer.onscroll = () => {
+                    if (gridContainer.scrollTop + gridContainer.clientHeight >= gridContainer.scrollHeight - 400) {
+                        loadMoreVideos();
+                    }
+                };
+
                 // Clear all handler
                 document.getElementById("i9_video_clear_btn").onclick = async () => {
                     if (!confirm("Delete ALL videos from the batch pool? This cannot be undone.")) return;
@@ -196,17 +373,41 @@ app.registerExtension({
                     }
                 };
 
-                // Load and display videos
+                // Paged listing state: the gallery only renders what has been scrolled into view
+                const PAGE_SIZE = 100;
+                let nextOffset = 0;
+                let listGeneration = 0;
+                let loadingPage = false;
+
+                // Load and display videos from the first page
                 async function loadVideos() {
                     const grid = document.getElementById("i9_video_grid");
-                    const status = document.getElementById("i9_video_status");
-
+                    listGeneration++;
+                    nextOffset = 0;
+                    loadingPage = false;
                     grid.innerHTML = '<div style="grid-column: 1/-1; text-align: center; color: #888; padding: 40px;">Loading...</div>';
+                    await loadMoreVideos();
+                }
+
+                async function loadMoreVideos() {
+                    if (loadingPage || nextOffset === null) return;
+                    loadingPage = true;
+                    const generation = listGeneration;
+
+                    const grid = document.getElementById("i9_video_grid");
+                    const status = document.getElementById("i9_video_status");
+                    const [sort, order] = document.getElementById("i9_video_sort").value.split(":");
+                    const filter = document.getElementById("i9_video_filter").value.trim();
 
                     try {
-                        const response = await fetch('/i9/video/list');
+                        const params = new URLSearchParams({offset: nextOffset, limit: PAGE_SIZE, sort, order});
+                        if (filter) params.set("filter", filter);
+                        const response = await fetch(`/i9/video/list?${params}`);
                         const result = await response.json();
 
+                        // A newer reload started while this page was in flight
+                        if (generation !== listGeneration) return;
+
                         if (!result.success) {
                             grid.innerHTML = `<div style="grid-column: 1/-1; text-align: center; color: #c44; padding: 40px;">Error: ${result.error}</div>`;
                             return;
@@ -214,14 +415,17 @@ app.registerExtension({
 
                         const videos = result.videos;
 
-                        if (videos.length === 0) {
-                            grid.innerHTML = '<div style="grid-column: 1/-1; text-align: center; color: #888; padding: 40px;">No videos in batch. Click "Upload Videos" to add some.</div>';
-                            status.textContent = '0 videos';
-                            return;
+                        if (result.offset === 0) {
+                            grid.innerHTML = '';
+                            if (videos.length === 0) {
+                                grid.innerHTML = filter
+                                    ? '<div style="grid-column: 1/-1; text-align: center; color: #888; padding: 40px;">No videos match the filter.</div>'
+                                    : '<div style="grid-column: 1/-1; text-align: center; color: #888; padding: 40px;">No videos in batch. Click "Upload Videos" to add some.</div>';
+                            }
                         }
 
-                        grid.innerHTML = '';
-                        status.textContent = `${videos.length} video(s)`;
+                        status.textContent = `${result.total} video(s)`;
+                        nextOffset = result.next_offset;
 
                         videos.forEach(video => {
                             const card = document.createElement("div");
@@ -241,33 +445,34 @@ app.registerExtension({
                                 card.style.transform = "scale(1)";
                             };
 
+                            // Cached poster frame; the mtime only changes the URL when the file changes
+                            const thumbUrl = `/i9/video/thumb?filename=${encodeURIComponent(video.filename)}&v=${video.modified}`;
+
                             card.innerHTML = `
                                 <div style="position: relative; padding-top: 56.25%; background: #1a1a1a; display: flex; align-items: center; justify-content: center;">
                                     <div style="position: absolute; top: 50%; left: 50%; transform: translate(-50%, -50%); font-size: 48px;">
                                         🎬
                                     </div>
+                                    <img src="${thumbUrl}" loading="lazy" decoding="async" onerror="this.remove()" style="position: absolute; top: 0; left: 0; width: 100%; height: 100%; object-fit: cover;" />
                                 </div>
                                 <div style="padding: 10px;">
                                     <div style="font-size: 12px; color: #ccc; margin-bottom: 5px; overflow: hidden; text-overflow: ellipsis; white-space: nowrap;" title="${video.filename}">
                                         ${video.filename}
                                     </div>
                                     <div style="font-size: 10px; color: #888;">
-                                        ${formatFileSize(video.size)}
+                                        ${formatFileSize(video.size)}${video.duration ? ` · ${video.duration.toFixed(1)}s · ${video.frame_count} frames @ ${Math.round(video.fps * 100) / 100} fps` : ''}
                                     </div>
                                 </div>
-                                <button class="i9_video_delete_btn" data-filename="${video.filename}" style="position: absolute; top: 8px; right: 8px; background: rgba(204,68,68,0.9); color: #fff; border: none; padding: 6px 10px; border-radius: 4px; cursor: pointer; font-size: 12px; font-weight: bold;">
+                                <button class="i9_video_delete_btn" style="position: absolute; top: 8px; right: 8px; background: rgba(204,68,68,0.9); color: #fff; border: none; padding: 6px 10px; border-radius: 4px; cursor: pointer; font-size: 12px; font-weight: bold;">
                                     ✕
                                 </button>
                             `;
 
                             grid.appendChild(card);
-                        });
 
-                        // Attach delete handlers
-                        grid.querySelectorAll(".i9_video_delete_btn").forEach(btn => {
-                            btn.onclick = async (e) => {
+                            card.querySelector(".i9_video_delete_btn").onclick = async (e) => {
                                 e.stopPropagation();
-                                const filename = btn.dataset.filename;
+                                const filename = video.filename;
 
                                 if (!confirm(`Delete ${filename}?`)) return;
 
@@ -290,6 +495,14 @@ app.registerExtension({
 
                     } catch (err) {
                         grid.innerHTML = `<div style="grid-column: 1/-1; text-align: center; color: #c44; padding: 40px;">Error loading videos: ${err.message}</div>`;
+                        return;
+                    } finally {
+                        if (generation === listGeneration) loadingPage = false;
+                    }
+
+                    // Keep filling until the grid can scroll, otherwise no scroll event will fire
+                    if (nextOffset !== null && gridContainer.scrollHeight <= gridContainer.clientHeight) {
+                        loadMoreVideos();
                     }
                 }
 
@@ -0,0 +1,25 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "I9-Batch" / "benchmarks"))
+import comfy_stubs  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def package(tmp_path_factory):
+    comfy_stubs.install(tmp_path_factory.mktemp("input"))
+    return comfy_stubs.load_package()
+
+
+@pytest.fixture
+def input_dir(package, tmp_path, monkeypatch):
+    """Fresh ComfyUI input directory (pools and I9_Cache) for one test"""
+    monkeypatch.setattr(sys.modules["folder_paths"], "get_input_directory", lambda: str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def modules(package):
+    return comfy_stubs.submodule
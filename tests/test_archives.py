@@ -0,0 +1,154 @@
+import io
+import os
+import bz2
+import zlib
+import struct
+import asyncio
+import tarfile
+import zipfile
+import threading
+
+import pytest
+
+PAYLOADS = {
+    "a.png": os.urandom(5000),
+    "b.png": b"hello" * 3000,
+    # Bytes that look like a descriptor and a local header, but with sizes that don't match the data before them
+    "c.png": os.urandom(700) + b"PK\x07\x08" + struct.pack("<III", 1, 7, 7) + b"PK\x03\x04" + os.urandom(300),
+}
+
+
+@pytest.fixture
+def archives(modules, input_dir):
+    return modules("i9_archives")
+
+
+@pytest.fixture
+def pool_index(modules, input_dir):
+    pool_index = modules("i9_pool_index").PoolIndex("I9_ImagePool", (".png",))
+    os.makedirs(pool_index.pool_dir)
+    return pool_index
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def stream_zip(files, method=zipfile.ZIP_STORED, signed=True):
+    """Zip as a streaming writer makes it: no sizes in the local headers, a data descriptor after each entry"""
+    out = io.BytesIO()
+    for name, data in files.items():
+        compressed = data
+        if method == zipfile.ZIP_DEFLATED:
+            deflate = zlib.compressobj(6, zlib.DEFLATED, -15)
+            compressed = deflate.compress(data) + deflate.flush()
+        out.write(struct.pack('<4sHHHHHIIIHH', b'PK\x03\x04', 20, 0x8, method, 0, 0, 0, 0, 0, len(name), 0))
+        out.write(name.encode())
+        out.write(compressed)
+        out.write((b'PK\x07\x08' if signed else b"") + struct.pack('<III', zlib.crc32(data), len(compressed), len(data)))
+    out.write(b'PK\x01\x02' + bytes(42))
+    return out.getvalue()
+
+
+def extract(archives, loop, pool_index, data, chunk_size=4096, validate=lambda path: None):
+    chunks = iter([data[i:i + chunk_size] for i in range(0, len(data), chunk_size)])
+
+    async def read_chunk():
+        return next(chunks, b"")
+
+    stream = archives._StreamReader(read_chunk, loop)
+    return archives.extract_archive(stream, pool_index, validate)
+
+
+def pool_contents(pool_index):
+    contents = {}
+    for filename in pool_index.files():
+        with open(os.path.join(pool_index.pool_dir, filename), 'rb') as f:
+            contents[filename] = f.read()
+    return contents
+
+
+@pytest.mark.parametrize("method", [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED])
+@pytest.mark.parametrize("chunk_size", [1, 13, 1 << 20])
+def test_zip_with_data_descriptors(archives, loop, pool_index, method, chunk_size):
+    result = extract(archives, loop, pool_index, stream_zip(PAYLOADS, method), chunk_size)
+    assert 'error' not in result
+    assert result['added'] == 3 and result['rejected'] == 0
+    assert pool_contents(pool_index) == PAYLOADS
+
+
+@pytest.mark.parametrize("method", [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED])
+def test_zip_with_unsigned_data_descriptors(archives, loop, pool_index, method):
+    result = extract(archives, loop, pool_index, stream_zip(PAYLOADS, method, signed=False), 100)
+    assert 'error' not in result
+    assert pool_contents(pool_index) == PAYLOADS
+
+
+def test_zip_with_sizes_in_local_headers(archives, loop, pool_index):
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, 'w') as zf:
+        zf.writestr("a.png", PAYLOADS["a.png"], zipfile.ZIP_STORED)
+        zf.writestr("b.png", PAYLOADS["b.png"], zipfile.ZIP_DEFLATED)
+        zf.writestr("notes.txt", b"skipped")
+        zf.writestr("__MACOSX/._a.png", b"skipped")
+    result = extract(archives, loop, pool_index, out.getvalue())
+    assert result['added'] == 2 and result['skipped'] == 2
+    assert pool_contents(pool_index) == {name: PAYLOADS[name] for name in ("a.png", "b.png")}
+
+
+def test_unsupported_entry_is_rejected_and_the_rest_extracted(archives, loop, pool_index):
+    # A bzip2 entry with a data descriptor: its end can only be found by scanning for the descriptor
+    data = PAYLOADS["a.png"]
+    compressed = bz2.compress(data)
+    entry = (struct.pack('<4sHHHHHIIIHH', b'PK\x03\x04', 46, 0x8, zipfile.ZIP_BZIP2, 0, 0, 0, 0, 0, len("packed.png"), 0)
+             + b"packed.png" + compressed + b'PK\x07\x08' + struct.pack('<III', zlib.crc32(data), len(compressed), len(data)))
+    result = extract(archives, loop, pool_index, entry + stream_zip({"b.png": PAYLOADS["b.png"]}), 50)
+    assert result['rejected'] == 1 and result['added'] == 1
+    assert result['rejected_entries'][0]['name'] == "packed.png"
+    assert pool_contents(pool_index) == {"b.png": PAYLOADS["b.png"]}
+
+
+def test_corrupt_entry_is_rejected(archives, loop, pool_index):
+    data = bytearray(stream_zip(PAYLOADS))
+    offset = data.index(PAYLOADS["a.png"][:64]) + 100
+    data[offset] ^= 0xFF
+    result = extract(archives, loop, pool_index, bytes(data))
+    assert result['rejected'] == 1 and "CRC" in result['rejected_entries'][0]['error']
+    assert set(pool_contents(pool_index)) == {"b.png", "c.png"}
+
+
+def test_validate_rejects_and_duplicates_are_aliased(archives, loop, pool_index):
+    files = {"a.png": PAYLOADS["a.png"], "copy.png": PAYLOADS["a.png"], "b.png": PAYLOADS["b.png"]}
+    result = extract(archives, loop, pool_index, stream_zip(files),
+                     validate=lambda path: "not an image" if os.path.getsize(path) == len(PAYLOADS["b.png"]) else None)
+    assert result['added'] == 1 and result['deduplicated'] == 1 and result['rejected'] == 1
+    assert pool_contents(pool_index) == {"a.png": PAYLOADS["a.png"]}
+    assert os.listdir(os.path.join(str(pool_index.pool_dir), os.pardir, "I9_Cache", "staging")) == []
+
+
+@pytest.mark.parametrize("mode", ["w", "w:gz"])
+def test_tar(archives, loop, pool_index, mode):
+    out = io.BytesIO()
+    with tarfile.open(fileobj=out, mode=mode) as tf:
+        for name, data in PAYLOADS.items():
+            info = tarfile.TarInfo(f"set/{name}")
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    result = extract(archives, loop, pool_index, out.getvalue(), 1000)
+    assert 'error' not in result
+    assert pool_contents(pool_index) == PAYLOADS
+
+
+def test_truncated_archive_keeps_extracted_entries(archives, loop, pool_index):
+    data = stream_zip(PAYLOADS)
+    cut = data.index(b"PK\x03\x04", data.index(b"PK\x07\x08") + 1) + 40
+    result = extract(archives, loop, pool_index, data[:cut])
+    assert 'error' in result
+    assert pool_contents(pool_index) == {"a.png": PAYLOADS["a.png"]}
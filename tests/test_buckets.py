@@ -0,0 +1,44 @@
+import math
+
+import pytest
+
+
+@pytest.fixture
+def buckets(modules):
+    return modules("i9_buckets")
+
+
+def test_make_buckets_stay_within_budget(buckets):
+    result = buckets.make_buckets(1024, 1024)
+    assert (1024, 1024) in result
+    for width, height in result:
+        assert width % buckets.BUCKET_STEP == 0 and height % buckets.BUCKET_STEP == 0
+        assert width * height <= 1024 * 1024
+        assert max(width, height) / min(width, height) <= buckets.BUCKET_MAX_ASPECT
+    aspects = [width / height for width, height in result]
+    assert aspects == sorted(aspects)
+
+
+def test_make_buckets_are_symmetric(buckets):
+    result = set(buckets.make_buckets(768, 768))
+    assert all((height, width) in result for width, height in result)
+
+
+def test_assign_bucket_picks_closest_aspect(buckets):
+    result = buckets.make_buckets(1024, 1024)
+    assert buckets.assign_bucket(3000, 3000, result) == (1024, 1024)
+    wide = buckets.assign_bucket(4000, 2000, result)
+    tall = buckets.assign_bucket(2000, 4000, result)
+    assert wide == tall[::-1]
+    assert math.isclose(wide[0] / wide[1], 2.0, rel_tol=0.15)
+
+
+def test_assign_bucket_clamps_extreme_aspects(buckets):
+    result = buckets.make_buckets(1024, 1024)
+    assert buckets.assign_bucket(10000, 100, result) == result[-1]
+    assert buckets.assign_bucket(100, 10000, result) == result[0]
+
+
+def test_bucket_label(buckets):
+    assert buckets.bucket_label(1216, 832) == "19:13"
+    assert buckets.bucket_label(1024, 1024) == "1:1"
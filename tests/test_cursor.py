@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def cursors(modules):
+    cursors = modules("i9_cursor").SequentialCursors("test")
+    yield cursors
+    cursors._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def test_advance_wraps_and_counts_passes(cursors):
+    assert [cursors.advance("n", 3) for _ in range(4)] == [0, 1, 2, 0]
+    assert cursors.status()["n"]['passes'] == 1
+    cursors.seek("n", 2)
+    assert cursors.advance("n", 3) == 2
+    cursors.reset("n")
+    assert cursors.advance("n", 3) == 0
+
+
+def test_wait_reuses_a_running_prefetch(cursors):
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def job(key):
+        runs.append(key)
+        if key == "a":
+            started.set()
+            release.wait(5)
+
+    cursors.prefetch("n", {"a": lambda: job("a"), "b": lambda: job("b")})
+    assert started.wait(5)
+    # Re-queueing the same keys while "a" runs keeps its job instead of submitting another
+    cursors.prefetch("n", {"a": lambda: job("a"), "b": lambda: job("b")})
+    release.set()
+    cursors.wait("n", "a")
+    cursors.wait("n", "b")
+    assert runs.count("a") == 1
+    assert runs.count("b") <= 1
+
+
+def test_wait_drops_a_queued_prefetch(cursors):
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def blocker():
+        started.set()
+        release.wait(5)
+
+    cursors.prefetch("other", {"x": blocker})
+    assert started.wait(5)
+    cursors.prefetch("n", {"a": lambda: runs.append("a")})
+    # "a" hasn't started: the foreground does the work itself and the job never runs
+    cursors.wait("n", "a")
+    release.set()
+    cursors.wait("other", "x")
+    assert runs == []
+
+
+def test_prefetch_cancels_keys_no_longer_wanted(cursors):
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def blocker():
+        started.set()
+        release.wait(5)
+
+    cursors.prefetch("other", {"x": blocker})
+    assert started.wait(5)
+    cursors.prefetch("n", {"a": lambda: runs.append("a"), "b": lambda: runs.append("b")})
+    cursors.prefetch("n", {"b": lambda: runs.append("b"), "c": lambda: runs.append("c")})
+    release.set()
+    cursors.wait("other", "x")
+    cursors._executor.submit(lambda: None).result()
+    assert runs == ["b", "c"]
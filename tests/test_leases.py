@@ -0,0 +1,74 @@
+import pytest
+
+FILES = ["a.png", "b.png", "c.png"]
+
+
+@pytest.fixture
+def leases(modules, input_dir):
+    return modules("i9_leases")
+
+
+def test_workers_claim_different_files(leases):
+    store = leases.LeaseStore("pool")
+    first, _ = store.claim("w1/1", FILES)
+    second, summary = store.claim("w2/1", FILES)
+    assert (first, second) == ("a.png", "b.png")
+    assert summary['claimed'] == 2 and summary['pending'] == 1 and summary['done'] == 0
+
+
+def test_next_claim_finishes_the_previous_one(leases):
+    store = leases.LeaseStore("pool")
+    assert store.claim("w1/1", FILES)[0] == "a.png"
+    filename, summary = store.claim("w1/1", FILES)
+    assert filename == "b.png"
+    assert summary['done'] == 1
+    assert summary['workers']["w1/1"]['done'] == 1
+
+
+def test_last_item_is_finished_by_a_run_that_finds_nothing(leases):
+    store = leases.LeaseStore("pool")
+    for expected in FILES:
+        assert store.claim("w1/1", FILES)[0] == expected
+    assert store.status(FILES)['claimed'] == 1
+    filename, summary = store.claim("w1/1", FILES)
+    assert filename is None
+    assert summary['done'] == 3 and summary['claimed'] == 0
+
+
+def test_expired_claim_is_handed_out_again(leases):
+    store = leases.LeaseStore("pool")
+    assert store.claim("w1/1", FILES, timeout=0)[0] == "a.png"
+    filename, summary = store.claim("w2/1", FILES)
+    assert filename == "a.png"
+    assert summary['reclaimed'] == 1 and summary['done'] == 0
+
+
+def test_restarted_worker_releases_its_claim(leases, monkeypatch):
+    store = leases.LeaseStore("pool")
+    assert store.claim("w1/1", FILES)[0] == "a.png"
+    monkeypatch.setattr(leases, "_INSTANCE", "restarted")
+    filename, summary = store.claim("w1/1", FILES)
+    assert filename == "a.png"
+    assert summary['done'] == 0 and summary['reclaimed'] == 1
+
+
+def test_state_is_shared_between_stores(leases):
+    assert leases.LeaseStore("pool").claim("w1/1", FILES)[0] == "a.png"
+    assert leases.LeaseStore("pool").claim("w2/1", FILES)[0] == "b.png"
+
+
+def test_status_ignores_files_no_longer_in_the_pool(leases):
+    store = leases.LeaseStore("pool")
+    store.claim("w1/1", FILES)
+    summary = store.status(FILES[1:])
+    assert summary['total'] == 2 and summary['claimed'] == 0 and summary['pending'] == 2
+
+
+def test_reset_and_unreadable_state(leases):
+    store = leases.LeaseStore("pool")
+    store.claim("w1/1", FILES)
+    store.reset()
+    assert store.status(FILES)['pending'] == 3
+    with open(store.state_path, 'w') as f:
+        f.write("{not json")
+    assert store.claim("w1/1", FILES)[0] == "a.png"
@@ -0,0 +1,132 @@
+import numpy as np
+import pytest
+import torch
+
+WIDTH, HEIGHT = 8, 6
+
+
+@pytest.fixture
+def pack_module(modules, input_dir):
+    return modules("i9_pack")
+
+
+def entry(filename, modified=1.0, size=100):
+    return {'filename': filename, 'size': size, 'modified': modified}
+
+
+def pixels(filename, modified=1.0):
+    """Distinct uint8 rows per file and version"""
+    seed = sum(map(ord, filename)) + int(modified * 7)
+    return np.random.default_rng(seed).integers(0, 256, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+
+
+class Loader:
+    def __init__(self, entries, fail=()):
+        self.modified = {e['filename']: e['modified'] for e in entries}
+        self.fail = set(fail)
+        self.decoded = []
+
+    def __call__(self, filenames):
+        self.decoded.extend(filenames)
+        rows = np.zeros((len(filenames), HEIGHT, WIDTH, 3), dtype=np.uint8)
+        errors = []
+        for i, filename in enumerate(filenames):
+            if filename in self.fail:
+                errors.append(ValueError(f"cannot decode {filename}"))
+            else:
+                rows[i] = pixels(filename, self.modified[filename])
+                errors.append(None)
+        return rows, errors
+
+
+def expected(filename, modified=1.0):
+    return torch.from_numpy(pixels(filename, modified)).float() / 255.0
+
+
+def test_update_then_load(pack_module):
+    entries = [entry(f"{i}.png") for i in range(5)]
+    pack = pack_module.PoolPack("pool", WIDTH, HEIGHT, "Stretch")
+    assert pack.update(1, entries, Loader(entries)) is True
+
+    batch, errors = pack.load(["1.png", "2.png", "3.png"])
+    assert batch.shape == (3, HEIGHT, WIDTH, 3) and batch.dtype == torch.float32
+    assert errors == [None] * 3
+    for i, filename in enumerate(["1.png", "2.png", "3.png"]):
+        assert torch.equal(batch[i], expected(filename))
+
+    # Rows out of pool order take the copying path
+    batch, _ = pack.load(["4.png", "0.png"])
+    assert torch.equal(batch[0], expected("4.png")) and torch.equal(batch[1], expected("0.png"))
+
+
+def test_unchanged_pool_is_not_rebuilt(pack_module):
+    entries = [entry(f"{i}.png") for i in range(3)]
+    pack = pack_module.PoolPack("pool", WIDTH, HEIGHT, "Stretch")
+    pack.update(1, entries, Loader(entries))
+    loader = Loader(entries)
+    assert pack.update(1, entries, loader) is False
+    assert pack.update(2, list(reversed(entries)), loader) is False
+    assert loader.decoded == []
+
+
+def test_rebuild_decodes_only_changed_images(pack_module):
+    entries = [entry(f"{i}.png") for i in range(4)]
+    pack = pack_module.PoolPack("pool", WIDTH, HEIGHT, "Stretch")
+    pack.update(1, entries, Loader(entries))
+
+    changed = [entries[0], entry("1.png", modified=2.0), entries[3], entry("9.png")]
+    loader = Loader(changed)
+    assert pack.update(2, changed, loader) is True
+    assert sorted(loader.decoded) == ["1.png", "9.png"]
+
+    filenames = [e['filename'] for e in changed]
+    batch, errors = pack.load(filenames)
+    assert errors == [None] * 4
+    for i, e in enumerate(changed):
+        assert torch.equal(batch[i], expected(e['filename'], e['modified']))
+    assert pack.load(["2.png"])[1][0] is not None
+
+
+def test_failed_images_are_reported_and_not_retried(pack_module):
+    entries = [entry("a.png"), entry("bad.png"), entry("c.png")]
+    pack = pack_module.PoolPack("pool", WIDTH, HEIGHT, "Stretch")
+    pack.update(1, entries, Loader(entries, fail={"bad.png"}))
+
+    batch, errors = pack.load(["a.png", "bad.png", "c.png"])
+    assert errors[0] is None and errors[2] is None
+    assert isinstance(errors[1], RuntimeError) and "cannot decode" in str(errors[1])
+    assert torch.count_nonzero(batch[1]) == 0
+    assert pack.stats()['failed'] == 1
+
+    grown = entries + [entry("d.png")]
+    loader = Loader(grown)
+    pack.update(2, grown, loader)
+    assert loader.decoded == ["d.png"]
+
+
+def test_pack_is_reused_from_disk(pack_module):
+    entries = [entry(f"{i}.png") for i in range(3)]
+    pack_module.PoolPack("pool", WIDTH, HEIGHT, "Stretch").update(1, entries, Loader(entries))
+
+    reopened = pack_module.PoolPack("pool", WIDTH, HEIGHT, "Stretch")
+    loader = Loader(entries)
+    assert reopened.update(5, entries, loader) is False
+    assert loader.decoded == []
+    batch, _ = reopened.load(["2.png"])
+    assert torch.equal(batch[0], expected("2.png"))
+
+    assert [p['images'] for p in pack_module.list_packs("pool")] == [3]
+    pack_module.remove_packs("pool")
+    assert pack_module.list_packs("pool") == []
+
+
+def test_unreadable_pack_file_is_rebuilt(pack_module):
+    entries = [entry("a.png")]
+    pack = pack_module.PoolPack("pool", WIDTH, HEIGHT, "Stretch")
+    pack.update(1, entries, Loader(entries))
+    with open(pack.path, 'r+b') as f:
+        f.truncate(10)
+
+    reopened = pack_module.PoolPack("pool", WIDTH, HEIGHT, "Stretch")
+    assert reopened.update(1, entries, Loader(entries)) is True
+    assert torch.equal(reopened.load(["a.png"])[0][0], expected("a.png"))
@@ -0,0 +1,144 @@
+import os
+import hashlib
+
+import pytest
+from PIL import Image
+
+
+@pytest.fixture
+def pool_module(modules, input_dir):
+    return modules("i9_pool_index")
+
+
+@pytest.fixture
+def pool_dir(pool_module, input_dir):
+    path = input_dir / pool_module.IMAGE_POOL
+    path.mkdir()
+    return path
+
+
+def write_image(path, size=(8, 6), color=(255, 0, 0), mtime=None):
+    Image.new('RGB', size, color).save(path)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def new_index(pool_module):
+    return pool_module.PoolIndex(pool_module.IMAGE_POOL, pool_module.IMAGE_EXTENSIONS)
+
+
+def test_in_place_overwrite_changes_generation(pool_module, pool_dir):
+    write_image(pool_dir / "img0.png", mtime=1_000_000)
+    write_image(pool_dir / "img1.png", mtime=1_000_000)
+    index = new_index(pool_module)
+    token = index.generation()
+    dir_mtime = os.stat(pool_dir).st_mtime_ns
+
+    # Same name, same directory entry: only the file's own size and mtime move
+    with open(pool_dir / "img0.png", 'wb') as f:
+        Image.new('RGB', (16, 16), (0, 255, 0)).save(f, format='PNG')
+    os.utime(pool_dir / "img0.png", (1_000_100, 1_000_100))
+    assert os.stat(pool_dir).st_mtime_ns == dir_mtime
+
+    assert index.generation() != token
+    assert index.get("img0.png")['size'] == os.path.getsize(pool_dir / "img0.png")
+    assert index.dimensions("img0.png") == (16, 16)
+
+
+def test_same_size_overwrite_changes_generation(pool_module, pool_dir):
+    (pool_dir / "a.png").write_bytes(b"x" * 100)
+    os.utime(pool_dir / "a.png", (1_000_000, 1_000_000))
+    index = new_index(pool_module)
+    token = index.generation()
+    (pool_dir / "a.png").write_bytes(b"y" * 100)
+    os.utime(pool_dir / "a.png", (1_000_001, 1_000_001))
+    assert index.generation() != token
+
+
+def test_generation_is_stable_until_something_changes(pool_module, pool_dir):
+    write_image(pool_dir / "a.png")
+    index = new_index(pool_module)
+    token = index.generation()
+    assert index.generation() == token
+
+    write_image(pool_dir / "b.png")
+    index.add("b.png")
+    added = index.generation()
+    assert added != token
+    assert index.files() == ["a.png", "b.png"]
+
+    os.remove(pool_dir / "b.png")
+    index.remove("b.png")
+    assert index.generation() not in (token, added)
+    assert index.files() == ["a.png"]
+
+
+def test_external_changes_are_picked_up(pool_module, pool_dir):
+    write_image(pool_dir / "a.png")
+    index = new_index(pool_module)
+    assert index.files() == ["a.png"]
+    write_image(pool_dir / "b.png")
+    (pool_dir / "notes.txt").write_text("not an image")
+    # The directory mtime may not have moved within its resolution; a forced rescan always looks
+    index.refresh(force=True)
+    assert index.files() == ["a.png", "b.png"]
+
+
+def test_manifest_is_reloaded(pool_module, pool_dir):
+    write_image(pool_dir / "a.png", size=(40, 30))
+    write_image(pool_dir / "b.png")
+    index = new_index(pool_module)
+    token = index.generation()
+    assert index.dimensions("a.png") == (40, 30)
+    index.save()
+    assert os.path.exists(index.manifest_path)
+
+    reloaded = new_index(pool_module)
+    assert reloaded.generation() == token
+    assert reloaded.get("a.png")['width'] == 40
+
+
+def test_unreadable_manifest_is_ignored(pool_module, pool_dir):
+    write_image(pool_dir / "a.png")
+    index = new_index(pool_module)
+    os.makedirs(os.path.dirname(index.manifest_path), exist_ok=True)
+    with open(index.manifest_path, 'w') as f:
+        f.write("{broken")
+    assert index.files() == ["a.png"]
+
+
+def test_find_duplicate_hashes_on_demand(pool_module, pool_dir):
+    write_image(pool_dir / "a.png")
+    write_image(pool_dir / "b.png", color=(0, 0, 255))
+    index = new_index(pool_module)
+    data = (pool_dir / "a.png").read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+
+    assert index.find_duplicate(len(data), digest) == "a.png"
+    assert index.get("a.png")['sha256'] == digest
+    assert index.find_duplicate(len(data), "0" * 64) is None
+    assert index.find_duplicate(len(data) + 1, digest) is None
+
+
+def test_query_sorts_filters_and_pages(pool_module, pool_dir):
+    for i, name in enumerate(["cat.png", "dog.png", "cow.png"]):
+        write_image(pool_dir / name, mtime=1_000_000 + i)
+    index = new_index(pool_module)
+
+    page, total = index.query(sort='name', descending=False, limit=2)
+    assert [e['filename'] for e in page] == ["cat.png", "cow.png"] and total == 3
+    page, total = index.query(sort='mtime', descending=True, offset=1)
+    assert [e['filename'] for e in page] == ["dog.png", "cat.png"]
+    page, total = index.query(name_filter="C")
+    assert total == 2
+    with pytest.raises(ValueError):
+        index.query(sort='color')
+
+
+def test_claim_picks_a_unique_name(pool_module, pool_dir, input_dir):
+    write_image(pool_dir / "a.png")
+    index = new_index(pool_module)
+    tmp_path = input_dir / "upload.part"
+    tmp_path.write_bytes((pool_dir / "a.png").read_bytes())
+    assert index.claim(str(tmp_path), "a.png") == "a_1.png"
+    assert index.files() == ["a.png", "a_1.png"]
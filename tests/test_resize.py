@@ -0,0 +1,74 @@
+import sys
+
+import pytest
+import torch
+
+
+@pytest.fixture
+def resize(modules):
+    return modules("i9_resize")
+
+
+def random_image(height, width, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    return torch.randint(0, 256, (height, width, 3), dtype=torch.uint8, generator=generator)
+
+
+def common_upscale(image, width, height, crop):
+    """The float path both nodes used before the shared engine"""
+    samples = (image.float() / 255.0).movedim(-1, 0).unsqueeze(0)
+    return sys.modules["comfy.utils"].common_upscale(samples, width, height, "bilinear", crop)[0].movedim(0, -1)
+
+
+@pytest.mark.parametrize("resize_mode, crop", [("Center Crop", "center"), ("Stretch", "disabled")])
+def test_matches_common_upscale(resize, resize_mode, crop):
+    images = [random_image(300, 400, seed=0), random_image(240, 180, seed=1)]
+    resizer = resize.BatchResizer(len(images), 128, 96, resize_mode, device=torch.device("cpu"))
+    for index, image in enumerate(images):
+        resizer.add(index, image)
+    batch = resizer.flush()
+    for index, image in enumerate(images):
+        # Only the uint8 rounding of the output separates the two
+        assert (batch[index] - common_upscale(image, 128, 96, crop)).abs().max() <= 1 / 255 + 1e-6
+
+
+def flush_against_reference(resizer):
+    """flush() next to a plain .float() / 255 of the uint8 slots it converts in place"""
+    reference = resizer.pixels.float() / 255.0
+    return resizer.flush(), reference
+
+
+def test_flush_converts_across_chunks(resize):
+    # 7 * 512 * 512 * 3 values: more than one FLOAT_CONVERT_CHUNK and not a multiple of it
+    count, width, height = 7, 512, 512
+    assert count * width * height * 3 > resize.FLOAT_CONVERT_CHUNK
+    assert count * width * height * 3 % resize.FLOAT_CONVERT_CHUNK
+    resizer = resize.BatchResizer(count, width, height, "Stretch", device=torch.device("cpu"))
+    for index in range(count):
+        resizer.put_resized(index, random_image(height, width, seed=index))
+    batch, reference = flush_against_reference(resizer)
+    assert batch.dtype == torch.float32 and batch.shape == (count, height, width, 3)
+    assert torch.equal(batch, reference)
+
+
+def test_flush_with_odd_chunk_size(resize, monkeypatch):
+    # Many small steps whose boundaries fall mid-pixel and mid-image
+    monkeypatch.setattr(resize, "FLOAT_CONVERT_CHUNK", 1001)
+    resizer = resize.BatchResizer(3, 40, 30, "Center Crop", device=torch.device("cpu"))
+    for index in range(3):
+        resizer.add(index, random_image(50, 70, seed=index))
+    batch, reference = flush_against_reference(resizer)
+    assert torch.equal(batch, reference)
+
+
+def test_flush_keeps_letterbox_padding(resize, monkeypatch):
+    monkeypatch.setattr(resize, "FLOAT_CONVERT_CHUNK", 4099)
+    resizer = resize.BatchResizer(3, 64, 64, "Letterbox", device=torch.device("cpu"))
+    resizer.add(0, random_image(32, 128, seed=0))  # wide: bars top and bottom
+    resizer.add(1, random_image(128, 32, seed=1))  # tall: bars left and right
+    resizer.put_resized(2, random_image(64, 64, seed=2))
+    batch, reference = flush_against_reference(resizer)
+    assert torch.equal(batch, reference)
+    assert batch[0, :16].eq(0).all() and batch[0, 48:].eq(0).all()
+    assert batch[1, :, :16].eq(0).all() and batch[1, :, 48:].eq(0).all()
+    assert batch[0, 16:48].ne(0).any() and batch[1, :, 16:48].ne(0).any()
@@ -0,0 +1,115 @@
+import os
+import hashlib
+
+import pytest
+import torch
+
+
+@pytest.fixture
+def cache_module(modules, input_dir):
+    return modules("i9_tensor_cache")
+
+
+def tensor(value, values=256):
+    """float32 tensor of values * 4 bytes"""
+    return torch.full((values,), float(value))
+
+
+def write_file(path, data, mtime):
+    path.write_bytes(data)
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_lru_eviction_keeps_recently_used(cache_module):
+    cache = cache_module.TensorCache("test", max_bytes=3 * 1024)
+    for key in "abc":
+        cache.put(key, tensor(ord(key)))
+    assert cache.get("a") is not None  # a is now the most recently used
+    cache.put("d", tensor(0))
+
+    assert cache.get("b") is None
+    assert [key for key in "acd" if cache.get(key) is not None] == ["a", "c", "d"]
+    assert cache.stats()['bytes'] == 3 * 1024
+
+    cache.set_max_bytes(2 * 1024)
+    assert cache.get("a") is None
+    assert cache.stats()['entries'] == 2
+
+
+def test_entry_over_budget_is_not_kept(cache_module):
+    cache = cache_module.TensorCache("test", max_bytes=1024)
+    cache.put("big", tensor(1, values=512))
+    assert cache.get("big") is None
+    assert cache.stats()['bytes'] == 0
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_disk_tier_survives_a_new_process(cache_module, input_dir, compress):
+    cache = cache_module.TensorCache("test", compress=compress)
+    cache.put("k", tensor(3), use_disk=True)
+    suffix = ".npz" if compress else ".npy"
+    assert os.path.exists(input_dir / cache_module.CACHE_DIR_NAME / "test" / "k" / f"k{suffix}")
+
+    fresh = cache_module.TensorCache("test", compress=compress)
+    assert fresh.get("k") is None
+    loaded = fresh.get("k", use_disk=True)
+    assert torch.equal(loaded, tensor(3))
+    assert fresh.stats()['disk_hits'] == 1
+    assert fresh.get("k") is not None  # promoted to memory
+
+
+def test_unreadable_disk_entry_is_discarded(cache_module, input_dir):
+    cache = cache_module.TensorCache("test")
+    cache.put("k", tensor(3), use_disk=True)
+    disk_path = cache._disk_path("k")
+    with open(disk_path, 'wb') as f:
+        f.write(b"not numpy")
+
+    fresh = cache_module.TensorCache("test")
+    assert fresh.get("k", use_disk=True) is None
+    assert not os.path.exists(disk_path)
+
+
+def test_identical_files_share_a_key(cache_module, tmp_path):
+    cache = cache_module.TensorCache("test")
+    a = write_file(tmp_path / "a.bin", b"same", 1_000_000)
+    b = write_file(tmp_path / "b.bin", b"same", 1_000_100)
+    assert cache.make_key(a, 512, "Center Crop") == cache.make_key(b, 512, "Center Crop")
+    assert cache.file_digest(a) == hashlib.sha256(b"same").hexdigest()
+
+
+def test_changed_file_misses_and_drops_stale_entries(cache_module, tmp_path):
+    cache = cache_module.TensorCache("test")
+    path = write_file(tmp_path / "a.bin", b"first", 1_000_000)
+    old_key = cache.make_key(path, 512)
+    cache.put(old_key, tensor(1))
+
+    write_file(tmp_path / "a.bin", b"second", 1_000_100)
+    new_key = cache.make_key(path, 512)
+    assert new_key != old_key
+    assert cache.get(new_key) is None
+    # Re-hashing the rewritten file dropped what was cached for its old content
+    assert cache.get(old_key) is None
+    assert cache.stats()['bytes'] == 0
+
+
+def test_invalidate_path_drops_memory_and_disk(cache_module, tmp_path):
+    cache = cache_module.TensorCache("test")
+    path = write_file(tmp_path / "a.bin", b"content", 1_000_000)
+    key = cache.make_key(path, 512)
+    cache.put(key, tensor(1), use_disk=True)
+    assert os.path.exists(cache._disk_path(key))
+
+    cache.invalidate_path(path)
+    assert cache.get(key, use_disk=True) is None
+    assert not os.path.exists(cache._disk_path(key))
+
+
+def test_stat_keys_follow_mtime(cache_module, tmp_path):
+    cache = cache_module.TensorCache("test", hash_content=False)
+    path = write_file(tmp_path / "a.bin", b"same", 1_000_000)
+    key = cache.make_key(path, 512)
+    assert cache.make_key(path, 512) == key
+    write_file(tmp_path / "a.bin", b"same", 1_000_100)
+    assert cache.make_key(path, 512) != key
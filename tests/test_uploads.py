@@ -0,0 +1,177 @@
+import io
+import os
+import asyncio
+import hashlib
+
+import pytest
+from aiohttp import web, FormData
+from aiohttp.test_utils import TestClient, TestServer
+from PIL import Image
+from comfy_stubs import stub_routes
+
+
+@pytest.fixture
+def uploads(modules, input_dir):
+    return modules("i9_uploads")
+
+
+@pytest.fixture
+def pool_index(modules, input_dir):
+    return modules("i9_pool_index").PoolIndex("I9_VideoPool", (".mp4",))
+
+
+def send(resumable, upload_id, data, start, end):
+    with resumable.open_range(upload_id, start, end - start) as f:
+        f.write(data[start:end])
+    return resumable.commit_range(upload_id, start, end)
+
+
+def test_ranges_in_any_order_then_finalize(uploads, pool_index):
+    data = os.urandom(10000)
+    resumable = uploads.ResumableUploads("video")
+    upload = resumable.init("clip.mp4", len(data))
+    upload_id = upload['upload_id']
+    assert upload['committed'] == 0 and upload['ranges'] == []
+
+    state = send(resumable, upload_id, data, 6000, 10000)
+    assert state['committed'] == 0
+    state = send(resumable, upload_id, data, 0, 3000)
+    assert state['ranges'] == [[0, 3000], [6000, 10000]] and state['committed'] == 3000
+    state = send(resumable, upload_id, data, 2000, 6000)
+    assert state['ranges'] == [[0, 10000]] and state['committed'] == 10000
+
+    result = resumable.finalize(upload_id, pool_index, expected_sha256=hashlib.sha256(data).hexdigest().upper())
+    assert result['filename'] == "clip.mp4" and result['deduplicated'] is False
+    assert result['sha256'] == hashlib.sha256(data).hexdigest()
+    with open(os.path.join(pool_index.pool_dir, "clip.mp4"), 'rb') as f:
+        assert f.read() == data
+    assert pool_index.files() == ["clip.mp4"]
+    assert os.listdir(resumable.state_dir) == []
+
+
+def test_init_with_same_fingerprint_resumes(uploads):
+    resumable = uploads.ResumableUploads("video")
+    upload = resumable.init("clip.mp4", 100, fingerprint="clip.mp4-100-123")
+    send(resumable, upload['upload_id'], b"x" * 100, 0, 40)
+
+    resumed = uploads.ResumableUploads("video").init("clip.mp4", 100, fingerprint="clip.mp4-100-123")
+    assert resumed['upload_id'] == upload['upload_id']
+    assert resumed['committed'] == 40
+    assert resumable.init("clip.mp4", 100, fingerprint="other")['upload_id'] != upload['upload_id']
+
+
+def test_finalize_rejects_incomplete_and_corrupt_uploads(uploads, pool_index):
+    data = os.urandom(1000)
+    resumable = uploads.ResumableUploads("video")
+    upload_id = resumable.init("clip.mp4", len(data))['upload_id']
+    send(resumable, upload_id, data, 0, 500)
+    with pytest.raises(ValueError, match="incomplete"):
+        resumable.finalize(upload_id, pool_index)
+
+    send(resumable, upload_id, data, 500, 1000)
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        resumable.finalize(upload_id, pool_index, expected_sha256="0" * 64)
+    assert resumable.status(upload_id)['committed'] == 1000
+
+
+def test_finalize_deduplicates_identical_content(uploads, pool_index):
+    data = os.urandom(2000)
+    resumable = uploads.ResumableUploads("video")
+    results = []
+    for name in ("first.mp4", "second.mp4"):
+        upload_id = resumable.init(name, len(data))['upload_id']
+        send(resumable, upload_id, data, 0, len(data))
+        results.append(resumable.finalize(upload_id, pool_index))
+    assert results[1]['deduplicated'] is True
+    assert results[1]['filename'] == results[0]['filename'] == "first.mp4"
+    assert pool_index.files() == ["first.mp4"]
+
+
+def test_invalid_ranges_and_ids(uploads):
+    resumable = uploads.ResumableUploads("video")
+    upload_id = resumable.init("clip.mp4", 100)['upload_id']
+    with pytest.raises(ValueError):
+        resumable.open_range(upload_id, 90, 20)
+    with pytest.raises(KeyError):
+        resumable.status("../../etc/passwd")
+    with pytest.raises(KeyError):
+        resumable.status("0" * 32)
+    with pytest.raises(ValueError):
+        resumable.init("", 10)
+
+    resumable.abort(upload_id)
+    with pytest.raises(KeyError):
+        resumable.status(upload_id)
+
+
+def test_uploads_are_staged_outside_the_pool(uploads, pool_index):
+    path = uploads.staging_path()
+    assert not path.startswith(pool_index.pool_dir)
+    assert os.path.basename(path).startswith(uploads.TEMP_PREFIX)
+    with open(path, 'wb') as f:
+        f.write(b"data")
+    result = uploads.store_upload(pool_index, path, "clip.mp4", 4, hashlib.sha256(b"data").hexdigest())
+    assert result['filename'] == "clip.mp4" and not os.path.exists(path)
+
+
+def test_multipart_upload_deduplicates_identical_content(modules, input_dir):
+    processing = modules("i9_batch_processing")
+    processing._pool_index.refresh(force=True)
+    png = io.BytesIO()
+    Image.new('RGB', (8, 6), (255, 0, 0)).save(png, format='PNG')
+    data = png.getvalue()
+
+    async def upload(*names):
+        app = web.Application()
+        app.add_routes(stub_routes())
+        form = FormData()
+        for name in names:
+            form.add_field('image', data, filename=name, content_type='image/png')
+        async with TestClient(TestServer(app)) as client:
+            response = await client.post("/i9/batch/upload", data=form)
+            return await response.json()
+
+    first = asyncio.run(upload("a.png", "b.png"))
+    assert first['success'] and first['deduplicated'] == 1
+    assert [f['filename'] for f in first['files']] == ["a.png", "a.png"]
+    second = asyncio.run(upload("c.png"))
+    assert second['files'][0]['deduplicated'] is True and second['files'][0]['filename'] == "a.png"
+
+    pool_dir = input_dir / "I9_ImagePool"
+    assert sorted(os.listdir(pool_dir)) == ["a.png"]
+    assert (pool_dir / "a.png").read_bytes() == data
+    assert processing._pool_index.files() == ["a.png"]
+    assert processing._pool_index.get("a.png")['sha256'] == hashlib.sha256(data).hexdigest()
+
+
+def test_chunked_upload_route_checks_chunk_and_file_checksums(modules, input_dir):
+    extractor = modules("i9_batch_video_extractor")
+    extractor._pool_index.refresh(force=True)
+    data = os.urandom(3000)
+    digest = hashlib.sha256(data).hexdigest()
+
+    async def main():
+        app = web.Application()
+        app.add_routes(stub_routes())
+        async with TestClient(TestServer(app)) as client:
+            response = await client.post("/i9/video/upload/init", json={'filename': "clip.mp4", 'size': len(data)})
+            upload_id = (await response.json())['upload_id']
+
+            async def put(start, end, checksum):
+                response = await client.put(f"/i9/video/upload/{upload_id}?offset={start}", data=data[start:end],
+                                            headers={'X-Chunk-SHA256': checksum})
+                return response.status, await response.json()
+
+            status, result = await put(0, 2000, "0" * 64)
+            assert status == 400 and "checksum" in result['error']
+            status, result = await put(0, 2000, hashlib.sha256(data[:2000]).hexdigest())
+            assert status == 200 and result['committed'] == 2000
+            status, result = await put(2000, 3000, hashlib.sha256(data[2000:]).hexdigest())
+            assert result['committed'] == 3000
+
+            response = await client.post(f"/i9/video/upload/{upload_id}/finalize", json={'sha256': digest})
+            return await response.json()
+
+    result = asyncio.run(main())
+    assert result['success'] and result['file']['sha256'] == digest
+    assert (input_dir / "I9_VideoPool" / "clip.mp4").read_bytes() == data
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def sampling(modules):
+    return modules("i9_video_sampling")
+
+
+def scene_reader(cuts, frame_count, reads=None):
+    """read_frame for a clip of flat colours that change at each frame in cuts"""
+    colours = [(200, 30, 30), (30, 200, 30), (30, 30, 200), (220, 220, 40), (40, 220, 220)]
+
+    def read_frame(frame_number):
+        if frame_number >= frame_count:
+            return None
+        if reads is not None:
+            reads.append(frame_number)
+        scene = sum(1 for cut in cuts if frame_number >= cut)
+        return np.full((72, 128, 3), colours[scene % len(colours)], dtype=np.uint8)
+    return read_frame
+
+
+def test_evenly_spaced_takes_segment_centres(sampling):
+    assert sampling.sample_frame_numbers("Evenly Spaced", 100, 25.0, sample_count=4) == [12, 37, 62, 87]
+    assert sampling.sample_frame_numbers("Evenly Spaced", 3, 25.0, sample_count=8) == [0, 1, 2]
+
+
+def test_position_modes_resolve_per_video(sampling):
+    assert sampling.sample_frame_numbers("Timestamp", 300, 30.0, sample_time=2.0) == [60]
+    assert sampling.sample_frame_numbers("Timestamp", 300, 24.0, sample_time=2.0) == [48]
+    assert sampling.sample_frame_numbers("Timestamp", 30, 30.0, sample_time=2.0) == []
+    assert sampling.sample_frame_numbers("Percentage", 200, 30.0, sample_percent=50.0) == [100]
+    assert sampling.sample_frame_numbers("Percentage", 200, 30.0, sample_percent=100.0) == [199]
+    assert sampling.sample_frame_numbers("Frame Number", 10, 30.0, frame_number=12) == []
+    assert sampling.sample_frame_numbers("Frame Number", 0, 30.0) == []
+
+
+def test_samples_per_video(sampling):
+    assert sampling.samples_per_video("Scene Changes", 5) == 5
+    assert sampling.samples_per_video("Timestamp", 5) == 1
+
+
+def test_scene_changes_finds_every_cut(sampling):
+    read_frame = scene_reader([40, 90], 150)
+    scenes = sampling.detect_scene_changes(read_frame, 150, 30.0, threshold=0.3, max_scenes=10)
+    assert [frame_number for frame_number, _, _ in scenes] == [0, 40, 90]
+    assert all(score >= 0.3 for _, _, score in scenes)
+    assert np.array_equal(scenes[1][1], read_frame(40))
+
+
+def test_scene_changes_with_stride_reads_only_strided_frames(sampling):
+    reads = []
+    read_frame = scene_reader([40, 90], 150, reads)
+    scenes = sampling.detect_scene_changes(read_frame, 150, 30.0, threshold=0.3, max_scenes=10, stride=4)
+    assert reads == list(range(0, 150, 4))
+    # A cut is reported at the first analysed frame on or after it
+    assert [frame_number for frame_number, _, _ in scenes] == [0, 40, 92]
+
+
+def test_scene_changes_merges_cuts_within_min_gap(sampling):
+    # 10 frames apart at 30 fps is under SCENE_MIN_GAP_SECONDS
+    read_frame = scene_reader([40, 50, 100], 150)
+    scenes = sampling.detect_scene_changes(read_frame, 150, 30.0, threshold=0.3, max_scenes=10)
+    assert [frame_number for frame_number, _, _ in scenes] == [0, 40, 100]
+
+
+def test_scene_changes_keeps_the_strongest(sampling):
+    def read_frame(frame_number):
+        frame = np.full((72, 128, 3), (200, 30, 30), dtype=np.uint8)
+        if frame_number >= 40:
+            frame[:, :64] = (30, 200, 30)  # half the frame changes: score 0.5
+        if frame_number >= 90:
+            frame[:] = (30, 30, 200)  # all of it changes: score 1.0
+        return frame
+
+    scenes = sampling.detect_scene_changes(read_frame, 150, 30.0, threshold=0.3, max_scenes=2)
+    assert [(frame_number, round(score, 2)) for frame_number, _, score in scenes] == [(0, 1.0), (90, 1.0)]
+    scenes = sampling.detect_scene_changes(read_frame, 150, 30.0, threshold=0.3, max_scenes=3)
+    assert [frame_number for frame_number, _, _ in scenes] == [0, 40, 90]
+
+
+def test_scene_changes_stops_at_unreadable_frame(sampling):
+    read_frame = scene_reader([40, 90], 60)
+    scenes = sampling.detect_scene_changes(read_frame, 150, 30.0, threshold=0.3, max_scenes=10)
+    assert [frame_number for frame_number, _, _ in scenes] == [0, 40]
+
+
+def test_scene_results_cache_is_bounded(modules, monkeypatch):
+    extractor = modules("i9_batch_video_extractor")
+    monkeypatch.setattr(extractor, "MAX_SCENE_ANALYSES", 2)
+    monkeypatch.setattr(extractor, "_scene_cache", type(extractor._scene_cache)())
+    extractor._cache_scenes("a", [0, 40])
+    extractor._cache_scenes("b", [0])
+    assert extractor._cached_scenes("a") == [0, 40]  # a is now the most recently used
+    extractor._cache_scenes("c", [0, 90])
+    assert extractor._cached_scenes("b") is None
+    assert list(extractor._scene_cache) == ["a", "c"]